@@ -0,0 +1,54 @@
+"""Compares boolean queries over bitmaps against filtering every video."""
+
+import os
+import sys
+import tempfile
+import timeit
+
+from bench.catalog_generator import write_catalog
+from src.video_library import VideoLibrary
+
+# Each query and the same test written as a filter over one video.
+_QUERIES = (
+    ("#topic0 AND NOT flagged",
+     lambda video: "#topic0" in video.tags and not video.flagged),
+    ("#category1 OR #category2",
+     lambda video: "#category1" in video.tags or "#category2" in video.tags),
+    ("cats AND (#topic3 OR #topic7) AND NOT bread",
+     lambda video: ("CATS" in video.title.upper()
+                    and ("#topic3" in video.tags or "#topic7" in video.tags)
+                    and "BREAD" not in video.title.upper())),
+)
+
+
+def query_latency(count, k=10, repeat=5, seed=0):
+    """Returns the mean (filter, query) latency in seconds per query."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "videos.txt")
+        write_catalog(path, count, seed)
+        library = VideoLibrary(path)
+    for video_id in ("video_00000000_id", "video_00000001_id"):
+        library.flag_video(video_id, "benchmark")
+    for query, _ in _QUERIES:
+        # Build the indexes and term bitmaps before timing.
+        library.query(query, k)
+    searches = (
+        lambda query, matches: sum(
+            1 for video in library.iter_videos() if matches(video)),
+        lambda query, matches: library.query(query, k),
+    )
+    timings = []
+    for search in searches:
+        seconds = min(timeit.repeat(
+            lambda: [search(query, matches) for query, matches in _QUERIES],
+            number=1, repeat=repeat))
+        timings.append(seconds / len(_QUERIES))
+    return tuple(timings)
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'videos':>10} {'filter ms':>10} {'query ms':>10}")
+    for size in sizes:
+        every, query = query_latency(size)
+        print(f"{size:>10} {every * 1000:>10.2f} {query * 1000:>10.2f}")
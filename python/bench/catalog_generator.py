@@ -0,0 +1,52 @@
+"""A synthetic video catalog generator for benchmarks."""
+
+import random
+import sys
+
+# The words synthetic titles are made of.
+WORDS = (
+    "amazing", "funny", "cats", "dogs", "life", "at", "google", "video",
+    "about", "nothing", "cooking", "travel", "music", "live", "review",
+    "tutorial", "python", "game", "highlights", "news", "science", "daily",
+    "best", "of", "the", "week", "how", "to", "make", "bread",
+)
+
+
+def generate_rows(count, seed=0, tag_vocabulary=2000):
+    """Yields count synthetic (title, video_id, tags) rows.
+
+    Like "#cat , #animal", most videos carry a topic tag and the category
+    tag it belongs to. Topics follow a Zipf-like distribution, so a few
+    tags are very common and most are rare, and some videos carry an extra
+    tag or none at all. The output only depends on the arguments.
+    """
+    rng = random.Random(seed)
+    topics = [f"#topic{rank}" for rank in range(tag_vocabulary)]
+    categories = [f"#category{rank}" for rank in range(tag_vocabulary // 50 + 1)]
+    weights = [1 / rank for rank in range(1, tag_vocabulary + 1)]
+    for number in range(count):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6)))
+        tags = ()
+        if rng.random() < 0.95:
+            rank = rng.choices(range(tag_vocabulary), weights)[0]
+            tags = (topics[rank], categories[rank % len(categories)])
+            if rng.random() < 0.2:
+                extra = rng.choices(topics, weights)[0]
+                if extra not in tags:
+                    tags += (extra,)
+        yield title.capitalize(), f"video_{number:08d}_id", tags
+
+
+def write_catalog(path, count, seed=0):
+    """Writes count synthetic rows to path in the videos.txt format."""
+    with open(path, "w") as catalog_file:
+        for title, video_id, tags in generate_rows(count, seed):
+            catalog_file.write(f"{title} | {video_id} | {' , '.join(tags)}\n")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        sys.exit("Usage: python3 -m bench.catalog_generator <path> <count> "
+                 "[seed]")
+    write_catalog(sys.argv[1], int(sys.argv[2]),
+                  int(sys.argv[3]) if len(sys.argv) == 4 else 0)
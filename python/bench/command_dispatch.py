@@ -0,0 +1,36 @@
+"""Measures the cost of dispatching each command verb."""
+
+import timeit
+
+from src.command_parser import COMMANDS
+from src.command_parser import CommandParser
+from src.command_stats import CommandStats
+
+
+class _NullPlayer:
+    """A player whose every method does nothing, so only dispatch is timed."""
+
+    def __getattr__(self, name):
+        return lambda *arguments: None
+
+
+def dispatch_nanoseconds(number=200_000, stats=None):
+    """Returns the nanoseconds per execute_command call for every verb."""
+    parser = CommandParser(_NullPlayer(), stats=stats)
+    timings = {}
+    for spec in COMMANDS:
+        arguments = ["x"] * (spec.arities[0] if spec.arities
+                             else spec.min_args or 0)
+        command = [spec.verb.lower()] + arguments
+        seconds = min(timeit.repeat(
+            lambda: parser.execute_command(command), number=number, repeat=3))
+        timings[spec.verb] = seconds / number * 1e9
+    return timings
+
+
+if __name__ == "__main__":
+    plain = dispatch_nanoseconds()
+    timed = dispatch_nanoseconds(stats=CommandStats())
+    print(f"{'':<24} {'plain':>11} {'with stats':>11}")
+    for verb, nanoseconds in plain.items():
+        print(f"{verb:<24} {nanoseconds:>8.1f} ns {timed[verb]:>8.1f} ns")
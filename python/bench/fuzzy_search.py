@@ -0,0 +1,59 @@
+"""Compares fuzzy search through the BK-tree against scanning every title."""
+
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+from bench.catalog_generator import write_catalog
+from src.video_index import edit_distance
+from src.video_index import max_edits
+from src.video_library import VideoLibrary
+
+_TYPOS = ("amzing", "coking", "tutoral", "highlihgts", "#topc17")
+
+
+def _scan(library, term, k):
+    term = term.lstrip("#").upper()
+    limit = max_edits(term)
+    found = []
+    for video in library.iter_videos_by_title():
+        words = video.title.upper().split() + [
+            tag.lstrip("#").upper() for tag in video.tags]
+        if any(edit_distance(term, word) <= limit for word in words):
+            found.append(video)
+            if len(found) == k:
+                break
+    return found
+
+
+def search_latency(count, k=10, repeat=5, seed=0):
+    """Returns the index build time and mean (scan, indexed) query latency.
+
+    The scan stops at its k-th match, so it is a lower bound on a full one.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "videos.txt")
+        write_catalog(path, count, seed)
+        library = VideoLibrary(path)
+    start = time.perf_counter()
+    library.search_fuzzy(_TYPOS[0], k)
+    build = time.perf_counter() - start
+    timings = []
+    for search in (lambda term: _scan(library, term, k),
+                   lambda term: library.search_fuzzy(term, k)):
+        seconds = min(timeit.repeat(
+            lambda: [search(term) for term in _TYPOS],
+            number=1, repeat=repeat))
+        timings.append(seconds / len(_TYPOS))
+    return (build,) + tuple(timings)
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'videos':>10} {'build s':>10} {'scan ms':>10} {'indexed ms':>10}")
+    for size in sizes:
+        build, scan, indexed = search_latency(size)
+        print(f"{size:>10} {build:>10.2f} {scan * 1000:>10.2f} "
+              f"{indexed * 1000:>10.2f}")
@@ -0,0 +1,56 @@
+"""Measures journal recovery time against the length of its history."""
+
+import random
+import sys
+import tempfile
+import time
+
+from src.state_journal import StateJournal
+
+
+def write_history(directory, changes, compact_every, seed=0):
+    """Journals changes random flag and playlist changes.
+
+    Returns:
+        The changes written per second.
+    """
+    rng = random.Random(seed)
+    journal = StateJournal(directory, sync_every=1024,
+                           compact_every=compact_every)
+    playlists = [f"playlist_{number}" for number in range(20)]
+    for name in playlists:
+        journal.create_playlist(name)
+    start = time.perf_counter()
+    for _ in range(changes):
+        video_id = f"video_{rng.randrange(10_000)}"
+        kind = rng.randrange(4)
+        if kind == 0:
+            journal.flag(video_id, "benchmark")
+        elif kind == 1:
+            journal.allow(video_id)
+        elif kind == 2:
+            journal.add_to_playlist(rng.choice(playlists), video_id)
+        else:
+            journal.remove_from_playlist(rng.choice(playlists), video_id)
+    journal.close()
+    return changes / (time.perf_counter() - start)
+
+
+def recovery_seconds(directory):
+    """Returns how long reopening the journal in directory takes."""
+    start = time.perf_counter()
+    StateJournal(directory).close()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or [10_000, 100_000]
+    for changes in sizes:
+        for compact_every in (None, 10_000):
+            with tempfile.TemporaryDirectory() as directory:
+                rate = write_history(directory, changes, compact_every)
+                seconds = recovery_seconds(directory)
+            label = "never" if compact_every is None else f"{compact_every:,}"
+            print(f"{changes:>10,} changes, snapshot every {label:>6}: "
+                  f"written at {rate:,.0f}/s, recovered in "
+                  f"{seconds * 1000:.1f} ms")
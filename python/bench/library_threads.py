@@ -0,0 +1,57 @@
+"""Measures library read throughput by number of reader threads."""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from bench.catalog_generator import write_catalog
+from src.video_library import VideoLibrary
+
+
+def reads_per_second(library, threads, seconds=1.0):
+    """Returns the reads per second threads readers reach together.
+
+    A writer thread flags and allows a video every millisecond meanwhile.
+    """
+    video_ids = [video.video_id for _, video in zip(range(1000),
+                                                     library.iter_videos())]
+    counts = [0] * threads
+    stop = threading.Event()
+
+    def read(number):
+        reads = 0
+        while not stop.is_set():
+            library.get_video(video_ids[reads % len(video_ids)])
+            library.get_random_playable_video()
+            reads += 2
+        counts[number] = reads
+
+    def write():
+        while not stop.is_set():
+            library.flag_video(video_ids[0], "benchmark")
+            library.allow_video(video_ids[0])
+            time.sleep(0.001)
+
+    workers = [threading.Thread(target=read, args=(number,))
+               for number in range(threads)]
+    workers.append(threading.Thread(target=write))
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return sum(counts) / seconds
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "videos.txt")
+        write_catalog(path, count)
+        library = VideoLibrary(path, thread_safe=True)
+    for threads in (1, 2, 4, 8):
+        rate = reads_per_second(library, threads)
+        print(f"{threads:>2} reader threads: {rate:,.0f} reads/s")
@@ -0,0 +1,50 @@
+"""Measures bulk playlist changes per second in a SQLite playlist store."""
+
+import os
+import sys
+import tempfile
+import time
+
+from bench.catalog_generator import write_catalog
+from src.playlist_store import SqlitePlaylistStore
+from src.video_library import VideoLibrary
+
+
+def changes_per_second(library, path, batch_size, playlists=5):
+    """Returns the adds and removes per second reached with batch_size."""
+    videos = list(library.iter_videos())
+    store = SqlitePlaylistStore(path, library, batch_size=batch_size)
+    start = time.perf_counter()
+    for number in range(playlists):
+        playlist = store.create(f"playlist_{number}")
+        for video in videos:
+            playlist.add_video(video)
+        for video in videos[::2]:
+            playlist.remove_video(video.video_id)
+    store.close()
+    elapsed = time.perf_counter() - start
+    return playlists * (len(videos) + len(videos[::2])) / elapsed
+
+
+def open_seconds(library, path):
+    """Returns how long opening the store and listing its playlists takes."""
+    start = time.perf_counter()
+    store = SqlitePlaylistStore(path, library)
+    names = [playlist.name for playlist in store]
+    elapsed = time.perf_counter() - start
+    store.close()
+    assert names
+    return elapsed
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    with tempfile.TemporaryDirectory() as directory:
+        catalog_path = os.path.join(directory, "videos.txt")
+        write_catalog(catalog_path, count)
+        library = VideoLibrary(catalog_path)
+        for batch_size in (1, 100, 10_000):
+            path = os.path.join(directory, f"playlists-{batch_size}.db")
+            rate = changes_per_second(library, path, batch_size)
+            print(f"batch size {batch_size:>6}: {rate:,.0f} changes/s")
+        print(f"open and list: {open_seconds(library, path) * 1000:.2f} ms")
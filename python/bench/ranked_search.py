@@ -0,0 +1,41 @@
+"""Compares ranked top-k search against listing every match."""
+
+import os
+import sys
+import tempfile
+import timeit
+
+from bench.catalog_generator import write_catalog
+from src.video_library import VideoLibrary
+
+_TERMS = ("cats", "bread", "highlights", "at", "topic7")
+
+
+def search_latency(count, k=10, repeat=5, seed=0):
+    """Returns the mean (every match, top k) latency in seconds per query."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "videos.txt")
+        write_catalog(path, count, seed)
+        library = VideoLibrary(path)
+    for term in _TERMS:
+        # Build the indexes before timing.
+        library.search_ranked(term, k)
+    searches = (
+        lambda term: list(library.iter_videos_matching(term)),
+        lambda term: library.search_ranked(term, k),
+    )
+    timings = []
+    for search in searches:
+        seconds = min(timeit.repeat(
+            lambda: [search(term) for term in _TERMS],
+            number=1, repeat=repeat))
+        timings.append(seconds / len(_TERMS))
+    return tuple(timings)
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'videos':>10} {'all ms':>10} {'top 10 ms':>10}")
+    for size in sizes:
+        every, top = search_latency(size)
+        print(f"{size:>10} {every * 1000:>10.2f} {top * 1000:>10.2f}")
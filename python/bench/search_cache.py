@@ -0,0 +1,63 @@
+"""Times a stream of popular searches with the result cache off and on."""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bench.catalog_generator import WORDS
+from bench.catalog_generator import write_catalog
+from src.video_library import SEARCH_CACHE_BYTES
+from src.video_library import VideoLibrary
+
+
+def _searches(count, seed):
+    # A few searches are far more popular than the rest, as in real traffic.
+    rng = random.Random(seed)
+    terms = [("title", word) for word in WORDS]
+    terms += [("tag", f"#topic{rank}") for rank in range(200)]
+    rng.shuffle(terms)
+    weights = [1 / rank for rank in range(1, len(terms) + 1)]
+    return rng.choices(terms, weights, k=count)
+
+
+def search_latency(count, searches=2000, flag_every=100, seed=0):
+    """Returns the mean latency in seconds per search without and with the
+    cache, and the cache hit rate.
+
+    One video is flagged every flag_every searches, which invalidates the
+    cache.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "videos.txt")
+        write_catalog(path, count, seed)
+        libraries = [VideoLibrary(path, search_cache_bytes=size)
+                     for size in (0, SEARCH_CACHE_BYTES)]
+    stream = _searches(searches, seed)
+    timings = []
+    for library in libraries:
+        # Build the indexes before timing.
+        list(library.iter_videos_matching(WORDS[0]))
+        list(library.iter_videos_with_tag("#topic0"))
+        start = time.perf_counter()
+        for number, (kind, term) in enumerate(stream):
+            if number % flag_every == flag_every - 1:
+                library.flag_video(f"video_{number % count:08d}_id",
+                                   "benchmark")
+            if kind == "title":
+                list(library.iter_videos_matching(term))
+            else:
+                list(library.iter_videos_with_tag(term))
+        timings.append((time.perf_counter() - start) / searches)
+    cache = libraries[1].search_cache
+    return timings[0], timings[1], cache.hits / (cache.hits + cache.misses)
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'videos':>10} {'off ms':>10} {'on ms':>10} {'hit rate':>10}")
+    for size in sizes:
+        off, on, hit_rate = search_latency(size)
+        print(f"{size:>10} {off * 1000:>10.3f} {on * 1000:>10.3f} "
+              f"{hit_rate:>10.1%}")
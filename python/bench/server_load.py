@@ -0,0 +1,93 @@
+"""A load generator measuring server throughput and tail latency."""
+
+import argparse
+import asyncio
+import itertools
+import time
+
+from src.server import END_OF_RESPONSE
+from src.server import Server
+from src.video_library import VideoLibrary
+
+# Every line gets exactly one response, including the answer to a search.
+_SCRIPT = (
+    "NUMBER_OF_VIDEOS",
+    "PLAY amazing_cats_video_id",
+    "SHOW_PLAYING",
+    "PAUSE",
+    "CONTINUE",
+    "SEARCH_VIDEOS_WITH_TAG #cat",
+    "no",
+    "SEARCH_VIDEOS dog",
+    "no",
+    "STOP",
+)
+
+
+async def _client(host, port, commands, depth, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    window = asyncio.Semaphore(depth)
+    sent = []
+
+    async def receive():
+        for _ in range(commands):
+            while await reader.readline() != END_OF_RESPONSE:
+                pass
+            latencies.append(time.perf_counter() - sent.pop(0))
+            window.release()
+
+    receiver = asyncio.ensure_future(receive())
+    for line in itertools.islice(itertools.cycle(_SCRIPT), commands):
+        await window.acquire()
+        sent.append(time.perf_counter())
+        writer.write(line.encode("utf-8") + b"\n")
+        await writer.drain()
+    await receiver
+    writer.write(b"EXIT\n")
+    writer.close()
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run_load(host, port, clients, commands, depth):
+    """Runs the clients and returns (commands per second, latencies)."""
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, commands, depth, latencies)
+        for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, sorted(latencies)
+
+
+async def _main(options):
+    server = None
+    port = options.port
+    if port is None:
+        # Serve from this process so the benchmark needs no setup.
+        handler = Server(VideoLibrary()).handle
+        server = await asyncio.start_server(handler, options.host, 0)
+        port = server.sockets[0].getsockname()[1]
+    rate, latencies = await run_load(
+        options.host, port, options.clients, options.commands, options.depth)
+    if server is not None:
+        server.close()
+    print(f"{options.clients} clients, depth {options.depth}: "
+          f"{rate:.0f} commands/s")
+    for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        print(f"{name}: {_percentile(latencies, fraction) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("--host", default="127.0.0.1")
+    arguments.add_argument("--port", type=int, default=None,
+                           help="a running server; starts one if omitted")
+    arguments.add_argument("--clients", type=int, default=100)
+    arguments.add_argument("--commands", type=int, default=1000,
+                           help="commands sent by each client")
+    arguments.add_argument("--depth", type=int, default=8,
+                           help="commands each client pipelines")
+    asyncio.run(_main(arguments.parse_args()))
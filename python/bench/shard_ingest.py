@@ -0,0 +1,56 @@
+"""Measures sharded catalog ingestion time by number of processes."""
+
+import os
+import sys
+import tempfile
+import time
+
+from bench.catalog_generator import generate_rows
+from src.video_catalog import _merge_encoded
+from src.video_catalog import _read_shard
+from src.video_library import VideoLibrary
+
+
+def _write_shards(directory, count, shards, seed=0):
+    paths = [os.path.join(directory, f"videos-{shard:03d}.txt")
+             for shard in range(shards)]
+    files = [open(path, "w") for path in paths]
+    for number, (title, video_id, tags) in enumerate(
+            generate_rows(count, seed)):
+        files[number % shards].write(
+            f"{title} | {video_id} | {' , '.join(tags)}\n")
+    for shard_file in files:
+        shard_file.close()
+    return paths
+
+
+def ingest_seconds(count, shards, processes_options):
+    """Returns the seconds to load count videos for each process count.
+
+    The "merge" entry is the time the parent spends merging what the
+    workers send back, which does not shrink with more processes and so
+    bounds how far loading scales.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        paths = _write_shards(directory, count, shards)
+        timings = {}
+        for processes in processes_options:
+            start = time.perf_counter()
+            VideoLibrary(paths, lazy=True, processes=processes)
+            timings[processes] = time.perf_counter() - start
+        encoded = [_read_shard(path) for path in paths]
+        start = time.perf_counter()
+        _merge_encoded(encoded)
+        timings["merge"] = time.perf_counter() - start
+    return timings
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    cpus = os.cpu_count() or 1
+    options = sorted({1, 2, 4, cpus} & set(range(1, cpus + 1)))
+    timings = ingest_seconds(count, 16, options)
+    merge = timings.pop("merge")
+    for processes, seconds in timings.items():
+        print(f"{processes:>3} processes: {seconds:.2f} s for {count} videos")
+    print(f"Merging worker results takes {merge:.2f} s in the parent process")
@@ -0,0 +1,253 @@
+"""Times every command verb and library loading on synthetic catalogs.
+
+Results are written as JSON so runs from different versions can be
+compared. For example:
+
+    python3 -m bench.suite 10000 1000000 --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from bench.catalog_generator import WORDS
+from bench.catalog_generator import generate_rows
+from bench.catalog_generator import write_catalog
+from src.command_parser import COMMANDS
+from src.command_parser import CommandParser
+from src.output_sink import MemorySink
+from src.video_catalog import compile_catalog
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+class _Workload:
+    """Picks realistic arguments for commands against one catalog."""
+
+    def __init__(self, count, seed):
+        self._rng = random.Random(seed)
+        self._count = count
+        # The tags of the first rows follow the catalog's distribution.
+        self._tags = [tag for _, _, tags in generate_rows(min(count, 10_000),
+                                                          seed)
+                      for tag in tags]
+        self.playlists = 0
+
+    def video_id(self):
+        return f"video_{self._rng.randrange(self._count):08d}_id"
+
+    def word(self):
+        return self._rng.choice(WORDS)
+
+    def typo(self):
+        word = self.word()
+        position = self._rng.randrange(len(word))
+        return word[:position] + word[position + 1:]
+
+    def tag(self):
+        return self._rng.choice(self._tags)
+
+    def playlist(self):
+        self.playlists += 1
+        return f"playlist_{self.playlists}"
+
+
+# For each verb, a function returning the commands that set up the state it
+# needs, which are not timed, and the command that is timed.
+_WORKLOADS = {
+    "SHOW_VIDEOS_PAGE": lambda w: ([], ["SHOW_VIDEOS_PAGE", "20"]),
+    "PLAY": lambda w: ([], ["PLAY", w.video_id()]),
+    "STOP": lambda w: ([["PLAY", w.video_id()]], ["STOP"]),
+    "PAUSE": lambda w: ([["PLAY", w.video_id()]], ["PAUSE"]),
+    "CONTINUE": lambda w: ([["PLAY", w.video_id()], ["PAUSE"]],
+                           ["CONTINUE"]),
+    "SHOW_PLAYING": lambda w: ([["PLAY", w.video_id()]], ["SHOW_PLAYING"]),
+    "CREATE_PLAYLIST": lambda w: ([], ["CREATE_PLAYLIST", w.playlist()]),
+    "ADD_TO_PLAYLIST": lambda w: _with_playlist(
+        w, [], lambda name: ["ADD_TO_PLAYLIST", name, w.video_id()]),
+    "REMOVE_FROM_PLAYLIST": lambda w: _with_video_in_playlist(
+        w, lambda name, video_id: ["REMOVE_FROM_PLAYLIST", name, video_id]),
+    "CLEAR_PLAYLIST": lambda w: _with_video_in_playlist(
+        w, lambda name, _: ["CLEAR_PLAYLIST", name]),
+    "DELETE_PLAYLIST": lambda w: _with_video_in_playlist(
+        w, lambda name, _: ["DELETE_PLAYLIST", name]),
+    "SHOW_PLAYLIST": lambda w: _with_video_in_playlist(
+        w, lambda name, _: ["SHOW_PLAYLIST", name]),
+    "SHOW_PLAYLIST_PAGE": lambda w: _with_video_in_playlist(
+        w, lambda name, _: ["SHOW_PLAYLIST_PAGE", name, "20"]),
+    "SEARCH_VIDEOS": lambda w: ([], ["SEARCH_VIDEOS", w.word()]),
+    "SEARCH_VIDEOS_RANKED": lambda w: (
+        [], ["SEARCH_VIDEOS_RANKED", w.word(), "10"]),
+    "SEARCH_VIDEOS_FUZZY": lambda w: (
+        [], ["SEARCH_VIDEOS_FUZZY", w.typo(), "10"]),
+    "SEARCH_VIDEOS_WITH_TAG": lambda w: (
+        [], ["SEARCH_VIDEOS_WITH_TAG", w.tag()]),
+    "QUERY_VIDEOS": lambda w: (
+        [], ["QUERY_VIDEOS", w.tag(), "AND", "NOT", w.word(), "OR",
+             "FLAGGED"]),
+    "FLAG_VIDEO": lambda w: _with_video(
+        w, lambda video_id: ([["ALLOW_VIDEO", video_id]],
+                             ["FLAG_VIDEO", video_id, "benchmark"])),
+    "ALLOW_VIDEO": lambda w: _with_video(
+        w, lambda video_id: ([["FLAG_VIDEO", video_id]],
+                             ["ALLOW_VIDEO", video_id])),
+}
+
+
+def _with_video(workload, commands):
+    return commands(workload.video_id())
+
+
+def _with_playlist(workload, setup, command):
+    name = workload.playlist()
+    return setup + [["CREATE_PLAYLIST", name]], command(name)
+
+
+def _with_video_in_playlist(workload, command):
+    name = workload.playlist()
+    video_id = workload.video_id()
+    return ([["CREATE_PLAYLIST", name], ["ADD_TO_PLAYLIST", name, video_id]],
+            command(name, video_id))
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def time_verbs(library, count, seed=0, iterations=1000, budget=1.0):
+    """Times every command verb through a CommandParser.
+
+    Each verb is run up to iterations times, or for about budget seconds if
+    that is shorter, with setup commands run untimed before each call.
+
+    Returns:
+        A dict from verb to its calls and latency summary in nanoseconds.
+    """
+    output = MemorySink()
+    player = VideoPlayer(output=output, video_library=library,
+                         defer_answers=True)
+    parser = CommandParser(player)
+    workload = _Workload(count, seed)
+    results = {}
+    for verb in [command.verb for command in COMMANDS] + ["HELP"]:
+        make = _WORKLOADS.get(verb, lambda w, verb=verb: ([], [verb]))
+        timings = []
+        started = time.perf_counter()
+        while (len(timings) < iterations
+               and time.perf_counter() - started < budget):
+            setup, command = make(workload)
+            for line in setup:
+                parser.execute_command(line)
+            start = time.perf_counter_ns()
+            parser.execute_command(command)
+            timings.append(time.perf_counter_ns() - start)
+            if player.awaiting_answer:
+                player.answer_search("no")
+            output.take()
+        timings.sort()
+        results[verb] = {
+            "calls": len(timings),
+            "mean_ns": sum(timings) // len(timings),
+            "p50_ns": _percentile(timings, 0.5),
+            "p95_ns": _percentile(timings, 0.95),
+            "p99_ns": _percentile(timings, 0.99),
+        }
+    return results
+
+
+def measure_load(catalog_path):
+    """Loads the catalog twice, to time it and to trace its peak memory.
+
+    Returns:
+        The loaded VideoLibrary and a dict of load measurements.
+    """
+    start = time.perf_counter()
+    library = VideoLibrary(catalog_path)
+    seconds = time.perf_counter() - start
+    del library
+
+    tracemalloc.start()
+    library = VideoLibrary(catalog_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return library, {"seconds": seconds, "peak_bytes": peak,
+                     "videos": len(library)}
+
+
+def _revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+            check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes, directory, seed=0, compiled=False, iterations=1000,
+              budget=1.0):
+    """Runs the whole suite and returns its results as a JSON-ready dict."""
+    runs = []
+    for count in sizes:
+        catalog_path = os.path.join(directory, f"videos-{count}-{seed}.txt")
+        if not os.path.exists(catalog_path):
+            write_catalog(catalog_path, count, seed)
+        if compiled:
+            text_path = catalog_path
+            catalog_path = text_path[:-len(".txt")] + ".ytc"
+            if not os.path.exists(catalog_path):
+                compile_catalog(text_path, catalog_path)
+        library, load = measure_load(catalog_path)
+        runs.append({
+            "videos": count,
+            "load": load,
+            "verbs": time_verbs(library, count, seed, iterations, budget),
+        })
+    return {
+        "revision": _revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "catalog": "compiled" if compiled else "text",
+        "runs": runs,
+    }
+
+
+def _main():
+    arguments = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0])
+    arguments.add_argument("sizes", type=int, nargs="*", default=[10_000],
+                           help="catalog sizes, such as 10000 1000000 "
+                                "10000000")
+    arguments.add_argument("--seed", type=int, default=0)
+    arguments.add_argument("--compiled", action="store_true",
+                           help="load compiled catalogs instead of text")
+    arguments.add_argument("--iterations", type=int, default=1000,
+                           help="the most calls timed for each verb")
+    arguments.add_argument("--budget", type=float, default=1.0,
+                           help="the seconds spent timing each verb")
+    arguments.add_argument("--catalogs", metavar="DIRECTORY",
+                           help="keep generated catalogs here for reuse")
+    arguments.add_argument("--output", metavar="FILE",
+                           help="write the JSON results here, not stdout")
+    options = arguments.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = run_suite(options.sizes, options.catalogs or directory,
+                            options.seed, options.compiled,
+                            options.iterations, options.budget)
+    text = json.dumps(results, indent=2)
+    if options.output is None:
+        print(text)
+    else:
+        with open(options.output, "w") as output_file:
+            output_file.write(text + "\n")
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,46 @@
+"""Compares indexed title search against a full scan by catalog size."""
+
+import os
+import sys
+import tempfile
+import timeit
+
+from bench.catalog_generator import write_catalog
+from src.video_library import VideoLibrary
+
+_TERMS = ("cats", "bread", "highlights of", "review")
+
+
+def _scan(library, term):
+    term = term.upper()
+    return [video for video in library.iter_videos_by_title()
+            if term in video.title.upper()]
+
+
+def _indexed(library, term):
+    return list(library.iter_videos_matching(term))
+
+
+def search_latency(count, repeat=5, seed=0):
+    """Returns the mean (scan, indexed) latency in seconds per query."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "videos.txt")
+        write_catalog(path, count, seed)
+        library = VideoLibrary(path)
+    for term in _TERMS:
+        assert _scan(library, term) == _indexed(library, term)
+    timings = []
+    for search in (_scan, _indexed):
+        seconds = min(timeit.repeat(
+            lambda: [search(library, term) for term in _TERMS],
+            number=1, repeat=repeat))
+        timings.append(seconds / len(_TERMS))
+    return tuple(timings)
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'videos':>10} {'scan ms':>10} {'indexed ms':>10}")
+    for size in sizes:
+        scan, indexed = search_latency(size)
+        print(f"{size:>10} {scan * 1000:>10.2f} {indexed * 1000:>10.2f}")
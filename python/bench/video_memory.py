@@ -0,0 +1,62 @@
+"""Measures the memory a loaded VideoLibrary retains per video."""
+
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from bench.catalog_generator import write_catalog
+from src.video_catalog import compile_catalog
+from src.video_library import VideoLibrary
+
+
+def _retained(load):
+    gc.collect()
+    tracemalloc.start()
+    library = load()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return library, size
+
+
+def bytes_per_video(count=100_000, seed=0):
+    """Returns the bytes retained per video by a loaded VideoLibrary.
+
+    This counts everything the library keeps alive once loading is done,
+    which is what a host has to be sized for: the catalog it reads rows
+    from and every Video created so far, with their titles, ids and tags.
+    Indexes are not built yet, as they are only built on first use.
+
+    Returns:
+        A dict from loading mode to bytes per video. "eager" loads a
+        videos.txt file and creates every Video up front. "lazy" loads
+        the same file but creates no Videos, keeping the parsed rows
+        instead, which take more memory. "compiled" loads a compiled
+        catalog lazily, whose mapped file is counted at its size on disk.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        text_path = os.path.join(directory, "videos.txt")
+        compiled_path = os.path.join(directory, "videos.ytc")
+        write_catalog(text_path, count, seed)
+        compile_catalog(text_path, compiled_path)
+        loads = {
+            "eager": lambda: VideoLibrary(text_path, lazy=False),
+            "lazy": lambda: VideoLibrary(text_path, lazy=True),
+            "compiled": lambda: VideoLibrary(compiled_path),
+        }
+        for mode, load in loads.items():
+            library, size = _retained(load)
+            if mode == "compiled":
+                size += os.path.getsize(compiled_path)
+            results[mode] = size / len(library)
+            del library
+    return results
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for mode, size in bytes_per_video(count).items():
+        print(f"{mode:>10} {size:.1f} bytes per video ({count} videos)")
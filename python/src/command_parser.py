@@ -1,7 +1,9 @@
 """A command parser class."""
 
-import textwrap
+from typing import Callable
+from typing import Optional
 from typing import Sequence
+from typing import Union
 
 
 class CommandException(Exception):
@@ -9,11 +11,178 @@ class CommandException(Exception):
     pass
 
 
-class CommandParser:
-    """A class used to parse and execute a user Command."""
+class Command:
+    """A class used to represent a command the parser can dispatch."""
+
+    def __init__(self, verb: str, action: Union[str, Callable],
+                 syntax: str, description: str,
+                 arities: Optional[Sequence[int]] = None, usage: str = "",
+                 min_args: Optional[int] = None):
+        """Command constructor.
+
+        Args:
+            verb: The upper case name the user types.
+            action: The name of the VideoPlayer method the command runs,
+                or a function to run. Either is called with the arguments.
+            syntax: How the command is written in the help text.
+            description: What the command does, for the help text.
+            arities: The accepted numbers of arguments. None means the
+                command takes no arguments and ignores any given.
+            usage: The CommandException message for a wrong number of
+                arguments.
+            min_args: If set, the command takes any number of arguments
+                from min_args up, such as the words of a free-form query,
+                and arities is ignored.
+        """
+        self.verb = verb
+        self.action = action
+        self.syntax = syntax
+        self.description = description
+        self.arities = arities
+        self.usage = usage
+        self.min_args = min_args
+
+    def bind(self, video_player) -> Callable:
+        """Returns the function running this command on video_player."""
+        if isinstance(self.action, str):
+            return getattr(video_player, self.action)
+        return self.action
+
+
+COMMANDS = (
+    Command("NUMBER_OF_VIDEOS", "number_of_videos", "NUMBER_OF_VIDEOS",
+            "Shows how many videos are in the library."),
+    Command("SHOW_ALL_VIDEOS", "show_all_videos", "SHOW_ALL_VIDEOS",
+            "Lists all videos from the library."),
+    Command("SHOW_VIDEOS_PAGE", "show_videos_page",
+            "SHOW_VIDEOS_PAGE <limit> [<cursor>]",
+            "Lists up to limit videos from the library, continuing from "
+            "the cursor the previous page ended with.",
+            (1, 2), "Please enter SHOW_VIDEOS_PAGE command followed by a "
+                    "page size and an optional cursor."),
+    Command("PLAY", "play_video", "PLAY <video_id>",
+            "Plays specified video.",
+            (1,), "Please enter PLAY command followed by video_id."),
+    Command("PLAY_RANDOM", "play_random_video", "PLAY_RANDOM",
+            "Plays a random video from the library."),
+    Command("STOP", "stop_video", "STOP", "Stop the current video."),
+    Command("PAUSE", "pause_video", "PAUSE", "Pause the current video."),
+    Command("CONTINUE", "continue_video", "CONTINUE",
+            "Resume the current paused video."),
+    Command("SHOW_PLAYING", "show_playing", "SHOW_PLAYING",
+            "Displays the title, url and paused status of the video that is "
+            "currently playing (or paused)."),
+    Command("CREATE_PLAYLIST", "create_playlist",
+            "CREATE_PLAYLIST <playlist_name>",
+            "Creates a new (empty) playlist with the provided name.",
+            (1,), "Please enter CREATE_PLAYLIST command followed by a "
+                  "playlist name."),
+    Command("ADD_TO_PLAYLIST", "add_to_playlist",
+            "ADD_TO_PLAYLIST <playlist_name> <video_id>",
+            "Adds the requested video to the playlist.",
+            (2,), "Please enter ADD_TO_PLAYLIST command followed by a "
+                  "playlist name and video_id to add."),
+    Command("REMOVE_FROM_PLAYLIST", "remove_from_playlist",
+            "REMOVE_FROM_PLAYLIST <playlist_name> <video_id>",
+            "Removes the specified video from the specified playlist",
+            (2,), "Please enter REMOVE_FROM_PLAYLIST command followed by a "
+                  "playlist name and video_id to remove."),
+    Command("CLEAR_PLAYLIST", "clear_playlist",
+            "CLEAR_PLAYLIST <playlist_name>",
+            "Removes all the videos from the playlist.",
+            (1,), "Please enter CLEAR_PLAYLIST command followed by a "
+                  "playlist name."),
+    Command("DELETE_PLAYLIST", "delete_playlist",
+            "DELETE_PLAYLIST <playlist_name>", "Deletes the playlist.",
+            (1,), "Please enter DELETE_PLAYLIST command followed by a "
+                  "playlist name."),
+    Command("SHOW_PLAYLIST", "show_playlist", "SHOW_PLAYLIST <playlist_name>",
+            "List all the videos in this playlist.",
+            (1,), "Please enter SHOW_PLAYLIST command followed by a "
+                  "playlist name."),
+    Command("SHOW_PLAYLIST_PAGE", "show_playlist_page",
+            "SHOW_PLAYLIST_PAGE <playlist_name> <limit> [<cursor>]",
+            "Lists up to limit videos in this playlist, continuing from the "
+            "cursor the previous page ended with.",
+            (2, 3), "Please enter SHOW_PLAYLIST_PAGE command followed by a "
+                    "playlist name, a page size and an optional cursor."),
+    Command("SHOW_ALL_PLAYLISTS", "show_all_playlists", "SHOW_ALL_PLAYLISTS",
+            "Display all the available playlists."),
+    Command("SEARCH_VIDEOS", "search_videos", "SEARCH_VIDEOS <search_term>",
+            "Display all the videos whose titles contain the search_term.",
+            (1,), "Please enter SEARCH_VIDEOS command followed by a "
+                  "search term."),
+    Command("SEARCH_VIDEOS_WITH_TAG", "search_videos_tag",
+            "SEARCH_VIDEOS_WITH_TAG <tag_name>",
+            "Display all videos whose tags contains the provided tag.",
+            (1,), "Please enter SEARCH_VIDEOS_WITH_TAG command followed by a "
+                  "video tag."),
+    Command("SEARCH_VIDEOS_RANKED", "search_videos_ranked",
+            "SEARCH_VIDEOS_RANKED <search_term> [<k>]",
+            "Display the k (default 10) videos most relevant to the "
+            "search_term, by title match and tags.",
+            (1, 2), "Please enter SEARCH_VIDEOS_RANKED command followed by a "
+                    "search term and an optional number of results."),
+    Command("SEARCH_VIDEOS_FUZZY", "search_videos_fuzzy",
+            "SEARCH_VIDEOS_FUZZY <search_term> [<k>]",
+            "Display up to k (default 10) videos with a title word or tag "
+            "close to the search_term, forgiving typos.",
+            (1, 2), "Please enter SEARCH_VIDEOS_FUZZY command followed by a "
+                    "search term and an optional number of results."),
+    Command("QUERY_VIDEOS", "query_videos", "QUERY_VIDEOS <query>",
+            "Display the videos matching a query of #tags, title words "
+            "and FLAGGED, combined with AND, OR, NOT and parentheses.",
+            usage="Please enter QUERY_VIDEOS command followed by a query.",
+            min_args=1),
+    Command("FLAG_VIDEO", "flag_video", "FLAG_VIDEO <video_id> <flag_reason>",
+            "Mark a video as flagged.",
+            (1, 2), "Please enter FLAG_VIDEO command followed by a "
+                    "video_id and an optional flag reason."),
+    Command("ALLOW_VIDEO", "allow_video", "ALLOW_VIDEO <video_id>",
+            "Removes a flag from a video.",
+            (1,), "Please enter ALLOW_VIDEO command followed by a "
+                  "video_id."),
+    Command("RELOAD", "reload_videos", "RELOAD",
+            "Applies the changes made to the video catalog file."),
+)
+
 
-    def __init__(self, video_player):
+class CommandParser:
+    """A class used to parse and execute a user Command.
+
+    Commands are looked up by verb in a table, so dispatching costs one
+    dict lookup whatever the command. Each verb is bound to its player
+    method once, when it is registered. With a CommandStats, the bound
+    method is wrapped to time it, so a parser without one pays nothing.
+    """
+
+    def __init__(self, video_player, commands=COMMANDS, stats=None):
+        """CommandParser constructor.
+
+        Args:
+            video_player: The VideoPlayer commands run on.
+            commands: The Commands the parser accepts, besides HELP and
+                STATS.
+            stats: A CommandStats recording every command's latency, if
+                any.
+        """
         self._player = video_player
+        self._stats = stats
+        self._commands = {}
+        for command in commands:
+            self.register(command)
+        self.register(Command("HELP", self._get_help, "HELP",
+                              "Displays help."))
+        self.register(Command("STATS", self._show_stats, "STATS",
+                              "Displays how often each command ran and "
+                              "how long it took."))
+
+    def register(self, command: Command):
+        """Adds command to the parser, replacing any with the same verb."""
+        handler = command.bind(self._player)
+        if self._stats is not None:
+            handler = self._stats.timed(command.verb, handler)
+        self._commands[command.verb] = (command, handler)
 
     def execute_command(self, command: Sequence[str]):
         """Executes the user command. Expects the command to be upper case.
@@ -24,140 +193,52 @@ class CommandParser:
                 "Please enter a valid command, "
                 "type HELP for a list of available commands.")
 
-        if command[0].upper() == "NUMBER_OF_VIDEOS":
-            self._player.number_of_videos()
-
-        elif command[0].upper() == "SHOW_ALL_VIDEOS":
-            self._player.show_all_videos()
-
-        elif command[0].upper() == "PLAY":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter PLAY command followed by video_id.")
-            self._player.play_video(command[1])
-
-        elif command[0].upper() == "PLAY_RANDOM":
-            self._player.play_random_video()
-
-        elif command[0].upper() == "STOP":
-            self._player.stop_video()
-
-        elif command[0].upper() == "PAUSE":
-            self._player.pause_video()
-
-        elif command[0].upper() == "CONTINUE":
-            self._player.continue_video()
-
-        elif command[0].upper() == "SHOW_PLAYING":
-            self._player.show_playing()
-
-        elif command[0].upper() == "CREATE_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter CREATE_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.create_playlist(command[1])
-
-        elif command[0].upper() == "ADD_TO_PLAYLIST":
-            if len(command) != 3:
-                raise CommandException(
-                    "Please enter ADD_TO_PLAYLIST command followed by a "
-                    "playlist name and video_id to add.")
-            self._player.add_to_playlist(command[1], command[2])
-
-        elif command[0].upper() == "REMOVE_FROM_PLAYLIST":
-            if len(command) != 3:
-                raise CommandException(
-                    "Please enter REMOVE_FROM_PLAYLIST command followed by a "
-                    "playlist name and video_id to remove.")
-            self._player.remove_from_playlist(command[1], command[2])
-
-        elif command[0].upper() == "CLEAR_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter CLEAR_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.clear_playlist(command[1])
-
-        elif command[0].upper() == "DELETE_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter DELETE_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.delete_playlist(command[1])
-
-        elif command[0].upper() == "SHOW_PLAYLIST":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SHOW_PLAYLIST command followed by a "
-                    "playlist name.")
-            self._player.show_playlist(command[1])
-
-        elif command[0].upper() == "SHOW_ALL_PLAYLISTS":
-            self._player.show_all_playlists()
-
-        elif command[0].upper() == "SEARCH_VIDEOS":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SEARCH_VIDEOS command followed by a "
-                    "search term.")
-            self._player.search_videos(command[1])
-
-        elif command[0].upper() == "SEARCH_VIDEOS_WITH_TAG":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter SEARCH_VIDEOS_WITH_TAG command followed by a "
-                    "video tag.")
-            self._player.search_videos_tag(command[1])
-
-        elif command[0].upper() == "FLAG_VIDEO":
-            if len(command) == 3:
-                self._player.flag_video(command[1], command[2])
-            elif len(command) == 2:
-                self._player.flag_video(command[1])
-            else:
-                raise CommandException(
-                    "Please enter FLAG_VIDEO command followed by a "
-                    "video_id and an optional flag reason.")
-
-        elif command[0].upper() == "ALLOW_VIDEO":
-            if len(command) != 2:
-                raise CommandException(
-                    "Please enter ALLOW_VIDEO command followed by a "
-                    "video_id.")
-            self._player.allow_video(command[1])
-
-        elif command[0].upper() == "HELP":
-            self._get_help()
-        else:
-            print(
+        entry = self._commands.get(command[0].upper())
+        if entry is None:
+            self._player.output.write(
                 "Please enter a valid command, type HELP for a list of "
                 "available commands.")
+            self._player.output.flush()
+            return
+
+        spec, handler = entry
+        if spec.min_args is not None:
+            if len(command) - 1 < spec.min_args:
+                raise CommandException(spec.usage)
+            handler(*command[1:])
+        elif spec.arities is None:
+            handler()
+        elif len(command) - 1 in spec.arities:
+            handler(*command[1:])
+        else:
+            raise CommandException(spec.usage)
 
     def _get_help(self):
         """Displays all available commands to the user."""
-        help_text = textwrap.dedent("""
-        Available commands:
-            NUMBER_OF_VIDEOS - Shows how many videos are in the library.
-            SHOW_ALL_VIDEOS - Lists all videos from the library.
-            PLAY <video_id> - Plays specified video.
-            PLAY_RANDOM - Plays a random video from the library.
-            STOP - Stop the current video.
-            PAUSE - Pause the current video.
-            CONTINUE - Resume the current paused video.
-            SHOW_PLAYING - Displays the title, url and paused status of the video that is currently playing (or paused).
-            CREATE_PLAYLIST <playlist_name> - Creates a new (empty) playlist with the provided name.
-            ADD_TO_PLAYLIST <playlist_name> <video_id> - Adds the requested video to the playlist.
-            REMOVE_FROM_PLAYLIST <playlist_name> <video_id> - Removes the specified video from the specified playlist
-            CLEAR_PLAYLIST <playlist_name> - Removes all the videos from the playlist.
-            DELETE_PLAYLIST <playlist_name> - Deletes the playlist.
-            SHOW_PLAYLIST <playlist_name> - List all the videos in this playlist.
-            SHOW_ALL_PLAYLISTS - Display all the available playlists.
-            SEARCH_VIDEOS <search_term> - Display all the videos whose titles contain the search_term.
-            SEARCH_VIDEOS_WITH_TAG <tag_name> -Display all videos whose tags contains the provided tag.
-            FLAG_VIDEO <video_id> <flag_reason> - Mark a video as flagged.
-            ALLOW_VIDEO <video_id> - Removes a flag from a video.
-            HELP - Displays help.
-            EXIT - Terminates the program execution.
-        """)
-        print(help_text)
+        lines = ["", "Available commands:"]
+        lines.extend(f"    {spec.syntax} - {spec.description}"
+                     for spec, _ in self._commands.values())
+        lines.append("    EXIT - Terminates the program execution.")
+        lines.append("")
+        for line in lines:
+            self._player.output.write(line)
+        self._player.output.flush()
+
+    def _show_stats(self):
+        """Displays the call counts and latency percentiles of commands."""
+        output = self._player.output
+        if self._stats is None:
+            output.write("Command statistics are not being collected")
+        else:
+            summary = self._stats.summary()
+            if not summary:
+                output.write("No commands have been run yet")
+            else:
+                output.write("Command statistics:")
+            for verb, entry in summary.items():
+                output.write(
+                    f"    {verb} - {entry['calls']} calls, "
+                    f"p50 {entry['p50_ns'] / 1000:.1f} us, "
+                    f"p95 {entry['p95_ns'] / 1000:.1f} us, "
+                    f"p99 {entry['p99_ns'] / 1000:.1f} us")
+        output.flush()
@@ -0,0 +1,120 @@
+"""Command statistics classes."""
+
+import json
+import math
+import time
+
+
+class LatencyHistogram:
+    """A class used to count latencies with a bounded relative error.
+
+    As in an HDR histogram, values are counted in buckets whose width grows
+    with the value: values below 2 ** significant_bits are counted exactly
+    and larger ones keep their top significant_bits bits, so a percentile
+    is never off by more than 1 / 2 ** (significant_bits - 1) of its value.
+    Recording is a few integer operations and the memory used does not
+    grow with the number of values.
+    """
+
+    def __init__(self, significant_bits=6):
+        self._bits = significant_bits
+        self._half = 1 << (significant_bits - 1)
+        # Room for every value below 2 ** 64 nanoseconds, so recording
+        # never has to grow the list.
+        self._counts = [0] * (self._index((1 << 64) - 1) + 1)
+        self.count = 0
+        self.max = 0
+
+    def _index(self, value):
+        shift = value.bit_length() - self._bits
+        if shift <= 0:
+            return value
+        return shift * self._half + (value >> shift)
+
+    def _upper_bound(self, index):
+        if index < 2 * self._half:
+            return index
+        shift = index // self._half - 1
+        mantissa = index - shift * self._half
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value):
+        """Counts one value, such as a latency in nanoseconds."""
+        self._counts[self._index(value)] += 1
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        """Returns the value fraction of the recorded values are at most.
+
+        Returns:
+            The upper bound of the bucket holding that value, or 0 if
+            nothing was recorded.
+        """
+        wanted = max(1, math.ceil(self.count * fraction))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= wanted:
+                return min(self._upper_bound(index), self.max)
+        return 0
+
+    def buckets(self):
+        """Yields (upper bound, count) for every bucket holding values."""
+        for index, count in enumerate(self._counts):
+            if count:
+                yield self._upper_bound(index), count
+
+
+class CommandStats:
+    """A class used to collect how often each command ran and how long for.
+
+    Give one to a CommandParser to time its commands. Parsers that are not
+    given one do not time anything. One CommandStats may be shared by many
+    parsers, as long as they run on one thread.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+
+    def timed(self, verb, handler):
+        """Returns handler wrapped to record its latency under verb."""
+        histogram = self._histograms.setdefault(verb, LatencyHistogram())
+        clock = time.perf_counter_ns
+
+        def timed_handler(*args):
+            start = clock()
+            try:
+                return handler(*args)
+            finally:
+                histogram.record(clock() - start)
+        return timed_handler
+
+    def summary(self):
+        """Returns the calls and latency percentiles of every verb that ran.
+
+        Returns:
+            A dict from verb, in alphabetical order, to a dict of its calls
+            and its p50, p95, p99 and max latencies in nanoseconds.
+        """
+        return {
+            verb: {
+                "calls": histogram.count,
+                "p50_ns": histogram.percentile(0.5),
+                "p95_ns": histogram.percentile(0.95),
+                "p99_ns": histogram.percentile(0.99),
+                "max_ns": histogram.max,
+            }
+            for verb, histogram in sorted(self._histograms.items())
+            if histogram.count
+        }
+
+    def export(self, path):
+        """Writes the summary and the histograms to path as JSON."""
+        summary = self.summary()
+        for verb, entry in summary.items():
+            entry["histogram_ns"] = list(self._histograms[verb].buckets())
+        with open(path, "w") as stats_file:
+            json.dump(summary, stats_file, indent=2)
+            stats_file.write("\n")
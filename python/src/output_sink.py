@@ -0,0 +1,89 @@
+"""Output sink classes."""
+
+from typing import Callable
+from typing import List
+from typing import Optional
+import sys
+
+# Buffered output is flushed on its own once it holds this many characters,
+# so a command listing millions of videos never holds all of its output.
+FLUSH_THRESHOLD = 64 * 1024
+
+
+class OutputSink:
+    """A class used to represent where a VideoPlayer writes its output.
+
+    Lines are buffered by write() and delivered by flush(), so a command
+    listing many videos costs one write to the destination per
+    FLUSH_THRESHOLD characters of output.
+    """
+
+    def write(self, line: str):
+        """Buffers one line of output, without its line ending."""
+        raise NotImplementedError
+
+    def flush(self):
+        """Delivers every buffered line."""
+        raise NotImplementedError
+
+
+class StdoutSink(OutputSink):
+    """An OutputSink writing to standard output, exactly as print would."""
+
+    def __init__(self):
+        self._lines = []
+        self._size = 0
+
+    def write(self, line: str):
+        self._lines.append(line)
+        self._size += len(line) + 1
+        if self._size >= FLUSH_THRESHOLD:
+            self.flush()
+
+    def flush(self):
+        if self._lines:
+            # Looked up on every flush so redirecting sys.stdout still works.
+            sys.stdout.write("".join(line + "\n" for line in self._lines))
+            self._lines.clear()
+            self._size = 0
+
+
+class MemorySink(OutputSink):
+    """An OutputSink keeping its output in memory, for servers and tests."""
+
+    def __init__(self, deliver: Optional[Callable[[List[str]], None]] = None):
+        """MemorySink constructor.
+
+        Args:
+            deliver: If given, called with the flushed lines whenever the
+                buffer passes FLUSH_THRESHOLD characters. Lines it was
+                given are not returned by take(), so a server can stream
+                a long output instead of keeping it.
+        """
+        self._lines = []
+        self._flushed = 0
+        self._size = 0
+        self._deliver = deliver
+
+    def write(self, line: str):
+        self._lines.append(line)
+        self._size += len(line) + 1
+        if self._size >= FLUSH_THRESHOLD:
+            self.flush()
+            if self._deliver is not None:
+                self._deliver(self.take())
+
+    def flush(self):
+        self._flushed = len(self._lines)
+        self._size = 0
+
+    def take(self) -> List[str]:
+        """Returns the flushed lines and forgets them."""
+        lines = self._lines[:self._flushed]
+        del self._lines[:self._flushed]
+        self._flushed = 0
+        return lines
+
+    def getvalue(self) -> str:
+        """Returns the flushed output as text, the way print would have."""
+        return "".join(line + "\n" for line in self._lines[:self._flushed])
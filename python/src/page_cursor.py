@@ -0,0 +1,37 @@
+"""Page cursor functions."""
+
+import base64
+import binascii
+import json
+
+
+def encode_cursor(*fields):
+    """Returns an opaque cursor holding fields, which must be JSON values.
+
+    The cursor has no whitespace, so it can be passed as a command argument.
+    """
+    data = json.dumps(fields, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, *types):
+    """Returns the fields of a cursor made by encode_cursor.
+
+    Args:
+        cursor: The cursor.
+        types: The type each field must have.
+
+    Raises:
+        ValueError: If cursor was not made by encode_cursor with fields of
+            the given types.
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        fields = json.loads(data.decode("utf-8"))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}") from None
+    if (not isinstance(fields, list) or len(fields) != len(types)
+            or not all(type(field) is kind
+                       for field, kind in zip(fields, types))):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return fields
@@ -0,0 +1,27 @@
+"""A player session class."""
+
+from .playlist_registry import PlaylistRegistry
+
+
+class PlayerSession:
+    """A class used to represent the state of one user of the player.
+
+    Everything that differs between users lives here, so many sessions can
+    share one VideoLibrary and starting a session never loads the catalog.
+    Flags are moderation decisions shared by every user, so they are kept
+    by the library instead.
+    """
+
+    def __init__(self, playlists=None):
+        """PlayerSession constructor.
+
+        Args:
+            playlists: Where the user's playlists are kept, such as a
+                SqlitePlaylistStore. Defaults to an in-memory
+                PlaylistRegistry.
+        """
+        self.video_playing = None
+        self.paused = False
+        self.playlists = PlaylistRegistry() if playlists is None else playlists
+        # The videos a search offered to play while it waits for an answer.
+        self.pending_choice = None
@@ -0,0 +1,62 @@
+"""A playlist registry class."""
+
+from .video_playlist import Playlist
+
+
+class PlaylistRegistry:
+    """A class used to look up playlists by case-insensitive name.
+
+    Playlists are keyed by their upper-cased name and keep the name they
+    were created with for display. Creating and deleting a playlist are
+    dict operations. The sorted names are only rebuilt when the playlists
+    are listed after a change, so listing them again costs no sort.
+    """
+
+    def __init__(self):
+        self._playlists = {}
+        # None after a change, until the playlists are listed again.
+        self._sorted_names = []
+
+    def __len__(self):
+        return len(self._playlists)
+
+    def __iter__(self):
+        """Yields every playlist sorted by name."""
+        if self._sorted_names is None:
+            self._sorted_names = sorted(
+                (playlist.name, key) for key, playlist in self._playlists.items())
+        for _, key in self._sorted_names:
+            yield self._playlists[key]
+
+    def get(self, playlist_name):
+        """Returns the playlist called playlist_name, ignoring case.
+
+        Returns:
+            The Playlist, or None if it does not exist.
+        """
+        return self._playlists.get(playlist_name.upper(), None)
+
+    def create(self, playlist_name):
+        """Creates an empty playlist called playlist_name.
+
+        Returns:
+            The new Playlist, or None if a playlist with the same name,
+            ignoring case, already exists.
+        """
+        key = playlist_name.upper()
+        if key in self._playlists:
+            return None
+        playlist = self._playlists[key] = Playlist(playlist_name)
+        self._sorted_names = None
+        return playlist
+
+    def delete(self, playlist_name):
+        """Deletes the playlist called playlist_name, ignoring case.
+
+        Returns:
+            The deleted Playlist, or None if it does not exist.
+        """
+        playlist = self._playlists.pop(playlist_name.upper(), None)
+        if playlist is not None:
+            self._sorted_names = None
+        return playlist
@@ -0,0 +1,229 @@
+"""A SQLite playlist store class."""
+
+from .page_cursor import decode_cursor
+from .page_cursor import encode_cursor
+from .video_playlist import Playlist
+import sqlite3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS playlists (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL UNIQUE
+);
+CREATE INDEX IF NOT EXISTS playlists_by_name ON playlists (name);
+CREATE TABLE IF NOT EXISTS playlist_videos (
+    playlist_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    video_id TEXT NOT NULL,
+    PRIMARY KEY (playlist_id, video_id)
+);
+CREATE INDEX IF NOT EXISTS playlist_videos_by_position
+    ON playlist_videos (playlist_id, position);
+"""
+
+
+class SqlitePlaylist(Playlist):
+    """A Playlist whose changes are written to a SqlitePlaylistStore.
+
+    Its videos are only read from the database when first asked for, and
+    pages are read straight from the database by position.
+    """
+
+    def __init__(self, store, row_id, playlist_name):
+        super().__init__(playlist_name)
+        self._store = store
+        self._row_id = row_id
+        self._loaded = False
+        self._next_position = 0
+
+    @property
+    def videos(self) -> {}:
+        """Returns the videos in the playlist."""
+        if not self._loaded:
+            self._videos, self._next_position = self._store._load_videos(
+                self._row_id)
+            self._loaded = True
+        return self._videos
+
+    def add_video(self, video):
+        """Appends video to the end of the playlist."""
+        self.videos[video.video_id] = video
+        # The video may still have a row from before the library lost it,
+        # which was left out on load. Adding it again moves it to the end.
+        self._store._write(
+            "INSERT OR REPLACE INTO playlist_videos "
+            "(playlist_id, position, video_id) VALUES (?, ?, ?)",
+            (self._row_id, self._next_position, video.video_id))
+        self._next_position += 1
+
+    def remove_video(self, video_id):
+        """Removes the video with video_id from the playlist."""
+        del self.videos[video_id]
+        self._store._write(
+            "DELETE FROM playlist_videos WHERE playlist_id = ? AND video_id = ?",
+            (self._row_id, video_id))
+
+    def clear(self):
+        """Removes every video from the playlist."""
+        self.videos.clear()
+        self._store._write(
+            "DELETE FROM playlist_videos WHERE playlist_id = ?",
+            (self._row_id,))
+
+    def page(self, limit, cursor=None):
+        """Returns one page of the videos, in the order they were added.
+
+        Args:
+            limit: The most videos on the page.
+            cursor: Where the page starts, as returned for the previous
+                page. None starts at the first video.
+
+        Returns:
+            A list of the Videos on the page and the cursor of the next
+            page, which is None if this is the last one.
+
+        Raises:
+            ValueError: If cursor is not a cursor this method returned.
+        """
+        after = -1
+        if cursor is not None:
+            (after,) = decode_cursor(cursor, int)
+        return self._store._page_videos(self._row_id, after, limit)
+
+
+class SqlitePlaylistStore:
+    """A class used to keep playlists in a SQLite database.
+
+    It can stand in for a PlaylistRegistry. Names are matched ignoring case
+    through an indexed upper-cased copy of the name, and a playlist's
+    videos are only read when it is used. Writes are grouped into
+    transactions of up to batch_size changes, committed when a batch fills
+    up and on flush() or close(). A crash can lose the last, uncommitted
+    batch.
+    """
+
+    def __init__(self, path, video_library, batch_size=1000):
+        """SqlitePlaylistStore constructor.
+
+        Args:
+            path: The database file, created if it does not exist.
+            video_library: The VideoLibrary stored video ids are looked up
+                in. Videos it no longer has are left out of playlists.
+            batch_size: The most changes committed in one transaction.
+        """
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(_SCHEMA)
+        self._video_library = video_library
+        self._batch_size = batch_size
+        self._pending = 0
+        self._playlists = {}
+
+    def _write(self, sql, parameters):
+        cursor = self._connection.execute(sql, parameters)
+        self._pending += 1
+        if self._pending >= self._batch_size:
+            self.flush()
+        return cursor
+
+    def _load_videos(self, row_id):
+        videos = {}
+        next_position = 0
+        for position, video_id in self._connection.execute(
+                "SELECT position, video_id FROM playlist_videos "
+                "WHERE playlist_id = ? ORDER BY position", (row_id,)):
+            next_position = position + 1
+            video = self._video_library.get_video(video_id)
+            if video is not None:
+                videos[video_id] = video
+        return videos, next_position
+
+    def _page_videos(self, row_id, after, limit):
+        rows = self._connection.execute(
+            "SELECT position, video_id FROM playlist_videos "
+            "WHERE playlist_id = ? AND position > ? ORDER BY position "
+            "LIMIT ?", (row_id, after, limit + 1)).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][0])
+        videos = [self._video_library.get_video(video_id)
+                  for _, video_id in rows]
+        return [video for video in videos if video is not None], next_cursor
+
+    def _playlist(self, row_id, playlist_name):
+        key = playlist_name.upper()
+        playlist = self._playlists.get(key)
+        if playlist is None:
+            playlist = self._playlists[key] = SqlitePlaylist(
+                self, row_id, playlist_name)
+        return playlist
+
+    def flush(self):
+        """Commits every pending change."""
+        self._connection.commit()
+        self._pending = 0
+
+    def close(self):
+        """Commits every pending change and closes the database."""
+        self.flush()
+        self._connection.close()
+
+    def __len__(self):
+        (count,) = self._connection.execute(
+            "SELECT COUNT(*) FROM playlists").fetchone()
+        return count
+
+    def __iter__(self):
+        """Yields every playlist sorted by name."""
+        rows = self._connection.execute(
+            "SELECT id, name FROM playlists ORDER BY name").fetchall()
+        for row_id, playlist_name in rows:
+            yield self._playlist(row_id, playlist_name)
+
+    def get(self, playlist_name):
+        """Returns the playlist called playlist_name, ignoring case.
+
+        Returns:
+            The Playlist, or None if it does not exist.
+        """
+        key = playlist_name.upper()
+        playlist = self._playlists.get(key)
+        if playlist is None:
+            row = self._connection.execute(
+                "SELECT id, name FROM playlists WHERE name_key = ?",
+                (key,)).fetchone()
+            if row is not None:
+                playlist = self._playlist(*row)
+        return playlist
+
+    def create(self, playlist_name):
+        """Creates an empty playlist called playlist_name.
+
+        Returns:
+            The new Playlist, or None if a playlist with the same name,
+            ignoring case, already exists.
+        """
+        if self.get(playlist_name) is not None:
+            return None
+        cursor = self._write(
+            "INSERT INTO playlists (name, name_key) VALUES (?, ?)",
+            (playlist_name, playlist_name.upper()))
+        playlist = self._playlist(cursor.lastrowid, playlist_name)
+        playlist._loaded = True
+        return playlist
+
+    def delete(self, playlist_name):
+        """Deletes the playlist called playlist_name, ignoring case.
+
+        Returns:
+            The deleted Playlist, or None if it does not exist.
+        """
+        playlist = self.get(playlist_name)
+        if playlist is not None:
+            del self._playlists[playlist_name.upper()]
+            self._write("DELETE FROM playlist_videos WHERE playlist_id = ?",
+                        (playlist._row_id,))
+            self._write("DELETE FROM playlists WHERE id = ?",
+                        (playlist._row_id,))
+        return playlist
@@ -2,13 +2,37 @@
 from .video_player import VideoPlayer
 from .command_parser import CommandException
 from .command_parser import CommandParser
+from .command_stats import CommandStats
+from .player_session import PlayerSession
+from .playlist_registry import PlaylistRegistry
+from .playlist_store import SqlitePlaylistStore
+from .state_journal import StateJournal
+from .video_library import VideoLibrary
+import argparse
+import io
+import os
+import sys
 
+# Output is written in blocks of this many bytes in batch mode.
+_BATCH_BUFFER_SIZE = 1 << 16
 
-if __name__ == "__main__":
+
+def run_interactive(video_library=None, playlists=None, journal=None,
+                    stats=None):
+    """Reads commands from the user one prompt at a time.
+
+    Args:
+        video_library: The VideoLibrary to play from. Defaults to a new one.
+        playlists: Where playlists are kept. Defaults to memory.
+        journal: A StateJournal changes are recorded in, if any.
+        stats: A CommandStats timing every command, if any.
+    """
     print("""Hello and welcome to YouTube, what would you like to do?
     Enter HELP for list of available commands or EXIT to terminate.""")
-    video_player = VideoPlayer()
-    parser = CommandParser(video_player)
+    video_player = VideoPlayer(video_library=video_library,
+                               session=PlayerSession(playlists),
+                               journal=journal)
+    parser = CommandParser(video_player, stats=stats)
     while True:
         command = input("YT> ")
         if command.upper() == "EXIT":
@@ -19,3 +43,99 @@ if __name__ == "__main__":
             print(e)
     print("YouTube has now terminated its execution. "
           "Thank you and goodbye!")
+
+
+def run_batch(script, video_library=None, playlists=None, journal=None,
+              stats=None):
+    """Runs every command in script without prompting.
+
+    Commands are read one per line until EXIT or the end of the script. A
+    search that asks which video to play takes the next line as its answer,
+    the same as typing it at the prompt.
+
+    Args:
+        script: An iterable of command lines, such as an open file.
+        video_library: The VideoLibrary to play from. Defaults to a new one.
+        playlists: Where playlists are kept. Defaults to memory.
+        journal: A StateJournal changes are recorded in, if any.
+        stats: A CommandStats timing every command, if any.
+    """
+    lines = (line.rstrip("\n") for line in script)
+    video_player = VideoPlayer(read_answer=lambda: next(lines, ""),
+                               video_library=video_library,
+                               session=PlayerSession(playlists),
+                               journal=journal)
+    parser = CommandParser(video_player, stats=stats)
+    for command in lines:
+        if command.upper() == "EXIT":
+            break
+        try:
+            parser.execute_command(command.split())
+        except CommandException as e:
+            video_player.output.write(str(e))
+            video_player.output.flush()
+
+
+def _main(argv):
+    arguments = argparse.ArgumentParser(
+        prog="python3 -m src.run", description=__doc__)
+    arguments.add_argument("script", nargs="?",
+                           help="run the commands in this file, or - for "
+                                "standard input, instead of prompting")
+    arguments.add_argument("--playlists", metavar="DATABASE",
+                           help="keep playlists in this SQLite file")
+    arguments.add_argument("--journal", metavar="DIRECTORY",
+                           help="keep flags and playlists in this journal")
+    arguments.add_argument("--stats", metavar="FILE",
+                           help="time every command and write the "
+                                "statistics here on exit")
+    options = arguments.parse_args(argv[1:])
+    stats = None if options.stats is None else CommandStats()
+    video_library = VideoLibrary()
+    # Closed before exiting, to commit what they still hold.
+    resources = []
+    playlists = PlaylistRegistry()
+    if options.playlists is not None:
+        playlists = SqlitePlaylistStore(options.playlists, video_library)
+        resources.append(playlists)
+    journal = None
+    if options.journal is not None:
+        journal = StateJournal(options.journal)
+        journal.restore(video_library, playlists)
+        resources.append(journal)
+
+    def close_resources():
+        for resource in resources:
+            resource.close()
+        if stats is not None:
+            stats.export(options.stats)
+
+    if options.script is None:
+        try:
+            run_interactive(video_library, playlists, journal, stats)
+        finally:
+            close_resources()
+        return
+
+    sys.stdout.flush()
+    sys.stdout = io.TextIOWrapper(
+        io.BufferedWriter(
+            io.FileIO(sys.stdout.fileno(), "w", closefd=False),
+            _BATCH_BUFFER_SIZE),
+        encoding=sys.stdout.encoding)
+    try:
+        if options.script == "-":
+            run_batch(sys.stdin, video_library, playlists, journal, stats)
+        else:
+            with open(options.script) as script:
+                run_batch(script, video_library, playlists, journal, stats)
+    finally:
+        close_resources()
+        sys.stdout.flush()
+    # The library can hold millions of objects. Tearing them down one by
+    # one is wasted work when the process is about to end anyway.
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    _main(sys.argv)
@@ -0,0 +1,50 @@
+"""A reader/writer lock class."""
+
+import contextlib
+import threading
+
+
+class ReadWriteLock:
+    """A class used to let many readers or a single writer in at a time.
+
+    A waiting writer stops new readers from coming in, so a steady stream
+    of reads cannot starve writes. The lock is not reentrant: a thread
+    holding it must not take it again.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextlib.contextmanager
+    def reading(self):
+        """Holds the lock shared for the duration of the with block."""
+        with self._condition:
+            while self._writing or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def writing(self):
+        """Holds the lock exclusively for the duration of the with block."""
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
@@ -0,0 +1,88 @@
+"""A search result cache class."""
+
+from collections import OrderedDict
+import sys
+import threading
+
+# Bytes counted for each entry on top of its key and ordinals: the
+# OrderedDict node and the entry tuple.
+_ENTRY_BYTES = 120
+
+
+class SearchCache:
+    """A class used to keep recent search results within a memory bound.
+
+    Results are arrays of ordinals keyed by normalized query. Each entry is
+    stamped with the library generation it was computed in. The library
+    bumps its generation on every change, so nothing has to be invalidated
+    when it changes: an entry from an older generation is a miss and is
+    dropped when it is next looked up. The least recently used entries are
+    evicted to keep the cache within max_bytes.
+    """
+
+    def __init__(self, max_bytes):
+        """SearchCache constructor.
+
+        Args:
+            max_bytes: The most memory the entries may use, as counted by
+                sys.getsizeof. 0 caches nothing.
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        """Returns the memory counted for the entries."""
+        return self._bytes
+
+    @staticmethod
+    def _size(key, ordinals):
+        return (sys.getsizeof(ordinals) + sys.getsizeof(key)
+                + sum(map(sys.getsizeof, key)) + _ENTRY_BYTES)
+
+    def get(self, key, generation):
+        """Returns the ordinals cached for key in generation, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generation:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, generation, ordinals):
+        """Caches ordinals, the result for key in generation.
+
+        Results too large for the whole cache are not kept.
+        """
+        size = self._size(key, ordinals)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                return
+            while self._bytes + size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+            self._entries[key] = (generation, ordinals, size)
+            self._bytes += size
+
+    def _drop(self, key):
+        self._bytes -= self._entries.pop(key)[2]
+
+    def clear(self):
+        """Drops every entry, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
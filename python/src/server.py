@@ -0,0 +1,173 @@
+"""A youtube simulator server for many concurrent sessions."""
+
+from .command_parser import CommandException
+from .command_parser import CommandParser
+from .command_stats import CommandStats
+from .output_sink import MemorySink
+from .video_catalog import VIDEOS_PATH
+from .video_library import VideoLibrary
+from .video_player import VideoPlayer
+import argparse
+import asyncio
+import sys
+import traceback
+
+# Each request is one command line. Each response is the command's output
+# lines followed by a line holding a single ".". Output lines starting with
+# "." get another "." in front, as in SMTP, so they cannot end a response.
+END_OF_RESPONSE = b".\n"
+
+
+def encode_lines(lines):
+    """Returns the wire form of lines, without ending the response."""
+    return "".join(
+        ("." + line if line.startswith(".") else line) + "\n"
+        for line in lines).encode("utf-8")
+
+
+def encode_response(lines):
+    """Returns the wire form of a response made of lines."""
+    return encode_lines(lines) + END_OF_RESPONSE
+
+
+async def _read_request(reader):
+    """Returns the next request line, or b"" at the end of input.
+
+    Raises:
+        ValueError: If the line is longer than the reader's limit. The
+            whole line is skipped, so the next request is read intact.
+    """
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as error:
+        return error.partial
+    except asyncio.LimitOverrunError as error:
+        consumed = error.consumed
+    while True:
+        await reader.readexactly(consumed)
+        try:
+            await reader.readuntil(b"\n")
+            break
+        except asyncio.IncompleteReadError:
+            break
+        except asyncio.LimitOverrunError as error:
+            consumed = error.consumed
+    raise ValueError("Request line is too long")
+
+
+class Session:
+    """A class used to represent one client's player and parser."""
+
+    def __init__(self, video_library, stats=None, deliver=None):
+        """Session constructor.
+
+        Args:
+            video_library: The VideoLibrary shared by every session.
+            stats: A CommandStats timing the commands, if any.
+            deliver: If given, called with the first lines of a long
+                output as they are produced, as MemorySink does. execute
+                then only returns the lines after them.
+        """
+        self._output = MemorySink(deliver)
+        self._player = VideoPlayer(output=self._output,
+                                   video_library=video_library,
+                                   defer_answers=True)
+        self._parser = CommandParser(self._player, stats=stats)
+
+    def execute(self, line):
+        """Runs one line from the client and returns its output lines.
+
+        If the previous command was a search offering to play a video, the
+        line is its answer rather than a command.
+        """
+        try:
+            if self._player.awaiting_answer:
+                self._player.answer_search(line)
+            else:
+                self._parser.execute_command(line.split())
+        except CommandException as e:
+            self._output.write(str(e))
+            self._output.flush()
+        except Exception:
+            # One failing command must not cost the client its session.
+            traceback.print_exc(file=sys.stderr)
+            self._output.write("Cannot run command: Internal server error")
+            self._output.flush()
+        return self._output.take()
+
+
+class Server:
+    """A class used to serve sessions sharing one VideoLibrary over TCP.
+
+    Clients may pipeline commands. They are run in order and answered in
+    order. Responses are written as they are produced and reading waits
+    while the client is not keeping up with them, so a slow client cannot
+    make the server buffer without bound. With a CommandStats, the commands
+    of every session are timed together.
+    """
+
+    def __init__(self, video_library, stats=None):
+        self._video_library = video_library
+        self._stats = stats
+        self.sessions = 0
+
+    async def handle(self, reader, writer):
+        """Serves one connection until EXIT or end of input."""
+        # Long outputs go to the socket in chunks while the command runs,
+        # rather than being held whole.
+        session = Session(self._video_library, self._stats,
+                          lambda lines: writer.write(encode_lines(lines)))
+        self.sessions += 1
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except ValueError:
+                    writer.write(encode_response(
+                        ["Please enter a shorter command."]))
+                    await writer.drain()
+                    continue
+                if not request:
+                    break
+                line = request.decode("utf-8", errors="replace").rstrip("\r\n")
+                if line.upper() == "EXIT":
+                    break
+                writer.write(encode_response(session.execute(line)))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def serve(self, host, port):
+        """Accepts connections on host and port until cancelled."""
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("--host", default="127.0.0.1")
+    arguments.add_argument("--port", type=int, default=8765)
+    arguments.add_argument("catalog", nargs="*", default=[VIDEOS_PATH],
+                           help="the catalog file, or its shards")
+    arguments.add_argument("--stats", metavar="FILE",
+                           help="time every command and write the "
+                                "statistics here on exit")
+    options = arguments.parse_args()
+    catalog = options.catalog[0] if len(options.catalog) == 1 else options.catalog
+    stats = None if options.stats is None else CommandStats()
+    try:
+        asyncio.run(Server(VideoLibrary(catalog), stats).serve(
+            options.host, options.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if stats is not None:
+            stats.export(options.stats)
@@ -0,0 +1,238 @@
+"""A state journal class."""
+
+from pathlib import Path
+import json
+import os
+import zlib
+
+# A journal directory holds one snapshot and the log of the changes made
+# since it was taken:
+#
+#   snapshot.json   {"generation": N, "flags": {...}, "playlists": [...]}
+#   N.log           one change per line, as "<crc32 hex> <json list>\n"
+#
+# Compaction writes snapshot N + 1 next to it, renames it over the old one
+# and only then starts N + 1.log and deletes N.log. Whatever point a crash
+# stops this at, the snapshot on disk names the one log that belongs to it.
+# A torn or corrupted line ends the log: it and everything after it are
+# dropped on recovery.
+_SNAPSHOT = "snapshot.json"
+
+
+def _log_name(generation):
+    return f"{generation}.log"
+
+
+def _encode(change):
+    data = json.dumps(change, separators=(",", ":")).encode("utf-8")
+    return b"%08x %s\n" % (zlib.crc32(data), data)
+
+
+def _decode(line):
+    """Returns the change stored in line, or None if it is damaged."""
+    if not line.endswith(b"\n") or line[8:9] != b" ":
+        return None
+    data = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(data):
+            return None
+        return json.loads(data)
+    except ValueError:
+        return None
+
+
+def _fsync_directory(path):
+    if os.name == "posix":
+        descriptor = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+
+class StateJournal:
+    """A class used to keep flags and playlists across restarts.
+
+    Every change is appended to a log, which is fsynced once every
+    sync_every changes and on sync() or close(), so a crash loses at most
+    the changes since the last sync. Once the log holds compact_every
+    changes the current state is written as a snapshot and the log starts
+    over, so recovery reads the snapshot and a bounded tail of changes
+    however long the journal has been in use.
+
+    The journal keeps its own copy of the state, which is small next to the
+    library: the flagged video ids and the contents of each playlist.
+    """
+
+    def __init__(self, directory, sync_every=64, compact_every=10000):
+        """StateJournal constructor.
+
+        Recovers the state in directory, which is created if needed.
+
+        Args:
+            directory: Where the snapshot and log are kept.
+            sync_every: The most changes appended between fsyncs.
+            compact_every: The number of logged changes that triggers a
+                snapshot. None never takes one.
+        """
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._sync_every = sync_every
+        self._compact_every = compact_every
+        self._flags = {}
+        # Playlists keyed by upper-cased name: (name, {video_id: None}).
+        self._playlists = {}
+        self._generation = 0
+        self._unsynced = 0
+        self._logged = 0
+        self._recover()
+
+    def _recover(self):
+        snapshot_path = self._directory / _SNAPSHOT
+        if snapshot_path.exists():
+            snapshot = json.loads(snapshot_path.read_text(encoding="utf-8"))
+            self._generation = snapshot["generation"]
+            self._flags = snapshot["flags"]
+            for name, video_ids in snapshot["playlists"]:
+                self._playlists[name.upper()] = (name, dict.fromkeys(video_ids))
+
+        log_path = self._directory / _log_name(self._generation)
+        end = 0
+        if log_path.exists():
+            with open(log_path, "rb") as log:
+                for line in log:
+                    change = _decode(line)
+                    if change is None:
+                        break
+                    self._apply(change)
+                    self._logged += 1
+                    end += len(line)
+        self._log = open(log_path, "ab")
+        # Appending after a torn line would hide every later change.
+        self._log.truncate(end)
+
+        # Logs left behind by a crash during compaction.
+        for path in self._directory.glob("*.log"):
+            if path != log_path:
+                path.unlink()
+
+    def _apply(self, change):
+        kind, *args = change
+        if kind == "flag":
+            video_id, flag_reason = args
+            self._flags[video_id] = flag_reason
+        elif kind == "allow":
+            self._flags.pop(args[0], None)
+        elif kind == "create":
+            (name,) = args
+            self._playlists.setdefault(name.upper(), (name, {}))
+        elif kind == "delete":
+            self._playlists.pop(args[0].upper(), None)
+        else:
+            playlist = self._playlists.get(args[0].upper())
+            if playlist is None:
+                return
+            videos = playlist[1]
+            if kind == "add":
+                videos[args[1]] = None
+            elif kind == "remove":
+                videos.pop(args[1], None)
+            elif kind == "clear":
+                videos.clear()
+            else:
+                raise ValueError(f"Unknown journal change: {kind}")
+
+    def _append(self, *change):
+        self._apply(change)
+        self._log.write(_encode(change))
+        self._logged += 1
+        self._unsynced += 1
+        if self._compact_every is not None and self._logged >= self._compact_every:
+            self.compact()
+        elif self._unsynced >= self._sync_every:
+            self.sync()
+
+    def flag(self, video_id, flag_reason):
+        """Records that the video with video_id was flagged."""
+        self._append("flag", video_id, flag_reason)
+
+    def allow(self, video_id):
+        """Records that the flag was removed from the video with video_id."""
+        self._append("allow", video_id)
+
+    def create_playlist(self, playlist_name):
+        """Records that a playlist called playlist_name was created."""
+        self._append("create", playlist_name)
+
+    def delete_playlist(self, playlist_name):
+        """Records that the playlist called playlist_name was deleted."""
+        self._append("delete", playlist_name)
+
+    def add_to_playlist(self, playlist_name, video_id):
+        """Records that a video was added to a playlist."""
+        self._append("add", playlist_name, video_id)
+
+    def remove_from_playlist(self, playlist_name, video_id):
+        """Records that a video was removed from a playlist."""
+        self._append("remove", playlist_name, video_id)
+
+    def clear_playlist(self, playlist_name):
+        """Records that every video was removed from a playlist."""
+        self._append("clear", playlist_name)
+
+    def restore(self, video_library, playlists):
+        """Applies the recovered state to a library and a playlist registry.
+
+        Videos that are no longer in the library are skipped. Nothing is
+        journalled again.
+
+        Args:
+            video_library: The VideoLibrary whose videos are flagged.
+            playlists: The PlaylistRegistry the playlists are created in.
+        """
+        for video_id, flag_reason in self._flags.items():
+            video_library.flag_video(video_id, flag_reason)
+        for name, video_ids in self._playlists.values():
+            playlist = playlists.create(name)
+            if playlist is None:
+                continue
+            for video_id in video_ids:
+                video = video_library.get_video(video_id)
+                if video is not None:
+                    playlist.add_video(video)
+
+    def sync(self):
+        """Writes every appended change to disk."""
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._unsynced = 0
+
+    def compact(self):
+        """Snapshots the current state and starts an empty log."""
+        self.sync()
+        generation = self._generation + 1
+        snapshot = {
+            "generation": generation,
+            "flags": self._flags,
+            "playlists": [[name, list(video_ids)]
+                          for name, video_ids in self._playlists.values()],
+        }
+        temporary_path = self._directory / (_SNAPSHOT + ".tmp")
+        with open(temporary_path, "w", encoding="utf-8") as snapshot_file:
+            json.dump(snapshot, snapshot_file, separators=(",", ":"))
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temporary_path, self._directory / _SNAPSHOT)
+        _fsync_directory(self._directory)
+
+        self._log.close()
+        old_log_path = self._directory / _log_name(self._generation)
+        self._generation = generation
+        self._log = open(self._directory / _log_name(generation), "ab")
+        old_log_path.unlink()
+        self._logged = 0
+
+    def close(self):
+        """Syncs the log and closes it."""
+        self.sync()
+        self._log.close()
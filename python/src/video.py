@@ -1,21 +1,42 @@
 """A video class."""
 
+from typing import Optional
 from typing import Sequence
+import sys
+
+# Flyweight pool of tag tuples. Catalogs reuse a small vocabulary of tags
+# across many videos, so every video with the same tags shares one tuple
+# of interned strings instead of holding its own copy.
+_TAG_POOL = {}
+
+
+def intern_tags(video_tags: Sequence[str]) -> tuple:
+    """Returns the shared tuple holding video_tags."""
+    tags = tuple(video_tags)
+    pooled = _TAG_POOL.get(tags)
+    if pooled is None:
+        pooled = _TAG_POOL.setdefault(
+            tags, tuple(sys.intern(tag) for tag in tags))
+    return pooled
 
 
 class Video:
     """A class used to represent a Video."""
 
+    __slots__ = ("_title", "_video_id", "_tags", "_flag_reason")
+
     def __init__(self, video_title: str, video_id: str, video_tags: Sequence[str]):
         """Video constructor."""
         self._title = video_title
         self._video_id = video_id
-        self.flagged = False
-        self.flag_reason = ""
+
+        # None while the video is not flagged, so unflagged videos all share
+        # the same value and the flag and its reason change together.
+        self._flag_reason = None
 
         # Turn the tags into a tuple here so it's unmodifiable,
         # in case the caller changes the 'video_tags' they passed to us
-        self._tags = tuple(video_tags)
+        self._tags = intern_tags(video_tags)
 
     @property
     def title(self) -> str:
@@ -32,3 +53,34 @@ class Video:
         """Returns the list of tags of a video."""
         return self._tags
 
+    @property
+    def flagged(self) -> bool:
+        """Returns True if the video is flagged."""
+        return self._flag_reason is not None
+
+    @property
+    def flag_reason(self) -> str:
+        """Returns the reason the video was flagged, empty if it is not."""
+        return self._flag_reason or ""
+
+    @property
+    def flag_state(self) -> Optional[str]:
+        """Returns the reason the video was flagged, or None if it is not.
+
+        Threads that may race with flag changes read this once rather than
+        flagged and flag_reason, which could each see a different state.
+        """
+        return self._flag_reason
+
+    def update(self, video_title: str, video_tags: Sequence[str]):
+        """Replaces the title and tags after the catalog was reloaded."""
+        self._title = video_title
+        self._tags = intern_tags(video_tags)
+
+    def flag(self, flag_reason: str):
+        """Marks the video as flagged for flag_reason."""
+        self._flag_reason = flag_reason
+
+    def allow(self):
+        """Removes the flag from the video."""
+        self._flag_reason = None
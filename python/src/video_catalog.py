@@ -0,0 +1,431 @@
+"""Video catalog classes."""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import array
+import csv
+import itertools
+import mmap
+import struct
+import sys
+
+# Layout of a compiled catalog (all integers little endian):
+#
+#   header   MAGIC, number of rows
+#   records  one (title, video_id, tags) triple of (offset, length) pairs
+#            per row, in the order the rows appear in the source file
+#   id index the row numbers sorted by encoded video_id, for binary search
+#   titles   the row numbers sorted by title, ties kept in row order
+#   blob     the UTF-8 encoded strings the records point into
+#
+# Tags are stored as a single comma separated string, the same way they are
+# written in videos.txt.
+MAGIC = b"YTCAT\x00\x02\x00"
+_HEADER = struct.Struct("<8sI")
+_RECORD = struct.Struct("<IIIIII")
+_ORDINAL = struct.Struct("<I")
+
+VIDEOS_PATH = Path(__file__).parent / "videos.txt"
+
+
+# Helper Wrapper around CSV reader to strip whitespace from around
+# each item.
+def _csv_reader_with_strip(reader):
+    yield from ((item.strip() for item in line) for line in reader)
+
+
+def read_text_rows(path=VIDEOS_PATH):
+    """Parses a videos.txt style file.
+
+    Args:
+        path: The path of the pipe separated catalog file.
+
+    Yields:
+        A (title, video_id, tags) tuple for every row, where tags is a
+        tuple of tag strings.
+
+    Raises:
+        ValueError: If a row does not have three fields.
+    """
+    with open(path) as video_file:
+        lines = csv.reader(video_file, delimiter="|")
+        reader = _csv_reader_with_strip(lines)
+        while True:
+            try:
+                video_info = tuple(next(reader))
+            except StopIteration:
+                return
+            except csv.Error as error:
+                raise ValueError(f"{path}:{lines.line_num}: {error}") from None
+            if len(video_info) != 3:
+                raise ValueError(f"{path}:{lines.line_num}: expected 3 fields, "
+                                 f"found {len(video_info)}")
+            title, url, tags = video_info
+            yield (
+                title,
+                url,
+                tuple(tag.strip() for tag in tags.split(",")) if tags else (),
+            )
+
+
+def is_compiled_catalog(path) -> bool:
+    """Returns True if the file at path is a compiled catalog."""
+    with open(path, "rb") as catalog_file:
+        return catalog_file.read(len(MAGIC)) == MAGIC
+
+
+def compile_catalog(source_path, target_path):
+    """Compiles a videos.txt style file into a binary catalog.
+
+    Rows sharing a video_id are collapsed the same way VideoLibrary does
+    it: the last row wins but keeps the position of the first.
+
+    Args:
+        source_path: The path of the pipe separated catalog file.
+        target_path: Where the compiled catalog is written.
+
+    Returns:
+        The number of rows written.
+    """
+    catalog = TextCatalog.from_file(source_path)
+
+    blob = bytearray()
+    records = []
+    encoded_ids = []
+    for ordinal in range(len(catalog)):
+        title, video_id, tags = catalog.row(ordinal)
+        row = (title, video_id, ",".join(tags))
+        record = []
+        for field in row:
+            data = field.encode("utf-8")
+            record.extend((len(blob), len(data)))
+            blob += data
+        records.append(record)
+        encoded_ids.append(row[1].encode("utf-8"))
+
+    id_index = sorted(range(len(records)), key=encoded_ids.__getitem__)
+    title_order = catalog.title_order()
+
+    with open(target_path, "wb") as target:
+        target.write(_HEADER.pack(MAGIC, len(records)))
+        for record in records:
+            target.write(_RECORD.pack(*record))
+        for ordinal in id_index:
+            target.write(_ORDINAL.pack(ordinal))
+        for ordinal in title_order:
+            target.write(_ORDINAL.pack(ordinal))
+        target.write(blob)
+    return len(records)
+
+
+class TextCatalog:
+    """An in-memory catalog of the rows parsed from a videos.txt file.
+
+    Rows are kept as plain tuples and addressed by their ordinal, the
+    position of the row in the source file. Rows sharing a video_id are
+    collapsed: the last row wins but keeps the position of the first, and
+    the video_id is recorded in duplicate_ids.
+    """
+
+    def __init__(self, rows):
+        self._rows = []
+        self._ordinals = {}
+        self.duplicate_ids = []
+        for row in rows:
+            ordinal = self._ordinals.get(row[1])
+            if ordinal is None:
+                self._ordinals[row[1]] = len(self._rows)
+                self._rows.append(row)
+            else:
+                self._rows[ordinal] = row
+                self.duplicate_ids.append(row[1])
+
+    @classmethod
+    def from_file(cls, path=VIDEOS_PATH):
+        """Parses a videos.txt style file into a TextCatalog."""
+        return cls(read_text_rows(path))
+
+    @classmethod
+    def from_columns(cls, titles, video_ids, tags):
+        """Builds a TextCatalog from equally long lists of row fields.
+
+        The rows and the id lookup are built by builtins rather than a
+        loop, unless a video_id repeats and has to be collapsed.
+        """
+        ordinals = dict(zip(video_ids, range(len(video_ids))))
+        if len(ordinals) != len(video_ids):
+            return cls(zip(titles, video_ids, tags))
+        catalog = cls(())
+        catalog._rows = list(zip(titles, video_ids, tags))
+        catalog._ordinals = ordinals
+        return catalog
+
+    def __len__(self):
+        return len(self._rows)
+
+    def row(self, ordinal):
+        """Returns the (title, video_id, tags) tuple stored at ordinal."""
+        return self._rows[ordinal]
+
+    def lookup(self, video_id):
+        """Returns the ordinal of video_id, or None if it is not stored."""
+        return self._ordinals.get(video_id, None)
+
+    def title_order(self):
+        """Returns every ordinal sorted by title, ties kept in row order."""
+        return sorted(range(len(self._rows)),
+                      key=lambda ordinal: self._rows[ordinal][0])
+
+    def close(self):
+        """Nothing to release for an in-memory catalog."""
+        pass
+
+
+class VideoCatalog:
+    """A catalog whose rows are read back from the Videos made from them.
+
+    A library that creates every Video up front has no use for the parsed
+    rows afterwards, so it swaps its TextCatalog for one of these. Each
+    row costs one list slot on top of its Video, and the video_id dict of
+    the TextCatalog is kept, as its keys are the strings the Videos hold.
+    """
+
+    def __init__(self, catalog, videos):
+        """VideoCatalog constructor.
+
+        Args:
+            catalog: The TextCatalog the videos were made from.
+            videos: The Video made from each row, in ordinal order.
+        """
+        self._videos = videos
+        self._ordinals = catalog._ordinals
+        self.duplicate_ids = catalog.duplicate_ids
+
+    def __len__(self):
+        return len(self._videos)
+
+    def row(self, ordinal):
+        """Returns the (title, video_id, tags) tuple stored at ordinal."""
+        video = self._videos[ordinal]
+        return video.title, video.video_id, video.tags
+
+    def lookup(self, video_id):
+        """Returns the ordinal of video_id, or None if it is not stored."""
+        return self._ordinals.get(video_id, None)
+
+    def title_order(self):
+        """Returns every ordinal sorted by title, ties kept in row order."""
+        return sorted(range(len(self._videos)),
+                      key=lambda ordinal: self._videos[ordinal].title)
+
+    def close(self):
+        """Nothing to release for an in-memory catalog."""
+        pass
+
+
+class CompiledCatalog:
+    """A read-only, memory-mapped view of a compiled catalog.
+
+    Rows are addressed by their ordinal, the position of the row in the
+    source file. Nothing is decoded until a row is asked for.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as catalog_file:
+            self._mmap = mmap.mmap(
+                catalog_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled video catalog")
+        self._records_start = _HEADER.size
+        self._index_start = self._records_start + _RECORD.size * self._count
+        self._titles_start = self._index_start + _ORDINAL.size * self._count
+        self._blob_start = self._titles_start + _ORDINAL.size * self._count
+        if len(self._mmap) < self._blob_start:
+            self._mmap.close()
+            raise ValueError(f"{path} is a truncated video catalog")
+
+    def __len__(self):
+        return self._count
+
+    def _field(self, offset, length) -> str:
+        start = self._blob_start + offset
+        return self._mmap[start:start + length].decode("utf-8")
+
+    def _encoded_id(self, ordinal) -> bytes:
+        record_offset = self._records_start + _RECORD.size * ordinal
+        (_, _, offset, length, _, _) = _RECORD.unpack_from(
+            self._mmap, record_offset)
+        start = self._blob_start + offset
+        return self._mmap[start:start + length]
+
+    def row(self, ordinal):
+        """Returns the (title, video_id, tags) tuple stored at ordinal."""
+        (title_offset, title_length, id_offset, id_length, tags_offset,
+         tags_length) = _RECORD.unpack_from(
+            self._mmap, self._records_start + _RECORD.size * ordinal)
+        tags = self._field(tags_offset, tags_length)
+        return (
+            self._field(title_offset, title_length),
+            self._field(id_offset, id_length),
+            tuple(tags.split(",")) if tags else (),
+        )
+
+    def lookup(self, video_id):
+        """Returns the ordinal of video_id, or None if it is not stored."""
+        key = video_id.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            (ordinal,) = _ORDINAL.unpack_from(
+                self._mmap, self._index_start + _ORDINAL.size * middle)
+            found = self._encoded_id(ordinal)
+            if found < key:
+                low = middle + 1
+            elif found > key:
+                high = middle
+            else:
+                return ordinal
+        return None
+
+    def title_order(self):
+        """Returns every ordinal sorted by title, ties kept in row order.
+
+        The order is computed when the catalog is compiled, so this only
+        copies it out of the mapped file.
+        """
+        order = array.array("I")
+        order.frombytes(self._mmap[
+            self._titles_start:self._titles_start + _ORDINAL.size * self._count])
+        if sys.byteorder != "little":
+            order.byteswap()
+        return order
+
+    def close(self):
+        """Unmaps the catalog file."""
+        self._mmap.close()
+
+
+def open_catalog(path=VIDEOS_PATH):
+    """Opens a compiled catalog, or parses a videos.txt style file.
+
+    Returns:
+        A CompiledCatalog or a TextCatalog depending on the file format.
+    """
+    if is_compiled_catalog(path):
+        return CompiledCatalog(path)
+    return TextCatalog.from_file(path)
+
+
+# Fields are joined with NUL, which no title, id or tag holds, so a shard
+# travels between processes as a few strings instead of a tuple per row.
+# Rows share a small set of tag lists, so each row's tags are sent as the
+# index of its list in the shard's table of distinct lists.
+_SEPARATOR = "\0"
+
+
+def _shard_rows(path):
+    catalog = open_catalog(path)
+    rows = [catalog.row(ordinal) for ordinal in range(len(catalog))]
+    duplicate_ids = list(getattr(catalog, "duplicate_ids", ()))
+    catalog.close()
+    return rows, duplicate_ids
+
+
+def _read_shard(path):
+    rows, duplicate_ids = _shard_rows(path)
+    if not rows:
+        return None
+    titles, video_ids, tags = zip(*rows)
+    tag_lists = {}
+    tag_indexes = array.array(
+        "I", (tag_lists.setdefault(row_tags, len(tag_lists))
+              for row_tags in tags))
+    return (_SEPARATOR.join(titles), _SEPARATOR.join(video_ids),
+            _SEPARATOR.join(map(",".join, tag_lists)), tag_indexes.tobytes(),
+            _SEPARATOR.join(duplicate_ids))
+
+
+def _decode_shard(shard, tag_pool):
+    (joined_titles, joined_ids, joined_tag_lists, tag_indexes,
+     duplicates) = shard
+    tag_lists = [
+        tag_pool.setdefault(joined, tuple(joined.split(",")) if joined else ())
+        for joined in joined_tag_lists.split(_SEPARATOR)]
+    indexes = array.array("I")
+    indexes.frombytes(tag_indexes)
+    return (joined_titles.split(_SEPARATOR), joined_ids.split(_SEPARATOR),
+            list(map(tag_lists.__getitem__, indexes)),
+            duplicates.split(_SEPARATOR) if duplicates else [])
+
+
+def _merge_duplicates(catalog, shards):
+    # shards holds the video_ids and duplicate_ids of each shard in path
+    # order, with the repeats inside each shard already collapsed. The
+    # catalog merged from them only saw the repeats across shards.
+    if not catalog.duplicate_ids and not any(
+            duplicate_ids for _, duplicate_ids in shards):
+        return catalog
+    seen = set()
+    catalog.duplicate_ids = []
+    for video_ids, duplicate_ids in shards:
+        # The shard's own repeats, then its ids from earlier shards.
+        catalog.duplicate_ids.extend(duplicate_ids)
+        video_ids = list(video_ids)
+        catalog.duplicate_ids.extend(
+            video_id for video_id in video_ids if video_id in seen)
+        seen.update(video_ids)
+    return catalog
+
+
+def _merge_encoded(shards):
+    titles, video_ids, tags, id_columns = [], [], [], []
+    tag_pool = {}
+    for shard in shards:
+        if shard is None:
+            continue
+        shard_titles, shard_ids, shard_tags, duplicate_ids = _decode_shard(
+            shard, tag_pool)
+        titles.extend(shard_titles)
+        video_ids.extend(shard_ids)
+        tags.extend(shard_tags)
+        id_columns.append((shard_ids, duplicate_ids))
+    return _merge_duplicates(
+        TextCatalog.from_columns(titles, video_ids, tags), id_columns)
+
+
+def read_shards(paths, processes=None):
+    """Parses catalog shards in worker processes and merges them.
+
+    The shards are merged in path order, so the result does not depend on
+    the order they were given in or on which worker finished first. The
+    merge collapses duplicate video_ids the same way a single file does,
+    and duplicate_ids lists the repeats found in each shard in path order:
+    those inside the shard, then those of ids from earlier shards.
+
+    Args:
+        paths: The shard files, videos.txt style or compiled.
+        processes: The number of worker processes. Defaults to the number
+            of CPUs. With 1, or a single shard, no workers are started.
+
+    Returns:
+        A TextCatalog holding the rows of every shard.
+    """
+    paths = sorted(paths, key=str)
+    if processes == 1 or len(paths) < 2:
+        shards = list(map(_shard_rows, paths))
+        catalog = TextCatalog(itertools.chain.from_iterable(
+            rows for rows, _ in shards))
+        return _merge_duplicates(catalog, [
+            ((row[1] for row in rows), duplicate_ids)
+            for rows, duplicate_ids in shards])
+    with ProcessPoolExecutor(processes) as pool:
+        shards = list(pool.map(_read_shard, paths))
+    return _merge_encoded(shards)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python3 -m src.video_catalog <videos.txt> <output>")
+    written = compile_catalog(sys.argv[1], sys.argv[2])
+    print(f"Compiled {written} videos into {sys.argv[2]}")
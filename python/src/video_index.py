@@ -0,0 +1,553 @@
+"""Video index classes."""
+
+import array
+import heapq
+import itertools
+import re
+import sys
+import time
+
+
+# Ranges of titles at most this long are filtered rather than searched.
+_SCAN_RANGE = 16
+# The longest upper case form of a single character, such as "ΐ".upper().
+_LONGEST_UPPER = 3
+_CASE_FORMS = None
+
+
+def _case_forms():
+    """Returns the characters that are not their own upper case.
+
+    They are returned as a dict from each upper case form to the characters
+    with it, and a list of the (upper, characters) items whose upper case
+    form is longer than one character. They are built on first use, by
+    upper-casing every code point once.
+    """
+    global _CASE_FORMS
+    if _CASE_FORMS is None:
+        forms = {}
+        for character in map(chr, range(sys.maxunicode + 1)):
+            upper = character.upper()
+            if upper != character:
+                forms.setdefault(upper, []).append(character)
+        _CASE_FORMS = forms, [(upper, characters)
+                              for upper, characters in forms.items()
+                              if len(upper) > 1]
+    return _CASE_FORMS
+
+
+class TitleIndex:
+    """Video ordinals kept in title order.
+
+    Ties between equal titles are broken by ordinal, which keeps them in
+    catalog order the same way a stable sort by title does.
+    """
+
+    def __init__(self, ordinals, title_of):
+        """TitleIndex constructor.
+
+        Args:
+            ordinals: Every ordinal to index, already in title order.
+            title_of: A function returning the title of an ordinal.
+        """
+        self._ordinals = array.array("I", ordinals)
+        self._title_of = title_of
+
+    def __len__(self):
+        return len(self._ordinals)
+
+    def __iter__(self):
+        return iter(self._ordinals)
+
+    def _position(self, title, ordinal, low=0, high=None):
+        if high is None:
+            high = len(self._ordinals)
+        while low < high:
+            middle = (low + high) // 2
+            other = self._ordinals[middle]
+            if (self._title_of(other), other) < (title, ordinal):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def add(self, ordinal):
+        """Inserts ordinal at the position of its current title."""
+        title = self._title_of(ordinal)
+        self._ordinals.insert(self._position(title, ordinal), ordinal)
+
+    def remove(self, ordinal, title):
+        """Removes ordinal, which was indexed under title."""
+        position = self._position(title, ordinal)
+        if (position < len(self._ordinals)
+                and self._ordinals[position] == ordinal):
+            del self._ordinals[position]
+
+    def with_prefix(self, prefix):
+        """Yields the ordinals whose title starts with prefix, in order.
+
+        Matching is case sensitive, as the order is.
+        """
+        position = self._position(prefix, -1)
+        # No title can hold this character, so it sorts after every title
+        # starting with prefix.
+        end = self._position(prefix + "\U0010ffff", -1)
+        for position in range(position, end):
+            yield self._ordinals[position]
+
+    def with_upper_prefix(self, prefix):
+        """Yields the ordinals whose upper-cased title starts with prefix.
+
+        They come in title order, like with_prefix. Titles holding prefix
+        in any mix of cases are found by trying, one character at a time,
+        every character that upper-cases to the next part of prefix, each
+        by binary search within the range of the characters before it. So
+        only the case forms some title holds are walked.
+
+        Args:
+            prefix: An upper case string.
+        """
+        forms, long_forms = _case_forms()
+        title_of = self._title_of
+
+        def walk(start, low, high, rest):
+            if not rest or high - low <= _SCAN_RANGE:
+                for position in range(low, high):
+                    ordinal = self._ordinals[position]
+                    if title_of(ordinal).upper().startswith(prefix):
+                        yield ordinal
+                return
+            # Characters whose upper case is the next one to three
+            # characters of rest, or starts with all of it.
+            candidates = {rest[0]} if rest[0].upper() == rest[0] else set()
+            for length in range(1, min(len(rest), _LONGEST_UPPER) + 1):
+                candidates.update(forms.get(rest[:length], ()))
+            candidates.update(
+                character for upper, characters in long_forms
+                if len(upper) > len(rest) and upper.startswith(rest)
+                for character in characters)
+            for character in sorted(candidates):
+                upper = character.upper()
+                head = start + character
+                child_low = self._position(head, -1, low, high)
+                child_high = self._position(head + "\U0010ffff", -1,
+                                            child_low, high)
+                if child_low < child_high:
+                    yield from walk(head, child_low, child_high,
+                                    rest[len(upper):])
+
+        return walk("", 0, len(self._ordinals), prefix)
+
+    def page(self, count, after=None):
+        """Returns up to count ordinals, in title order.
+
+        Args:
+            count: The most ordinals returned.
+            after: A (title, ordinal) pair. Only ordinals that sort after
+                it are returned. The pair need not be indexed any more.
+        """
+        position = 0
+        if after is not None:
+            title, ordinal = after
+            position = self._position(title, ordinal)
+            if (position < len(self._ordinals)
+                    and self._ordinals[position] == ordinal
+                    and self._title_of(ordinal) == title):
+                position += 1
+        return self._ordinals[position:position + count]
+
+
+def tag_key(tag):
+    """Returns the case-insensitive key tags are indexed under."""
+    return tag.upper()
+
+
+class TagIndex:
+    """An inverted index from tag to the videos carrying it.
+
+    Tags are matched case-insensitively and every posting list is kept in
+    title order, so a query costs the size of its result.
+    """
+
+    def __init__(self, ordinals, tags_of, title_of):
+        """TagIndex constructor.
+
+        Args:
+            ordinals: Every ordinal to index, already in title order.
+            tags_of: A function returning the tags of an ordinal.
+            title_of: A function returning the title of an ordinal.
+        """
+        self._tags_of = tags_of
+        self._title_of = title_of
+        postings = {}
+        for ordinal in ordinals:
+            for key in self._keys(tags_of(ordinal)):
+                postings.setdefault(key, []).append(ordinal)
+        self._postings = {key: TitleIndex(posting, title_of)
+                          for key, posting in postings.items()}
+
+    @staticmethod
+    def _keys(tags):
+        return dict.fromkeys(tag_key(tag) for tag in tags)
+
+    def __contains__(self, tag):
+        return tag_key(tag) in self._postings
+
+    def search(self, tag):
+        """Returns the ordinals carrying tag, in title order."""
+        return self._postings.get(tag_key(tag), ())
+
+    def posting(self, tag):
+        """Returns the TitleIndex of the ordinals carrying tag, or None."""
+        return self._postings.get(tag_key(tag))
+
+    def add(self, ordinal):
+        """Indexes ordinal under its current tags."""
+        for key in self._keys(self._tags_of(ordinal)):
+            posting = self._postings.get(key)
+            if posting is None:
+                posting = self._postings[key] = TitleIndex((), self._title_of)
+            posting.add(ordinal)
+
+    def remove(self, ordinal, title, tags):
+        """Removes ordinal, which was indexed with title and tags."""
+        for key in self._keys(tags):
+            posting = self._postings.get(key)
+            if posting is not None:
+                posting.remove(ordinal, title)
+                if not len(posting):
+                    del self._postings[key]
+
+
+# The score of a title that starts with the search term.
+MAX_MATCH_SCORE = 3
+
+
+def match_score(title, term):
+    """Scores where term, already upper case, first occurs in title.
+
+    Returns:
+        MAX_MATCH_SCORE if the title starts with term, 2 if term starts
+        another word, 1 if it is inside a word and 0 if it does not occur.
+    """
+    # Positions are in the upper case title, which can be longer than the
+    # title itself, as "ß".upper() is "SS".
+    upper = title.upper()
+    position = upper.find(term)
+    if position < 0:
+        return 0
+    if position == 0:
+        return MAX_MATCH_SCORE
+    return 2 if not upper[position - 1].isalnum() else 1
+
+
+class TopK:
+    """The k highest scored items pushed, kept in a bounded min-heap.
+
+    Between equal scores the item pushed first wins, so pushing items in
+    title order breaks ties by title.
+    """
+
+    def __init__(self, k):
+        self._k = k
+        self._heap = []
+        self._pushed = 0
+
+    def full(self) -> bool:
+        """Returns True once k items are kept."""
+        return len(self._heap) >= self._k
+
+    def floor(self):
+        """Returns the lowest kept score, which a new item has to beat."""
+        return self._heap[0][0]
+
+    def push(self, score, item):
+        """Keeps item if it is among the k best so far."""
+        self._pushed += 1
+        entry = (score, -self._pushed, item)
+        if len(self._heap) < self._k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self):
+        """Returns the kept items, best first."""
+        return [item for _, _, item in sorted(self._heap, reverse=True)]
+
+
+class TrigramIndex:
+    """Trigram posting lists for case-insensitive title substring search.
+
+    A term of three or more characters can only be in titles holding every
+    one of its trigrams, so only the shortest of those posting lists is
+    walked and each candidate checked. Shorter terms fall back to walking
+    every title.
+    """
+
+    def __init__(self, titles, title_of):
+        """TrigramIndex constructor.
+
+        Args:
+            titles: The TitleIndex of every ordinal. It is walked to build
+                the posting lists and for short terms.
+            title_of: A function returning the title of an ordinal.
+        """
+        self._titles = titles
+        self._title_of = title_of
+        postings = {}
+        for ordinal in titles:
+            for gram in self._grams(title_of(ordinal).upper()):
+                postings.setdefault(gram, []).append(ordinal)
+        self._postings = {gram: TitleIndex(posting, title_of)
+                          for gram, posting in postings.items()}
+
+    @staticmethod
+    def _grams(text):
+        return {text[start:start + 3] for start in range(len(text) - 2)}
+
+    def may_contain(self, term):
+        """Returns False if no title can contain term, ignoring case."""
+        term = term.upper()
+        return len(term) < 3 or all(
+            gram in self._postings for gram in self._grams(term))
+
+    def search(self, term):
+        """Yields the ordinals whose title contains term, in title order."""
+        term = term.upper()
+        candidates = self._titles
+        if len(term) >= 3:
+            postings = [self._postings.get(gram) for gram in self._grams(term)]
+            if None in postings:
+                return
+            candidates = min(postings, key=len)
+        for ordinal in candidates:
+            if term in self._title_of(ordinal).upper():
+                yield ordinal
+
+    def add(self, ordinal):
+        """Indexes ordinal under its current title."""
+        for gram in self._grams(self._title_of(ordinal).upper()):
+            posting = self._postings.get(gram)
+            if posting is None:
+                posting = self._postings[gram] = TitleIndex((), self._title_of)
+            posting.add(ordinal)
+
+    def remove(self, ordinal, title):
+        """Removes ordinal, which was indexed under title."""
+        for gram in self._grams(title.upper()):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.remove(ordinal, title)
+                if not len(posting):
+                    del self._postings[gram]
+
+
+def edit_distance(first, second):
+    """Returns the Levenshtein distance between two strings."""
+    previous = list(range(len(second) + 1))
+    for row, first_char in enumerate(first, 1):
+        current = [row]
+        for column, second_char in enumerate(second, 1):
+            current.append(min(previous[column] + 1, current[column - 1] + 1,
+                               previous[column - 1] + (first_char != second_char)))
+        previous = current
+    return previous[-1]
+
+
+def max_edits(term):
+    """Returns how many typos a fuzzy search for term tolerates."""
+    if len(term) <= 2:
+        return 0
+    return 1 if len(term) <= 5 else 2
+
+
+class BKTree:
+    """A BK-tree of words, for finding the words close to a misspelling.
+
+    Each child hangs off its parent under its edit distance to it, so by
+    the triangle inequality a search only descends into the children
+    whose distance is within max_distance of the query's distance to the
+    parent.
+    """
+
+    def __init__(self, words=()):
+        self._root = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        """Adds word if it is not in the tree yet."""
+        if self._root is None:
+            self._root = (word, {})
+            return
+        node = self._root
+        while True:
+            distance = edit_distance(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                return
+            node = child
+
+    def search(self, word, max_distance, deadline=None):
+        """Returns the words within max_distance edits of word.
+
+        Args:
+            word: The word to look for.
+            max_distance: The most edits a match may be away.
+            deadline: A time.perf_counter() value. The search stops there
+                and returns what it found so far.
+
+        Returns:
+            A list of (distance, word) pairs, closest first.
+        """
+        found = []
+        nodes = [self._root] if self._root is not None else []
+        while nodes:
+            node_word, children = nodes.pop()
+            distance = edit_distance(word, node_word)
+            if distance <= max_distance:
+                found.append((distance, node_word))
+            for edge, child in children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    nodes.append(child)
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+        return sorted(found)
+
+
+def _tokens(text):
+    return re.findall(r"[^\W_]+", text.upper())
+
+
+class FuzzyIndex:
+    """Typo-tolerant search over title words and tags.
+
+    Every word of a title and every tag, without its "#", is a token with
+    a posting list in title order, and the distinct tokens are kept in a
+    BKTree. A search finds the tokens close to the term in the tree, which
+    is far smaller than the catalog, and merges their posting lists.
+    Tokens are only dropped from the posting lists, not from the tree.
+    """
+
+    def __init__(self, ordinals, tags_of, title_of):
+        """FuzzyIndex constructor.
+
+        Args:
+            ordinals: Every ordinal to index, already in title order.
+            tags_of: A function returning the tags of an ordinal.
+            title_of: A function returning the title of an ordinal.
+        """
+        self._tags_of = tags_of
+        self._title_of = title_of
+        postings = {}
+        for ordinal in ordinals:
+            for token in self._keys(title_of(ordinal), tags_of(ordinal)):
+                postings.setdefault(token, []).append(ordinal)
+        self._postings = {token: TitleIndex(posting, title_of)
+                          for token, posting in postings.items()}
+        self._tree = BKTree(self._postings)
+
+    @staticmethod
+    def _keys(title, tags):
+        keys = dict.fromkeys(_tokens(title))
+        keys.update(dict.fromkeys(tag_key(tag).lstrip("#") for tag in tags))
+        keys.pop("", None)
+        return keys
+
+    def _sort_key(self, ordinal):
+        return self._title_of(ordinal), ordinal
+
+    def search(self, term, max_distance, deadline=None):
+        """Yields the ordinals with a token close to term.
+
+        Ordinals come closest first and in title order between equals.
+
+        Args:
+            term: The possibly misspelled word, ignoring case.
+            max_distance: The most edits a token may be away from term.
+            deadline: A time.perf_counter() value after which no more
+                tokens are looked for.
+        """
+        seen = set()
+        matches = self._tree.search(term.lstrip("#").upper(), max_distance,
+                                    deadline)
+        for _, group in itertools.groupby(matches, key=lambda match: match[0]):
+            postings = [self._postings[token] for _, token in group
+                        if token in self._postings]
+            for ordinal in heapq.merge(*postings, key=self._sort_key):
+                if ordinal not in seen:
+                    seen.add(ordinal)
+                    yield ordinal
+
+    def add(self, ordinal):
+        """Indexes ordinal under its current title and tags."""
+        for token in self._keys(self._title_of(ordinal),
+                                self._tags_of(ordinal)):
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = TitleIndex(
+                    (), self._title_of)
+                self._tree.add(token)
+            posting.add(ordinal)
+
+    def remove(self, ordinal, title, tags):
+        """Removes ordinal, which was indexed with title and tags."""
+        for token in self._keys(title, tags):
+            posting = self._postings.get(token)
+            if posting is not None:
+                posting.remove(ordinal, title)
+                if not len(posting):
+                    del self._postings[token]
+
+
+class PlayableSet:
+    """A set of ordinals with constant time add, remove and random choice.
+
+    Members are packed in an array so a uniform random member is one index
+    away, and a second array, indexed by ordinal, holds each member's
+    position so it can be swapped out with the last one on removal.
+    """
+
+    def __init__(self, ordinals):
+        self._members = array.array("I", ordinals)
+        self._positions = array.array("I")
+        for position, ordinal in enumerate(self._members):
+            self._grow(ordinal)
+            self._positions[ordinal] = position
+
+    def __len__(self):
+        return len(self._members)
+
+    def __contains__(self, ordinal):
+        if ordinal >= len(self._positions):
+            return False
+        position = self._positions[ordinal]
+        return (position < len(self._members)
+                and self._members[position] == ordinal)
+
+    def _grow(self, ordinal):
+        if ordinal >= len(self._positions):
+            self._positions.extend([0] * (ordinal + 1 - len(self._positions)))
+
+    def add(self, ordinal):
+        """Adds ordinal if it is not a member yet."""
+        if ordinal not in self:
+            self._grow(ordinal)
+            self._positions[ordinal] = len(self._members)
+            self._members.append(ordinal)
+
+    def remove(self, ordinal):
+        """Removes ordinal if it is a member."""
+        if ordinal in self:
+            position = self._positions[ordinal]
+            last = self._members.pop()
+            if last != ordinal:
+                self._members[position] = last
+                self._positions[last] = position
+
+    def choice(self, rng):
+        """Returns a uniformly random member drawn with rng."""
+        return self._members[rng.randrange(len(self._members))]
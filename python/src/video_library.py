@@ -1,36 +1,542 @@
 """A video library class."""
 
+from .page_cursor import decode_cursor
+from .page_cursor import encode_cursor
 from .video import Video
-from pathlib import Path
-import csv
+from .video_catalog import VIDEOS_PATH
+from .video_catalog import CompiledCatalog
+from .video_catalog import TextCatalog
+from .video_catalog import VideoCatalog
+from .video_catalog import open_catalog
+from .video_catalog import read_shards
+from .video_index import MAX_MATCH_SCORE
+from .video_index import FuzzyIndex
+from .video_index import PlayableSet
+from .video_index import TagIndex
+from .video_index import TitleIndex
+from .video_index import TopK
+from .video_index import TrigramIndex
+from .video_index import match_score
+from .video_index import max_edits
+from .video_index import tag_key
+from .video_query import bitmap
+from .video_query import bitmap_bytes
+from .video_query import bitmap_ordinals
+from .video_query import compress_bitmap
+from .video_query import decompress_bitmap
+from .video_query import evaluate_query
+from .video_query import parse_query
+from .rw_lock import ReadWriteLock
+from .search_cache import SearchCache
+from typing import List
+from typing import NamedTuple
+import array
+import contextlib
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
 
 
-# Helper Wrapper around CSV reader to strip whitespace from around
-# each item.
-def _csv_reader_with_strip(reader):
-    yield from ((item.strip() for item in line) for line in reader)
+# Added to the score of a video carrying the searched term as a tag. It is
+# higher than any title match score, so tagged videos rank first.
+TAG_SCORE = MAX_MATCH_SCORE + 1
+
+# The most tag and title term bitmaps kept for queries. They are kept
+# compressed, so a sparse term costs far less than one bit per video.
+TERM_BITMAPS = 1024
+
+# The default memory bound of the search result cache.
+SEARCH_CACHE_BYTES = 8 * 1024 * 1024
+
+
+class CatalogDelta(NamedTuple):
+    """The video ids a reload added, removed and changed."""
+    added: List[str]
+    removed: List[str]
+    changed: List[str]
 
 
 class VideoLibrary:
-    """A class used to represent a Video Library."""
+    """A class used to represent a Video Library.
 
-    def __init__(self):
-        """The VideoLibrary class is initialized."""
+    Videos are addressed internally by their ordinal: their position in the
+    catalog the library was loaded from. Videos added by a reload get new
+    ordinals after the existing ones, and ordinals are never reused, so the
+    indexes stay valid while the catalog changes.
+    """
+
+    def __init__(self, catalog_path=VIDEOS_PATH, lazy=None, processes=None,
+                 rng=random, thread_safe=False,
+                 search_cache_bytes=SEARCH_CACHE_BYTES):
+        """The VideoLibrary class is initialized.
+
+        Args:
+            catalog_path: A videos.txt style file, or a catalog compiled
+                from one with `python3 -m src.video_catalog`. A list of
+                such files is read as the shards of one catalog, parsed in
+                parallel and merged in path order.
+            lazy: If True, videos are only created when they are first
+                asked for. Defaults to True for compiled catalogs, which
+                are memory-mapped, and False for videos.txt files. For a
+                videos.txt file this only shortens loading: the parsed rows
+                are kept instead of the videos, and take more memory than
+                them. Compile the catalog to use less memory.
+            processes: The number of worker processes used to parse shards.
+                Defaults to the number of CPUs.
+            rng: The random number generator used to pick random videos,
+                for example a seeded random.Random.
+            thread_safe: If True, the library may be used from many threads.
+                Reads run in parallel and flag changes and reloads wait for
+                them and run one at a time.
+            search_cache_bytes: The most memory kept for the results of
+                recent title and tag searches. 0 turns the cache off.
+        """
         self._videos = {}
-        with open(Path(__file__).parent / "videos.txt") as video_file:
-            reader = _csv_reader_with_strip(
-                csv.reader(video_file, delimiter="|"))
-            for video_info in reader:
-                title, url, tags = video_info
-                self._videos[url] = Video(
-                    title,
-                    url,
-                    [tag.strip() for tag in tags.split(",")] if tags else [],
-                )
+        self._catalog_path = catalog_path
+        self._processes = processes
+        self._catalog_stamp = self._stamp()
+        self._catalog = self._open_catalog()
+        # Rows changed by reloads, on top of the immutable catalog.
+        self._changed_rows = {}
+        self._added_rows = []
+        self._added_ordinals = {}
+        self._removed = set()
+        self._title_index = None
+        self._tag_index = None
+        self._trigram_index = None
+        self._fuzzy_index = None
+        self._playable = None
+        self._flagged = None
+        # Ids of the flagged videos. Only changed under the write lock, so
+        # readers can build the sets above from it while others create
+        # Videos.
+        self._flagged_ids = set()
+        # Compressed bitmaps of query terms, keyed by their query node.
+        self._term_bitmaps = {}
+        self.search_cache = SearchCache(search_cache_bytes)
+        # Bumped by every change to the videos, so cached search results
+        # from before it are never used.
+        self._generation = 0
+        self.rng = rng
+        self._lock = ReadWriteLock() if thread_safe else None
+        # Guards building the indexes, which readers do on first use.
+        self._build_lock = threading.Lock()
+        if lazy is None:
+            lazy = isinstance(self._catalog, CompiledCatalog)
+        if not lazy:
+            videos = [self._materialize(ordinal)
+                      for ordinal in range(len(self._catalog))]
+            if isinstance(self._catalog, TextCatalog):
+                # The rows are only needed until the videos exist.
+                self._catalog = VideoCatalog(self._catalog, videos)
+
+    @property
+    def duplicate_ids(self):
+        """Returns the video ids that appeared more than once on load."""
+        return getattr(self._catalog, "duplicate_ids", [])
+
+    def __len__(self):
+        """Returns the number of videos without creating any of them."""
+        with self._reading():
+            return self._ordinal_count() - len(self._removed)
+
+    def _reading(self):
+        if self._lock is None:
+            return contextlib.nullcontext()
+        return self._lock.reading()
+
+    def _writing(self):
+        if self._lock is None:
+            return contextlib.nullcontext()
+        return self._lock.writing()
+
+    def _ordinals(self, source):
+        # Thread safe libraries copy the ordinals out under the read lock,
+        # so callers never hold the lock while they consume the videos.
+        if self._lock is None:
+            return source()
+        with self._lock.reading():
+            return list(source())
+
+    def _ordinal_count(self):
+        return len(self._catalog) + len(self._added_rows)
+
+    def _row(self, ordinal):
+        row = self._changed_rows.get(ordinal)
+        if row is not None:
+            return row
+        if ordinal >= len(self._catalog):
+            return self._added_rows[ordinal - len(self._catalog)]
+        return self._catalog.row(ordinal)
+
+    def _lookup(self, video_id):
+        ordinal = self._added_ordinals.get(video_id)
+        if ordinal is None:
+            ordinal = self._catalog.lookup(video_id)
+        if ordinal in self._removed:
+            return None
+        return ordinal
+
+    def _materialize(self, ordinal):
+        title, url, tags = self._row(ordinal)
+        video = self._videos.get(url)
+        if video is None:
+            # setdefault keeps one Video per id when readers race here.
+            video = self._videos.setdefault(url, Video(title, url, tags))
+        return video
+
+    def _materialize_all(self, ordinals):
+        for ordinal in ordinals:
+            # A reload may have removed it since the ordinals were copied.
+            if ordinal not in self._removed:
+                yield self._materialize(ordinal)
+
+    def iter_videos(self):
+        """Yields every video in catalog order, creating them as needed."""
+        return self._materialize_all(
+            self._ordinals(lambda: range(self._ordinal_count())))
+
+    def _title(self, ordinal):
+        return self._row(ordinal)[0]
+
+    def _tags(self, ordinal):
+        return self._row(ordinal)[2]
+
+    def _titles(self):
+        # Built on first use so loading the library stays cheap, then kept
+        # up to date by reloads.
+        with self._build_lock:
+            if self._title_index is None:
+                order = self._catalog.title_order()
+                stale = self._removed.union(self._changed_rows)
+                if stale:
+                    order = [ordinal for ordinal in order
+                             if ordinal not in stale]
+                title_index = TitleIndex(order, self._title)
+                moved = set(self._changed_rows).union(
+                    range(len(self._catalog), self._ordinal_count()))
+                for ordinal in sorted(moved - self._removed):
+                    title_index.add(ordinal)
+                self._title_index = title_index
+        return self._title_index
+
+    def iter_videos_by_title(self):
+        """Yields every video sorted by title, without sorting again."""
+        return self._materialize_all(self._ordinals(self._titles))
+
+    def page_by_title(self, limit, cursor=None):
+        """Returns one page of the videos sorted by title.
+
+        Only the page is read from the title index, so a page costs the
+        same wherever it is in the catalog. Videos added or removed between
+        pages are picked up or skipped by the pages that follow.
+
+        Args:
+            limit: The most videos on the page.
+            cursor: Where the page starts, as returned for the previous
+                page. None starts at the first video.
+
+        Returns:
+            A list of the Videos on the page and the cursor of the next
+            page, which is None if this is the last one.
+
+        Raises:
+            ValueError: If cursor is not a cursor this method returned.
+        """
+        after = None if cursor is None else decode_cursor(cursor, str, int)
+        with self._reading():
+            ordinals = self._titles().page(limit + 1, after)
+            next_cursor = None
+            if len(ordinals) > limit:
+                ordinals = ordinals[:limit]
+                next_cursor = encode_cursor(self._title(ordinals[-1]),
+                                            ordinals[-1])
+            return list(self._materialize_all(ordinals)), next_cursor
+
+    def _tag_postings(self):
+        titles = self._titles()
+        with self._build_lock:
+            if self._tag_index is None:
+                self._tag_index = TagIndex(titles, self._tags, self._title)
+        return self._tag_index
+
+    def _cached_search(self, key, search):
+        with self._reading():
+            ordinals = self.search_cache.get(key, self._generation)
+            if ordinals is None:
+                ordinals = array.array("I", search())
+                self.search_cache.put(key, self._generation, ordinals)
+        return ordinals
+
+    def iter_videos_with_tag(self, video_tag):
+        """Yields the videos tagged video_tag, ignoring case, by title.
+
+        Results are cached in search_cache until the library changes.
+        """
+        return self._materialize_all(self._cached_search(
+            ("tag", tag_key(video_tag)),
+            lambda: self._tag_postings().search(video_tag)))
+
+    def _title_grams(self):
+        titles = self._titles()
+        with self._build_lock:
+            if self._trigram_index is None:
+                self._trigram_index = TrigramIndex(titles, self._title)
+        return self._trigram_index
+
+    def iter_videos_matching(self, search_term):
+        """Yields the videos whose title contains search_term, by title.
+
+        Matching ignores case, like iter_videos_with_tag, and results are
+        cached the same way.
+        """
+        return self._materialize_all(self._cached_search(
+            ("title", search_term.upper()),
+            lambda: self._title_grams().search(search_term)))
+
+    def search_ranked(self, search_term, k):
+        """Returns the k most relevant videos for search_term.
+
+        A video matches if its title contains the term or it carries the
+        term as a tag, both ignoring case. Its score is the match_score of
+        its title plus TAG_SCORE if it carries the tag, so tagged videos
+        always rank first. Ties go to the first title. Flagged videos are
+        left out, as they cannot be played.
+
+        Matches are walked in groups, from the best they can score to the
+        worst: tagged titles starting with the term, other tagged videos,
+        other titles starting with the term and other title matches. Each
+        group is walked in title order, and only until none of the videos
+        left in it could make the top k. Titles starting with the term in
+        any case are read from the title order by binary search, so a
+        common term costs about k rather than the number of matches.
+
+        Returns:
+            A list of up to k Videos, most relevant first.
+        """
+        word = search_term.lstrip("#")
+        upper_word = word.upper()
+        tag = "#" + upper_word
+        top = TopK(k)
+        seen = set()
+
+        def score(ordinal, tagged):
+            if ordinal in seen:
+                return None
+            seen.add(ordinal)
+            title, video_id, tags = self._row(ordinal)
+            if (not self._is_playable(video_id)
+                    or (tag in map(tag_key, tags)) != tagged):
+                return None
+            return match_score(title, upper_word) + (TAG_SCORE if tagged else 0)
+
+        def walk(bound, ordinals, tagged):
+            for ordinal in ordinals:
+                if top.full() and top.floor() >= bound:
+                    return
+                ordinal_score = score(ordinal, tagged)
+                if ordinal_score is not None:
+                    top.push(ordinal_score, ordinal)
+
+        with self._reading():
+            tagged = self._tag_postings().posting(tag)
+            titles = self._titles()
+            grams = self._title_grams()
+            in_titles = bool(word) and grams.may_contain(word)
+            if tagged is not None:
+                if word:
+                    walk(TAG_SCORE + MAX_MATCH_SCORE,
+                         tagged.with_upper_prefix(upper_word), True)
+                walk(TAG_SCORE + (MAX_MATCH_SCORE - 1 if in_titles else 0),
+                     tagged, True)
+            if in_titles:
+                walk(MAX_MATCH_SCORE, titles.with_upper_prefix(upper_word),
+                     False)
+                walk(MAX_MATCH_SCORE - 1, grams.search(word), False)
+            return [self._materialize(ordinal) for ordinal in top.items()]
+
+    def _fuzzy_tokens(self):
+        titles = self._titles()
+        with self._build_lock:
+            if self._fuzzy_index is None:
+                self._fuzzy_index = FuzzyIndex(titles, self._tags, self._title)
+        return self._fuzzy_index
+
+    def search_fuzzy(self, search_term, k, budget=0.05):
+        """Returns up to k videos matching search_term despite typos.
+
+        A video matches if a word of its title or one of its tags is at
+        most max_edits(search_term) edits away from the term, ignoring
+        case. Closer matches come first, then titles in order. Flagged
+        videos are left out, as they cannot be played.
+
+        Args:
+            search_term: The possibly misspelled word.
+            k: The most videos returned.
+            budget: The seconds spent looking for close words, not counting
+                building the index on first use. When it runs out, the
+                closest matches found so far are returned.
+
+        Returns:
+            A list of up to k Videos, closest first.
+        """
+        ordinals = []
+        with self._reading():
+            fuzzy_index = self._fuzzy_tokens()
+            deadline = time.perf_counter() + budget
+            for ordinal in fuzzy_index.search(
+                    search_term, max_edits(search_term.lstrip("#")), deadline):
+                if len(ordinals) == k:
+                    break
+                if self._is_playable(self._row(ordinal)[1]):
+                    ordinals.append(ordinal)
+            return [self._materialize(ordinal) for ordinal in ordinals]
+
+    def _term_bitmap(self, node, size):
+        if node[0] == "flagged":
+            return bitmap(self._flagged_ordinals(), size)
+        if node[0] == "tag":
+            key = ("tag", tag_key(node[1]))
+        else:
+            key = ("title", node[1].upper())
+        data = self._term_bitmaps.get(key)
+        if data is not None:
+            return decompress_bitmap(data)
+        if key[0] == "tag":
+            ordinals = self._tag_postings().search(node[1])
+        else:
+            ordinals = self._title_grams().search(node[1])
+        bits = bitmap(ordinals, size)
+        with self._build_lock:
+            if len(self._term_bitmaps) >= TERM_BITMAPS:
+                del self._term_bitmaps[next(iter(self._term_bitmaps))]
+            self._term_bitmaps[key] = compress_bitmap(bits)
+        return bits
+
+    def _forget_terms(self, title, tags):
+        # Drops the cached bitmaps a video with title and tags is in.
+        upper_title = title.upper()
+        stale = [key for key in self._term_bitmaps
+                 if key[0] == "title" and key[1] in upper_title]
+        stale.extend(("tag", tag_key(tag)) for tag in tags)
+        for key in stale:
+            self._term_bitmaps.pop(key, None)
+
+    def query(self, query_text, k):
+        """Returns the videos matching a boolean query, by title.
+
+        Queries combine tags, title terms and FLAGGED with AND, OR, NOT and
+        parentheses, as described by parse_query. Each term is a bitmap
+        over the ordinals, so combining terms costs about one machine word
+        per 64 videos whatever the terms match. Tag and title term bitmaps
+        are kept after first use.
+
+        Args:
+            query_text: The query.
+            k: The most videos returned.
+
+        Returns:
+            The number of matching videos and a list of the first k of
+            them in title order, flagged or not.
+
+        Raises:
+            ValueError: If query_text is not a query.
+        """
+        node = parse_query(query_text)
+        with self._reading():
+            size = self._ordinal_count()
+            universe = ((1 << size) - 1) & ~bitmap(self._removed, size)
+            bits = evaluate_query(
+                node, lambda term: self._term_bitmap(term, size), universe)
+            count = bin(bits).count("1")
+            if count * count > k * size:
+                # Matches are common enough that the first k turn up early
+                # in title order.
+                data = bitmap_bytes(bits, size)
+                ordinals = itertools.islice(
+                    (ordinal for ordinal in self._titles()
+                     if data[ordinal >> 3] >> (ordinal & 7) & 1), k)
+            else:
+                ordinals = heapq.nsmallest(
+                    k, bitmap_ordinals(bits, size),
+                    key=lambda ordinal: (self._title(ordinal), ordinal))
+            return count, [self._materialize(ordinal) for ordinal in ordinals]
+
+    def _is_playable(self, video_id):
+        video = self._videos.get(video_id)
+        return video is None or not video.flagged
+
+    def _playable_set(self):
+        with self._build_lock:
+            if self._playable is None:
+                playable = PlayableSet(
+                    ordinal for ordinal in range(self._ordinal_count())
+                    if ordinal not in self._removed)
+                for video_id in self._flagged_ids:
+                    playable.remove(self._lookup(video_id))
+                self._playable = playable
+        return self._playable
+
+    def _flagged_ordinals(self):
+        with self._build_lock:
+            if self._flagged is None:
+                self._flagged = set(map(self._lookup, self._flagged_ids))
+        return self._flagged
+
+    def get_random_playable_video(self):
+        """Returns a uniformly random video that is not flagged.
+
+        Returns:
+            The Video, or None if every video is flagged.
+        """
+        with self._reading():
+            playable = self._playable_set()
+            if not playable:
+                return None
+            return self._materialize(playable.choice(self.rng))
+
+    def flag_video(self, video_id, flag_reason):
+        """Flags the video with video_id for flag_reason.
+
+        Returns:
+            The flagged Video, or None if the video does not exist.
+        """
+        with self._writing():
+            video = self._get_video(video_id)
+            if video is not None:
+                video.flag(flag_reason)
+                self._flagged_ids.add(video_id)
+                self._generation += 1
+                if self._playable is not None:
+                    self._playable.remove(self._lookup(video_id))
+                if self._flagged is not None:
+                    self._flagged.add(self._lookup(video_id))
+            return video
+
+    def allow_video(self, video_id):
+        """Removes the flag from the video with video_id.
+
+        Returns:
+            The allowed Video, or None if the video does not exist.
+        """
+        with self._writing():
+            video = self._get_video(video_id)
+            if video is not None:
+                video.allow()
+                self._flagged_ids.discard(video_id)
+                self._generation += 1
+                if self._playable is not None:
+                    self._playable.add(self._lookup(video_id))
+                if self._flagged is not None:
+                    self._flagged.discard(self._lookup(video_id))
+            return video
 
     def get_all_videos(self):
         """Returns all available video information from the video library."""
-        return list(self._videos.values())
+        return list(self.iter_videos())
 
     def get_video(self, video_id):
         """Returns the video object (title, url, tags) from the video library.
@@ -42,4 +548,140 @@ class VideoLibrary:
             The Video object for the requested video_id. None if the video
             does not exist.
         """
-        return self._videos.get(video_id, None)
+        with self._reading():
+            return self._get_video(video_id)
+
+    def _get_video(self, video_id):
+        video = self._videos.get(video_id, None)
+        if video is None:
+            ordinal = self._lookup(video_id)
+            if ordinal is not None:
+                video = self._materialize(ordinal)
+        return video
+
+    def _is_sharded(self):
+        return not isinstance(self._catalog_path, (str, os.PathLike))
+
+    def _open_catalog(self):
+        if self._is_sharded():
+            return read_shards(self._catalog_path, self._processes)
+        return open_catalog(self._catalog_path)
+
+    def _stamp(self):
+        paths = self._catalog_path
+        if not self._is_sharded():
+            paths = [paths]
+        return tuple((stat.st_mtime_ns, stat.st_size)
+                     for stat in (os.stat(path) for path in paths))
+
+    def _index(self, ordinal):
+        title, video_id, tags = self._row(ordinal)
+        self._forget_terms(title, tags)
+        video = self._videos.get(video_id)
+        flagged = video is not None and video.flagged
+        if self._playable is not None and not flagged:
+            self._playable.add(ordinal)
+        if self._flagged is not None and flagged:
+            self._flagged.add(ordinal)
+        if self._title_index is not None:
+            self._title_index.add(ordinal)
+        if self._tag_index is not None:
+            self._tag_index.add(ordinal)
+        if self._trigram_index is not None:
+            self._trigram_index.add(ordinal)
+        if self._fuzzy_index is not None:
+            self._fuzzy_index.add(ordinal)
+
+    def _unindex(self, ordinal):
+        title, _, tags = self._row(ordinal)
+        self._forget_terms(title, tags)
+        if self._playable is not None:
+            self._playable.remove(ordinal)
+        if self._flagged is not None:
+            self._flagged.discard(ordinal)
+        if self._title_index is not None:
+            self._title_index.remove(ordinal, title)
+        if self._tag_index is not None:
+            self._tag_index.remove(ordinal, title, tags)
+        if self._trigram_index is not None:
+            self._trigram_index.remove(ordinal, title)
+        if self._fuzzy_index is not None:
+            self._fuzzy_index.remove(ordinal, title, tags)
+
+    def reload(self, force=False):
+        """Applies the changes made to the catalog file since it was read.
+
+        The file is only read again if its modification time or size
+        changed, or if force is set. Only the rows that were added, removed
+        or changed are applied to the library and its indexes. Existing
+        Video objects are updated in place, so flags and playlists that
+        refer to them are kept. Compiled catalogs must be replaced with a
+        new file rather than rewritten in place, as the old one is mapped.
+
+        Returns:
+            A CatalogDelta of the video ids that were applied.
+
+        Raises:
+            OSError: If the catalog cannot be read.
+            ValueError: If the catalog is malformed. The library is left
+                as it was.
+        """
+        delta = CatalogDelta([], [], [])
+        stamp = self._stamp()
+        if stamp == self._catalog_stamp and not force:
+            return delta
+
+        # Parsing is the slow part and only touches the new catalog, so it
+        # runs before readers are locked out. Every row is decoded here, so
+        # a malformed catalog fails before anything is changed.
+        catalog = self._open_catalog()
+        try:
+            rows = [catalog.row(ordinal) for ordinal in range(len(catalog))]
+        finally:
+            catalog.close()
+        with self._writing():
+            seen = set()
+            for row in rows:
+                title, video_id, tags = row
+                ordinal = self._lookup(video_id)
+                if ordinal is None:
+                    ordinal = self._add_row(row)
+                    delta.added.append(video_id)
+                elif self._row(ordinal) != row:
+                    self._unindex(ordinal)
+                    self._changed_rows[ordinal] = row
+                    video = self._videos.get(video_id)
+                    if video is not None:
+                        video.update(title, tags)
+                    self._index(ordinal)
+                    delta.changed.append(video_id)
+                seen.add(ordinal)
+
+            for ordinal in range(self._ordinal_count()):
+                if ordinal not in seen and ordinal not in self._removed:
+                    self._unindex(ordinal)
+                    self._removed.add(ordinal)
+                    video_id = self._row(ordinal)[1]
+                    self._videos.pop(video_id, None)
+                    self._flagged_ids.discard(video_id)
+                    delta.removed.append(video_id)
+
+            self._catalog_stamp = stamp
+            self._generation += 1
+        return delta
+
+    def _add_row(self, row):
+        video_id = row[1]
+        ordinal = self._catalog.lookup(video_id)
+        if ordinal is None:
+            ordinal = self._added_ordinals.get(video_id)
+        if ordinal is not None:
+            # A video that was removed by an earlier reload is back.
+            self._removed.discard(ordinal)
+            self._changed_rows[ordinal] = row
+        else:
+            ordinal = self._ordinal_count()
+            self._added_rows.append(row)
+            self._added_ordinals[video_id] = ordinal
+        self._index(ordinal)
+        return ordinal
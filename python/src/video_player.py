@@ -1,134 +1,244 @@
 """A video player class."""
 
 from .video_library import VideoLibrary
-from .video_playlist import Playlist
-import random
+from .output_sink import StdoutSink
+from .player_session import PlayerSession
+import functools
+
+
+def _flushes_output(method):
+    """Flushes the player's output once the decorated command returns."""
+    @functools.wraps(method)
+    def command(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._out.flush()
+    return command
+
+
+# How many results a ranked search shows when not told.
+DEFAULT_TOP_K = 10
 
 
 class VideoPlayer:
     """A class used to represent a Video Player."""
-    video_playing = None
-    paused = False
 
-    def __init__(self):
-        self._video_library = VideoLibrary()
-        self.playlists = []
+    def __init__(self, read_answer=None, output=None, video_library=None,
+                 defer_answers=False, session=None, journal=None):
+        """VideoPlayer constructor.
 
+        Args:
+            read_answer: A function returning the user's answer when a
+                search asks which video to play. Defaults to input().
+            output: The OutputSink every command writes to. Defaults to a
+                StdoutSink. It is flushed when each command returns.
+            video_library: The VideoLibrary to play from, which may be
+                shared with other players. Defaults to a new one.
+            defer_answers: If True, a search does not wait for its answer.
+                The caller passes it to answer_search() instead.
+            session: The PlayerSession holding what is playing and the
+                playlists. Defaults to a new one.
+            journal: A StateJournal every flag and playlist change is
+                recorded in, if any.
+        """
+        if video_library is None:
+            video_library = VideoLibrary()
+        if session is None:
+            session = PlayerSession()
+        self._video_library = video_library
+        self._session = session
+        self._read_answer = read_answer or (lambda: input())
+        self._out = output or StdoutSink()
+        self._defer_answers = defer_answers
+        self._journal = journal
+
+    def _record(self, change, *args):
+        """Records a change of state in the journal, if there is one."""
+        if self._journal is not None:
+            getattr(self._journal, change)(*args)
+
+    @property
+    def output(self):
+        """Returns the OutputSink the player writes to."""
+        return self._out
+
+    @property
+    def session(self):
+        """Returns the PlayerSession of the player's user."""
+        return self._session
+
+    @property
+    def awaiting_answer(self):
+        """Returns True if a deferred search is waiting for its answer."""
+        return self._session.pending_choice is not None
+
+    @_flushes_output
     def number_of_videos(self):
-        num_videos = len(self._video_library.get_all_videos())
-        print(f"{num_videos} videos in the library")
-
+        num_videos = len(self._video_library)
+        self._out.write(f"{num_videos} videos in the library")
+
+    @_flushes_output
+    def reload_videos(self):
+        """Applies the changes made to the video catalog file."""
+        try:
+            delta = self._video_library.reload()
+        except (OSError, ValueError) as error:
+            self._out.write(f"Cannot reload videos: {error}")
+            return
+        self._out.write(f"Reloaded videos: {len(delta.added)} added, "
+                        f"{len(delta.removed)} removed, {len(delta.changed)} changed")
+
+    def _write_video(self, video):
+        """Writes the listing line of video, marking it if flagged."""
+        tags = (" ".join(video.tags))
+        flag_reason = video.flag_state
+        if flag_reason is not None:
+            self._out.write(f"{video.title} ({video.video_id}) [{tags}] "
+                            f"- FLAGGED (reason: {flag_reason})")
+        else:
+            self._out.write(f"{video.title} ({video.video_id}) [{tags}]")
+
+    def _write_page(self, videos, next_cursor):
+        """Writes a page of videos and how to ask for the next one."""
+        for video in videos:
+            self._write_video(video)
+        if next_cursor is None:
+            self._out.write("No more videos")
+        else:
+            self._out.write(f"Next page cursor: {next_cursor}")
+
+    @staticmethod
+    def _positive_number(text):
+        """Returns text as a positive int, or None if it is not one."""
+        try:
+            number = int(text)
+        except ValueError:
+            return None
+        return number if number > 0 else None
+
+    @_flushes_output
     def show_all_videos(self):
         """Returns all videos."""
-        video_list = self._video_library.get_all_videos()
-        video_list.sort(key=lambda x: x.title)
-
-        print("Here's a list of all available videos:")
-        for j in range(len(video_list)):
-            tags = (" ".join(video_list[j].tags))
-            if video_list[j].flagged:
-                print(f"{video_list[j].title} ({video_list[j].video_id}) [{tags}] "
-                      f"- FLAGGED (reason: {video_list[j].flag_reason})")
-            else:
-                print(f"{video_list[j].title} ({video_list[j].video_id}) [{tags}]")
+        self._out.write("Here's a list of all available videos:")
+        for video in self._video_library.iter_videos_by_title():
+            self._write_video(video)
+
+    @_flushes_output
+    def show_videos_page(self, limit, cursor=None):
+        """Display one page of the videos, sorted by title.
+
+        Args:
+            limit: The most videos to show.
+            cursor: The cursor the previous page ended with, if any.
+        """
+        page_size = self._positive_number(limit)
+        if page_size is None:
+            self._out.write("Cannot show videos: Page size must be a positive number")
+            return
+        try:
+            videos, next_cursor = self._video_library.page_by_title(
+                page_size, cursor)
+        except ValueError:
+            self._out.write("Cannot show videos: Invalid cursor")
+            return
+        self._out.write("Here's a page of available videos:")
+        self._write_page(videos, next_cursor)
 
+    @_flushes_output
     def play_video(self, video_id):
         """Plays the respective video.
 
         Args:
             video_id: The video_id to be played.
         """
-        self.paused = False
+        self._session.paused = False
         new_video = self._video_library.get_video(video_id)
 
         if new_video is None:
-            print("Cannot play video: Video does not exist")
+            self._out.write("Cannot play video: Video does not exist")
         else:
-            if new_video.flagged:
-                print(f"Cannot play video: Video is currently flagged (reason: {new_video.flag_reason})")
+            flag_reason = new_video.flag_state
+            if flag_reason is not None:
+                self._out.write(f"Cannot play video: Video is currently flagged (reason: {flag_reason})")
             else:
-                if self.video_playing is not None:
+                if self._session.video_playing is not None:
                     self.stop_video()
 
-                self.video_playing = new_video
-                print(f"Playing video: {self.video_playing.title}")
+                self._session.video_playing = new_video
+                self._out.write(f"Playing video: {self._session.video_playing.title}")
 
+    @_flushes_output
     def stop_video(self):
         """Stops the current video."""
-        if self.video_playing is None:
-            print("Cannot stop video: No video is currently playing")
+        if self._session.video_playing is None:
+            self._out.write("Cannot stop video: No video is currently playing")
         else:
-            print(f"Stopping video: {self.video_playing.title}")
-            self.video_playing = None
+            self._out.write(f"Stopping video: {self._session.video_playing.title}")
+            self._session.video_playing = None
 
+    @_flushes_output
     def play_random_video(self):
         """Plays a random video from the video library."""
-        raw_video_list = self._video_library.get_all_videos()
-        video_list = []
-
-        for i in range(len(raw_video_list)):
-            if not raw_video_list[i].flagged:
-                video_list.append(raw_video_list[i])
-
-        if len(video_list) == 0:
-            print("No videos available")
+        video = self._video_library.get_random_playable_video()
+        if video is None:
+            self._out.write("No videos available")
         else:
-            self.play_video(video_list[random.randint(0, len(video_list) - 1)].video_id)
+            self.play_video(video.video_id)
 
+    @_flushes_output
     def pause_video(self):
         """Pauses the current video."""
-        if self.video_playing is None:
-            print("Cannot pause video: No video is currently playing")
+        if self._session.video_playing is None:
+            self._out.write("Cannot pause video: No video is currently playing")
         else:
-            if self.paused:
-                print(f"Video already paused: {self.video_playing.title}")
+            if self._session.paused:
+                self._out.write(f"Video already paused: {self._session.video_playing.title}")
             else:
-                self.paused = True
-                print(f"Pausing video: {self.video_playing.title}")
+                self._session.paused = True
+                self._out.write(f"Pausing video: {self._session.video_playing.title}")
 
+    @_flushes_output
     def continue_video(self):
         """Resumes playing the current video."""
 
-        if self.video_playing is None:
-            print("Cannot continue video: No video is currently playing")
+        if self._session.video_playing is None:
+            self._out.write("Cannot continue video: No video is currently playing")
         else:
-            if not self.paused:
-                print("Cannot continue video: Video is not paused")
+            if not self._session.paused:
+                self._out.write("Cannot continue video: Video is not paused")
             else:
-                self.paused = False
-                print(f"Continuing video: {self.video_playing.title}")
+                self._session.paused = False
+                self._out.write(f"Continuing video: {self._session.video_playing.title}")
 
+    @_flushes_output
     def show_playing(self):
         """Displays video currently playing."""
-        if self.video_playing is None:
-            print("No video is currently playing")
+        video = self._session.video_playing
+        if video is None:
+            self._out.write("No video is currently playing")
         else:
-            tags = (" ".join(self.video_playing.tags))
-            if self.paused:
-                print(
-                    f"Currently playing: {self.video_playing.title} ({self.video_playing.video_id}) [{tags}] - PAUSED")
+            tags = (" ".join(video.tags))
+            if self._session.paused:
+                self._out.write(
+                    f"Currently playing: {video.title} ({video.video_id}) [{tags}] - PAUSED")
             else:
-                print(f"Currently playing: {self.video_playing.title} ({self.video_playing.video_id}) [{tags}]")
+                self._out.write(f"Currently playing: {video.title} ({video.video_id}) [{tags}]")
 
+    @_flushes_output
     def create_playlist(self, playlist_name):
         """Creates a playlist with a given name.
 
         Args:
             playlist_name: The playlist name.
         """
-        unique = True
-        if self.playlists:
-            for i in range(len(self.playlists)):
-                if playlist_name.upper() == self.playlists[i].name.upper():
-                    unique = False
-
-        if unique:
-            new_playlist = Playlist(playlist_name)
-            self.playlists.append(new_playlist)
-            print(f"Successfully created new playlist: {playlist_name}")
+        if self._session.playlists.create(playlist_name) is not None:
+            self._record("create_playlist", playlist_name)
+            self._out.write(f"Successfully created new playlist: {playlist_name}")
         else:
-            print("Cannot create playlist: A playlist with the same name already exists")
+            self._out.write("Cannot create playlist: A playlist with the same name already exists")
 
+    @_flushes_output
     def add_to_playlist(self, playlist_name, video_id):
         """Adds a video to a playlist with a given name.
 
@@ -136,63 +246,79 @@ class VideoPlayer:
             playlist_name: The playlist name.
             video_id: The video_id to be added.
         """
-        found = False
-        for i in range(len(self.playlists)):
-            if playlist_name.upper() == self.playlists[i].name.upper():
-                found = True
-                new_video = self._video_library.get_video(video_id)
-                if new_video is None:
-                    print(f"Cannot add video to {playlist_name}: Video does not exist")
-                else:
-                    if new_video.flagged:
-                        print(
-                            f"Cannot add video to {playlist_name}: Video is currently flagged (reason: {new_video.flag_reason})")
-                    else:
-                        video = self.playlists[i].get_video(video_id)
-                        if video is not None:
-                            print(f"Cannot add video to {playlist_name}: Video already added")
-                        else:
-                            self.playlists[i].videos[video_id] = new_video
-                            print(f"Added video to {playlist_name}: {new_video.title}")
-        if not found:
-            print(f"Cannot add video to {playlist_name}: Playlist does not exist")
+        playlist = self._session.playlists.get(playlist_name)
+        if playlist is None:
+            self._out.write(f"Cannot add video to {playlist_name}: Playlist does not exist")
+            return
+        new_video = self._video_library.get_video(video_id)
+        flag_reason = new_video.flag_state if new_video is not None else None
+        if new_video is None:
+            self._out.write(f"Cannot add video to {playlist_name}: Video does not exist")
+        elif flag_reason is not None:
+            self._out.write(
+                f"Cannot add video to {playlist_name}: Video is currently flagged (reason: {flag_reason})")
+        elif playlist.get_video(video_id) is not None:
+            self._out.write(f"Cannot add video to {playlist_name}: Video already added")
+        else:
+            playlist.add_video(new_video)
+            self._record("add_to_playlist", playlist_name, video_id)
+            self._out.write(f"Added video to {playlist_name}: {new_video.title}")
 
+    @_flushes_output
     def show_all_playlists(self):
         """Display all playlists."""
-        all_playlists = self.playlists
-        if not all_playlists:
-            print("No playlists exist yet")
+        if not self._session.playlists:
+            self._out.write("No playlists exist yet")
             return
-        else:
-            all_playlists.sort(key=lambda x: x.name)
 
-            print("Showing all playlists:")
-            for i in range(len(all_playlists)):
-                print(all_playlists[i].name)
+        self._out.write("Showing all playlists:")
+        for playlist in self._session.playlists:
+            self._out.write(playlist.name)
 
+    @_flushes_output
     def show_playlist(self, playlist_name):
         """Display all videos in a playlist with a given name.
 
         Args:
             playlist_name: The playlist name.
         """
-        for i in range(len(self.playlists)):
-            if playlist_name.upper() == self.playlists[i].name.upper():
-                print(f"Showing playlist: {playlist_name}")
-                if len(self.playlists[i].videos) == 0:
-                    print("No videos here yet")
-                else:
-                    video_list = self.playlists[i].get_videos()
-                    for j in range(len(self.playlists[i].videos)):
-                        tags = (" ".join(video_list[j].tags))
-                        if video_list[j].flagged:
-                            print(f"{video_list[j].title} ({video_list[j].video_id}) [{tags}] "
-                                  f"- FLAGGED (reason: {video_list[j].flag_reason})")
-                        else:
-                            print(f"{video_list[j].title} ({video_list[j].video_id}) [{tags}]")
-                return
-        print(f"Cannot show playlist {playlist_name}: Playlist does not exist")
+        playlist = self._session.playlists.get(playlist_name)
+        if playlist is None:
+            self._out.write(f"Cannot show playlist {playlist_name}: Playlist does not exist")
+            return
 
+        self._out.write(f"Showing playlist: {playlist_name}")
+        if len(playlist.videos) == 0:
+            self._out.write("No videos here yet")
+        for video in playlist.videos.values():
+            self._write_video(video)
+
+    @_flushes_output
+    def show_playlist_page(self, playlist_name, limit, cursor=None):
+        """Display one page of the videos in a playlist with a given name.
+
+        Args:
+            playlist_name: The playlist name.
+            limit: The most videos to show.
+            cursor: The cursor the previous page ended with, if any.
+        """
+        playlist = self._session.playlists.get(playlist_name)
+        if playlist is None:
+            self._out.write(f"Cannot show playlist {playlist_name}: Playlist does not exist")
+            return
+        page_size = self._positive_number(limit)
+        if page_size is None:
+            self._out.write(f"Cannot show playlist {playlist_name}: Page size must be a positive number")
+            return
+        try:
+            videos, next_cursor = playlist.page(page_size, cursor)
+        except ValueError:
+            self._out.write(f"Cannot show playlist {playlist_name}: Invalid cursor")
+            return
+        self._out.write(f"Showing playlist: {playlist_name}")
+        self._write_page(videos, next_cursor)
+
+    @_flushes_output
     def remove_from_playlist(self, playlist_name, video_id):
         """Removes a video to a playlist with a given name.
 
@@ -200,121 +326,179 @@ class VideoPlayer:
             playlist_name: The playlist name.
             video_id: The video_id to be removed.
         """
-        found = False
-        for i in range(len(self.playlists)):
-            if playlist_name.upper() == self.playlists[i].name.upper():
-                found = True
-                video_to_remove = self._video_library.get_video(video_id)
-                if video_to_remove is None:
-                    print(f"Cannot remove video from {playlist_name}: Video does not exist")
-                else:
-                    video = self.playlists[i].get_video(video_id)
-                    if video is None:
-                        print(f"Cannot remove video from {playlist_name}: Video is not in playlist")
-                    else:
-                        del self.playlists[i].videos[video_id]
-                        print(f"Removed video from {playlist_name}: {video.title}")
-        if not found:
-            print(f"Cannot remove video from {playlist_name}: Playlist does not exist")
+        playlist = self._session.playlists.get(playlist_name)
+        if playlist is None:
+            self._out.write(f"Cannot remove video from {playlist_name}: Playlist does not exist")
+        elif self._video_library.get_video(video_id) is None:
+            self._out.write(f"Cannot remove video from {playlist_name}: Video does not exist")
+        else:
+            video = playlist.get_video(video_id)
+            if video is None:
+                self._out.write(f"Cannot remove video from {playlist_name}: Video is not in playlist")
+            else:
+                playlist.remove_video(video_id)
+                self._record("remove_from_playlist", playlist_name, video_id)
+                self._out.write(f"Removed video from {playlist_name}: {video.title}")
 
+    @_flushes_output
     def clear_playlist(self, playlist_name):
         """Removes all videos from a playlist with a given name.
 
         Args:
             playlist_name: The playlist name.
         """
-        found = False
-        for i in range(len(self.playlists)):
-            if playlist_name.upper() == self.playlists[i].name.upper():
-                found = True
-                self.playlists[i].videos.clear()
-                print(f"Successfully removed all videos from {playlist_name}")
-        if not found:
-            print(f"Cannot clear playlist {playlist_name}: Playlist does not exist")
+        playlist = self._session.playlists.get(playlist_name)
+        if playlist is None:
+            self._out.write(f"Cannot clear playlist {playlist_name}: Playlist does not exist")
+        else:
+            playlist.clear()
+            self._record("clear_playlist", playlist_name)
+            self._out.write(f"Successfully removed all videos from {playlist_name}")
 
+    @_flushes_output
     def delete_playlist(self, playlist_name):
         """Deletes a playlist with a given name.
 
         Args:
             playlist_name: The playlist name.
         """
-        found = False
-        for i in range(len(self.playlists)):
-            if playlist_name.upper() == self.playlists[i].name.upper():
-                found = True
-                self.playlists.pop(i)
-                print(f"Deleted playlist: {playlist_name}")
-        if not found:
-            print(f"Cannot delete playlist {playlist_name}: Playlist does not exist")
+        if self._session.playlists.delete(playlist_name) is None:
+            self._out.write(f"Cannot delete playlist {playlist_name}: Playlist does not exist")
+        else:
+            self._record("delete_playlist", playlist_name)
+            self._out.write(f"Deleted playlist: {playlist_name}")
 
+    @_flushes_output
     def search_videos(self, search_term):
         """Display all the videos whose titles contain the search_term.
 
         Args:
             search_term: The query to be used in search.
         """
-        video_list = self._video_library.get_all_videos()
-        video_list.sort(key=lambda x: x.title)
-        results = 0
-        counter = 0
-
-        for i in range(len(video_list)):
-            tags = (" ".join(video_list[i].tags))
-            if search_term.upper() in video_list[i].title.upper():
-                results += 1
-                if results == 1:
-                    print(f"Here are the results for {search_term}:")
-                if not video_list[i].flagged:
-                    print(f"{counter + 1}) {video_list[i].title} ({video_list[i].video_id}) [{tags}]")
-                    counter += 1
-
-        if results > 0:
-            print("Would you like to play any of the above? If yes, specify the number of the video.")
-            print("If your answer is not a valid number, we will assume it's a no.")
-            inp = input()
-            try:
-                choice = int(inp)
-                if 0 < choice <= results:
-                    self.play_video(video_list[choice - 1].video_id)
-            except:
-                pass
-        else:
-            print(f"No search results for {search_term}")
+        self._show_search_results(
+            search_term, self._video_library.iter_videos_matching(search_term))
 
+    @_flushes_output
     def search_videos_tag(self, video_tag):
         """Display all videos whose tags contains the provided tag.
 
         Args:
             video_tag: The video tag to be used in search.
         """
-        video_list = self._video_library.get_all_videos()
-        video_list.sort(key=lambda x: x.title)
+        self._show_search_results(
+            video_tag, self._video_library.iter_videos_with_tag(video_tag))
+
+    @_flushes_output
+    def search_videos_ranked(self, search_term, k=DEFAULT_TOP_K):
+        """Display the k videos most relevant to search_term.
+
+        Videos whose title starts with the term or which carry it as a tag
+        rank first. See VideoLibrary.search_ranked.
+
+        Args:
+            search_term: The query to be used in search.
+            k: The most results to show.
+        """
+        top_k = self._positive_number(k)
+        if top_k is None:
+            self._out.write("Cannot search videos: Number of results must be a positive number")
+            return
+        self._show_search_results(
+            search_term, self._video_library.search_ranked(search_term, top_k))
+
+    @_flushes_output
+    def search_videos_fuzzy(self, search_term, k=DEFAULT_TOP_K):
+        """Display up to k videos matching search_term despite typos.
+
+        Args:
+            search_term: The possibly misspelled title word or tag.
+            k: The most results to show.
+        """
+        top_k = self._positive_number(k)
+        if top_k is None:
+            self._out.write("Cannot search videos: Number of results must be a positive number")
+            return
+        self._show_search_results(
+            search_term, self._video_library.search_fuzzy(search_term, top_k))
+
+    @_flushes_output
+    def query_videos(self, *query_terms):
+        """Display the first videos matching a boolean query, by title.
+
+        Matching videos are shown whether flagged or not. See
+        VideoLibrary.query for the syntax.
+
+        Args:
+            query_terms: The words of the query, such as "#cat", "AND",
+                "NOT" and "FLAGGED".
+        """
+        query = " ".join(query_terms)
+        try:
+            count, videos = self._video_library.query(query, DEFAULT_TOP_K)
+        except ValueError as error:
+            self._out.write(f"Cannot run query: {error}")
+            return
+        if not count:
+            self._out.write(f"No query results for {query}")
+            return
+        if count > len(videos):
+            self._out.write(f"Here are the first {len(videos)} of {count} "
+                            f"results for {query}:")
+        else:
+            self._out.write(f"Here are the results for {query}:")
+        for video in videos:
+            self._write_video(video)
+
+    def _show_search_results(self, query, videos):
+        """Lists the playable videos and offers to play one of them.
+
+        Args:
+            query: The search term or tag, as the user typed it.
+            videos: The matching videos, in title order.
+        """
         results = 0
-        counter = 0
-
-        for i in range(len(video_list)):
-            tags = (" ".join(video_list[i].tags))
-            for tag in video_list[i].tags:
-                if video_tag.upper() == tag.upper():
-                    results += 1
-                    if results == 1:
-                        print(f"Here are the results for {video_tag}:")
-                    if not video_list[i].flagged:
-                        print(f"{counter + 1}) {video_list[i].title} ({video_list[i].video_id}) [{tags}]")
-                        counter += 1
+        playable = []
+        for video in videos:
+            results += 1
+            if results == 1:
+                self._out.write(f"Here are the results for {query}:")
+            if not video.flagged:
+                tags = (" ".join(video.tags))
+                playable.append(video)
+                self._out.write(f"{len(playable)}) {video.title} ({video.video_id}) [{tags}]")
+
         if results > 0:
-            print("Would you like to play any of the above? If yes, specify the number of the video.")
-            print("If your answer is not a valid number, we will assume it's a no.")
-            inp = input()
-            try:
-                choice = int(inp)
-                if 0 < choice <= results:
-                    self.play_video(video_list[choice - 1].video_id)
-            except:
-                pass
+            self._out.write("Would you like to play any of the above? If yes, specify the number of the video.")
+            self._out.write("If your answer is not a valid number, we will assume it's a no.")
+            self._out.flush()
+            if self._defer_answers:
+                self._session.pending_choice = playable
+            else:
+                self._play_choice(self._read_answer(), playable)
         else:
-            print(f"No search results for {video_tag}")
+            self._out.write(f"No search results for {query}")
 
+    def _play_choice(self, answer, playable):
+        try:
+            choice = int(answer)
+        except ValueError:
+            return
+        if 0 < choice <= len(playable):
+            self.play_video(playable[choice - 1].video_id)
+
+    @_flushes_output
+    def answer_search(self, answer):
+        """Plays the video the user picked from a deferred search.
+
+        Args:
+            answer: The user's answer, a video number or anything else
+                for no.
+        """
+        playable, self._session.pending_choice = self._session.pending_choice, None
+        if playable is not None:
+            self._play_choice(answer, playable)
+
+    @_flushes_output
     def flag_video(self, video_id, flag_reason=""):
         """Mark a video as flagged.
 
@@ -322,35 +506,34 @@ class VideoPlayer:
             video_id: The video_id to be flagged.
             flag_reason: Reason for flagging the video.
         """
-        if self._video_library.get_video(video_id) is None:
-            print(f"Cannot flag video: Video does not exist")
+        video = self._video_library.get_video(video_id)
+        if video is None:
+            self._out.write("Cannot flag video: Video does not exist")
+        elif video.flagged:
+            self._out.write("Cannot flag video: Video is already flagged")
         else:
-            if self._video_library.get_video(video_id).flagged:
-                print(f"Cannot flag video: Video is already flagged")
-            else:
-                if self.video_playing:
-                    if self.video_playing.video_id == self._video_library.get_video(video_id).video_id:
-                        self.stop_video()
-                self._video_library.get_video(video_id).flagged = True
-                if flag_reason == "":
-                    self._video_library.get_video(video_id).flag_reason = "Not supplied"
-                else:
-                    self._video_library.get_video(video_id).flag_reason = flag_reason
-                print(f"Successfully flagged video: {self._video_library.get_video(video_id).title} "
-                      f"(reason: {self._video_library.get_video(video_id).flag_reason})")
-
+            if self._session.video_playing is not None and self._session.video_playing.video_id == video_id:
+                self.stop_video()
+            if flag_reason == "":
+                flag_reason = "Not supplied"
+            self._video_library.flag_video(video_id, flag_reason)
+            self._record("flag", video_id, flag_reason)
+            self._out.write(f"Successfully flagged video: {video.title} "
+                            f"(reason: {flag_reason})")
+
+    @_flushes_output
     def allow_video(self, video_id):
         """Removes a flag from a video.
 
         Args:
             video_id: The video_id to be allowed again.
         """
-        if self._video_library.get_video(video_id) is None:
-            print(f"Cannot remove flag from video: Video does not exist")
+        video = self._video_library.get_video(video_id)
+        if video is None:
+            self._out.write("Cannot remove flag from video: Video does not exist")
+        elif not video.flagged:
+            self._out.write("Cannot remove flag from video: Video is not flagged")
         else:
-            if not self._video_library.get_video(video_id).flagged:
-                print(f"Cannot remove flag from video: Video is not flagged")
-            else:
-                self._video_library.get_video(video_id).flagged = False
-                self._video_library.get_video(video_id).flag_reason = ""
-                print(f"Successfully removed flag from video: {self._video_library.get_video(video_id).title}")
+            self._video_library.allow_video(video_id)
+            self._record("allow", video_id)
+            self._out.write(f"Successfully removed flag from video: {video.title}")
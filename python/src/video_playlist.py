@@ -1,12 +1,27 @@
 """A video playlist class."""
 
+from .page_cursor import decode_cursor
+from .page_cursor import encode_cursor
+import array
+import bisect
+
 
 class Playlist:
-    """A class used to represent a Playlist."""
+    """A class used to represent a Playlist.
+
+    Every added video gets the next sequence number. The ids are also kept
+    in a list in sequence order, with None where a video was removed, so a
+    page can start after any sequence number without walking the videos
+    before it.
+    """
 
     def __init__(self, playlist_name):
         self._name = playlist_name
         self._videos = {}
+        self._sequences = array.array("Q")
+        self._ids = []
+        self._slots = {}
+        self._next_sequence = 0
 
     @property
     def name(self) -> str:
@@ -20,7 +35,69 @@ class Playlist:
 
     def get_videos(self):
         """Returns all available video information from the playlist."""
-        return list(self._videos.values())
+        return list(self.videos.values())
+
+    def add_video(self, video):
+        """Appends video to the end of the playlist."""
+        self._videos[video.video_id] = video
+        self._slots[video.video_id] = len(self._ids)
+        self._ids.append(video.video_id)
+        self._sequences.append(self._next_sequence)
+        self._next_sequence += 1
+
+    def remove_video(self, video_id):
+        """Removes the video with video_id from the playlist."""
+        del self._videos[video_id]
+        self._ids[self._slots.pop(video_id)] = None
+        if len(self._ids) > 2 * len(self._slots) + 16:
+            self._compact()
+
+    def _compact(self):
+        # Sequence numbers are kept, so cursors handed out stay valid.
+        kept = [slot for slot, video_id in enumerate(self._ids)
+                if video_id is not None]
+        self._sequences = array.array(
+            "Q", (self._sequences[slot] for slot in kept))
+        self._ids = [self._ids[slot] for slot in kept]
+        self._slots = {video_id: slot
+                       for slot, video_id in enumerate(self._ids)}
+
+    def clear(self):
+        """Removes every video from the playlist."""
+        self._videos.clear()
+        self._sequences = array.array("Q")
+        self._ids = []
+        self._slots = {}
+
+    def page(self, limit, cursor=None):
+        """Returns one page of the videos, in the order they were added.
+
+        Args:
+            limit: The most videos on the page.
+            cursor: Where the page starts, as returned for the previous
+                page. None starts at the first video.
+
+        Returns:
+            A list of the Videos on the page and the cursor of the next
+            page, which is None if this is the last one.
+
+        Raises:
+            ValueError: If cursor is not a cursor this method returned.
+        """
+        slot = 0
+        if cursor is not None:
+            (after,) = decode_cursor(cursor, int)
+            slot = bisect.bisect_right(self._sequences, after)
+        videos = []
+        for slot in range(slot, len(self._ids)):
+            video_id = self._ids[slot]
+            if video_id is None:
+                continue
+            if len(videos) == limit:
+                return videos, encode_cursor(self._sequences[last])
+            videos.append(self._videos[video_id])
+            last = slot
+        return videos, None
 
     def get_video(self, video_id):
         """Returns the video object (title, url, tags) from the playlist.
@@ -32,7 +109,4 @@ class Playlist:
             The Video object for the requested video_id. None if the video
             does not exist.
         """
-        return self._videos.get(video_id, None)
-
-
-
+        return self.videos.get(video_id, None)
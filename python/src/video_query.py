@@ -0,0 +1,140 @@
+"""Boolean video query functions."""
+
+import re
+import zlib
+
+# Parentheses are tokens of their own even when written against a term.
+_TOKEN = re.compile(r"[()]|[^\s()]+")
+_NONZERO_BYTE = re.compile(rb"[^\x00]")
+_KEYWORDS = ("AND", "OR", "NOT", "(", ")")
+
+
+def parse_query(text):
+    """Parses a boolean query over tags, title terms and the flagged state.
+
+    The grammar, with keywords in any case, is:
+
+        query := and ("OR" and)*
+        and   := not ("AND"? not)*
+        not   := "NOT" not | "(" query ")" | term
+        term  := "#tag" | "FLAGGED" | word
+
+    A word matches the titles containing it, as SEARCH_VIDEOS does. Terms
+    written side by side must all match.
+
+    Returns:
+        The query as nested tuples: ("or", left, right), ("and", left,
+        right), ("not", operand), ("tag", tag), ("title", word) and
+        ("flagged",).
+
+    Raises:
+        ValueError: If text is not a query.
+    """
+    tokens = _TOKEN.findall(text)
+    if not tokens:
+        raise ValueError("Query is empty")
+    position, node = _parse_or(tokens, 0)
+    if position != len(tokens):
+        raise ValueError(f"Unexpected {tokens[position]}")
+    return node
+
+
+def _peek(tokens, position):
+    return tokens[position].upper() if position < len(tokens) else None
+
+
+def _parse_or(tokens, position):
+    position, node = _parse_and(tokens, position)
+    while _peek(tokens, position) == "OR":
+        position, right = _parse_and(tokens, position + 1)
+        node = ("or", node, right)
+    return position, node
+
+
+def _parse_and(tokens, position):
+    position, node = _parse_not(tokens, position)
+    while _peek(tokens, position) not in (None, "OR", ")"):
+        if _peek(tokens, position) == "AND":
+            position += 1
+        position, right = _parse_not(tokens, position)
+        node = ("and", node, right)
+    return position, node
+
+
+def _parse_not(tokens, position):
+    token = _peek(tokens, position)
+    if token is None:
+        raise ValueError("Query ends too early")
+    if token == "NOT":
+        position, operand = _parse_not(tokens, position + 1)
+        return position, ("not", operand)
+    if token == "(":
+        position, node = _parse_or(tokens, position + 1)
+        if _peek(tokens, position) != ")":
+            raise ValueError("Missing )")
+        return position + 1, node
+    if token in _KEYWORDS:
+        raise ValueError(f"Unexpected {tokens[position]}")
+    if token == "FLAGGED":
+        return position + 1, ("flagged",)
+    if token.startswith("#"):
+        return position + 1, ("tag", tokens[position])
+    return position + 1, ("title", tokens[position])
+
+
+def evaluate_query(node, term_bitmap, universe):
+    """Returns the bitmap of the ordinals matching a parsed query.
+
+    Bitmaps are ints with bit n set for ordinal n, so they are combined a
+    machine word at a time.
+
+    Args:
+        node: A query returned by parse_query.
+        term_bitmap: A function returning the bitmap of a term node.
+        universe: The bitmap of every ordinal, which NOT is taken within.
+    """
+    kind = node[0]
+    if kind == "or":
+        return (evaluate_query(node[1], term_bitmap, universe)
+                | evaluate_query(node[2], term_bitmap, universe))
+    if kind == "and":
+        return (evaluate_query(node[1], term_bitmap, universe)
+                & evaluate_query(node[2], term_bitmap, universe))
+    if kind == "not":
+        return universe & ~evaluate_query(node[1], term_bitmap, universe)
+    return term_bitmap(node)
+
+
+def bitmap(ordinals, size):
+    """Returns the bitmap of ordinals, which are all below size."""
+    data = bytearray((size + 7) >> 3)
+    for ordinal in ordinals:
+        data[ordinal >> 3] |= 1 << (ordinal & 7)
+    return int.from_bytes(data, "little")
+
+
+def bitmap_bytes(bits, size):
+    """Returns bits as little endian bytes, to test ordinals in O(1)."""
+    return bits.to_bytes((size + 7) >> 3, "little")
+
+
+def bitmap_ordinals(bits, size):
+    """Yields the ordinals set in bits in increasing order."""
+    data = bitmap_bytes(bits, size)
+    for match in _NONZERO_BYTE.finditer(data):
+        base = match.start() << 3
+        byte = data[match.start()]
+        for bit in range(8):
+            if byte >> bit & 1:
+                yield base + bit
+
+
+def compress_bitmap(bits):
+    """Returns bits zlib compressed, which is small for sparse bitmaps."""
+    return zlib.compress(bits.to_bytes((bits.bit_length() + 7) >> 3,
+                                       "little"), 1)
+
+
+def decompress_bitmap(data):
+    """Returns the bitmap compress_bitmap compressed."""
+    return int.from_bytes(zlib.decompress(data), "little")
@@ -0,0 +1,118 @@
+import pytest
+
+from src.command_parser import CommandParser
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+from src.video_query import bitmap
+from src.video_query import bitmap_ordinals
+from src.video_query import compress_bitmap
+from src.video_query import decompress_bitmap
+from src.video_query import parse_query
+
+
+def _write_catalog(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text(
+        "Funny Dogs | funny_dogs_video_id | #dog , #animal\n"
+        "Amazing Cats | amazing_cats_video_id | #cat , #animal\n"
+        "Cats at Home | cats_home_video_id |\n"
+        "Bobcats | bobcats_video_id | #wild , #animal\n"
+        "Life at Google | life_at_google_video_id | #google , #career\n")
+    return path
+
+
+def _ids(result):
+    count, videos = result
+    return count, [video.video_id for video in videos]
+
+
+def test_parse_query_precedence():
+    assert parse_query("#a b OR NOT (c and #D)") == (
+        "or", ("and", ("tag", "#a"), ("title", "b")),
+        ("not", ("and", ("title", "c"), ("tag", "#D"))))
+    assert parse_query("flagged or(x)") == (
+        "or", ("flagged",), ("title", "x"))
+    for query, message in [("", "Query is empty"), ("(a", "Missing )"),
+                           ("a )", "Unexpected )"),
+                           ("NOT", "Query ends too early"),
+                           ("a OR AND b", "Unexpected AND")]:
+        with pytest.raises(ValueError) as error:
+            parse_query(query)
+        assert str(error.value) == message
+
+
+def test_bitmaps_round_trip():
+    bits = bitmap([0, 7, 8, 999], 1000)
+    assert list(bitmap_ordinals(bits, 1000)) == [0, 7, 8, 999]
+    assert decompress_bitmap(compress_bitmap(bits)) == bits
+    assert list(bitmap_ordinals(0, 1000)) == []
+
+
+def test_query_combines_tags_titles_and_flags(tmp_path):
+    library = VideoLibrary(_write_catalog(tmp_path))
+    assert _ids(library.query("#animal AND NOT cats", 10)) == (
+        1, ["funny_dogs_video_id"])
+    assert _ids(library.query("#CAT OR #wild", 10)) == (
+        2, ["amazing_cats_video_id", "bobcats_video_id"])
+    assert _ids(library.query("at NOT #animal", 1)) == (
+        2, ["cats_home_video_id"])
+    assert _ids(library.query("#horse", 10)) == (0, [])
+    library.flag_video("bobcats_video_id", "dont_like_cats")
+    assert _ids(library.query("flagged", 10)) == (1, ["bobcats_video_id"])
+    assert _ids(library.query("cats and not flagged", 10)) == (
+        2, ["amazing_cats_video_id", "cats_home_video_id"])
+    library.allow_video("bobcats_video_id")
+    assert _ids(library.query("flagged", 10)) == (0, [])
+
+
+def test_query_sees_reloads(tmp_path):
+    path = _write_catalog(tmp_path)
+    library = VideoLibrary(path)
+    assert _ids(library.query("#animal and cats", 10))[0] == 2
+    assert _ids(library.query("NOT #animal", 10))[0] == 2
+    path.write_text(
+        "Funny Dogs | funny_dogs_video_id | #dog , #animal\n"
+        "Amazing Cats | amazing_cats_video_id | #cat\n"
+        "Lazy Cats | lazy_cats_video_id | #cat , #animal\n")
+    library.reload(force=True)
+    assert _ids(library.query("#animal and cats", 10)) == (
+        1, ["lazy_cats_video_id"])
+    assert _ids(library.query("NOT #animal", 10)) == (
+        1, ["amazing_cats_video_id"])
+
+
+def test_query_keeps_flags_of_changed_rows(tmp_path):
+    path = _write_catalog(tmp_path)
+    library = VideoLibrary(path)
+    library.flag_video("amazing_cats_video_id", "dont_like_cats")
+    assert _ids(library.query("FLAGGED", 10)) == (
+        1, ["amazing_cats_video_id"])
+    path.write_text(path.read_text().replace("Amazing Cats", "Amazing Kittens"))
+    library.reload(force=True)
+    assert _ids(library.query("FLAGGED", 10)) == (
+        1, ["amazing_cats_video_id"])
+    assert _ids(library.query("NOT FLAGGED", 10))[0] == 4
+    assert _ids(library.query("kittens", 10)) == (
+        1, ["amazing_cats_video_id"])
+
+
+def test_query_videos_command(capfd):
+    player = VideoPlayer()
+    parser = CommandParser(player)
+    parser.execute_command(["QUERY_VIDEOS", "#animal", "AND", "NOT", "#dog"])
+    parser.execute_command(["FLAG_VIDEO", "amazing_cats_video_id"])
+    parser.execute_command(["QUERY_VIDEOS", "FLAGGED"])
+    parser.execute_command(["QUERY_VIDEOS", "#horse"])
+    parser.execute_command(["QUERY_VIDEOS", "(#cat"])
+    out, err = capfd.readouterr()
+    assert out.splitlines() == [
+        "Here are the results for #animal AND NOT #dog:",
+        "Amazing Cats (amazing_cats_video_id) [#cat #animal]",
+        "Another Cat Video (another_cat_video_id) [#cat #animal]",
+        "Successfully flagged video: Amazing Cats (reason: Not supplied)",
+        "Here are the results for FLAGGED:",
+        "Amazing Cats (amazing_cats_video_id) [#cat #animal] - FLAGGED "
+        "(reason: Not supplied)",
+        "No query results for #horse",
+        "Cannot run query: Missing )",
+    ]
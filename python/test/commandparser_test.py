@@ -0,0 +1,59 @@
+import pytest
+
+from src.command_parser import Command
+from src.command_parser import CommandException
+from src.command_parser import CommandParser
+from src.video_player import VideoPlayer
+
+
+def test_dispatches_verbs_ignoring_case(capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.execute_command(["play", "amazing_cats_video_id"])
+    parser.execute_command(["FLAG_VIDEO", "funny_dogs_video_id"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines == [
+        "Playing video: Amazing Cats",
+        "Successfully flagged video: Funny Dogs (reason: Not supplied)",
+    ]
+
+
+def test_rejects_wrong_number_of_arguments():
+    parser = CommandParser(VideoPlayer())
+    with pytest.raises(CommandException, match="followed by video_id"):
+        parser.execute_command(["PLAY"])
+    with pytest.raises(CommandException, match="optional flag reason"):
+        parser.execute_command(["FLAG_VIDEO", "a", "b", "c"])
+    with pytest.raises(CommandException, match="valid command"):
+        parser.execute_command([])
+
+
+def test_unknown_verb(capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.execute_command(["REWIND"])
+    out, err = capfd.readouterr()
+    assert "Please enter a valid command" in out
+
+
+def test_register_plugin_command(capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.register(Command("ECHO", lambda *words: print(" ".join(words)),
+                            "ECHO <words>", "Prints the words.", (1, 2)))
+    parser.execute_command(["ECHO", "hello", "there"])
+    parser.execute_command(["HELP"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[0] == "hello there"
+    assert "    ECHO <words> - Prints the words." in lines
+
+
+def test_variadic_command_takes_any_number_of_arguments(capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.register(Command("ECHO", lambda *words: print(" ".join(words)),
+                            "ECHO <words>", "Prints the words.",
+                            usage="Please enter some words.", min_args=1))
+    parser.execute_command(["ECHO"] + ["word"] * 100)
+    with pytest.raises(CommandException, match="some words"):
+        parser.execute_command(["ECHO"])
+    out, err = capfd.readouterr()
+    assert out.splitlines() == [" ".join(["word"] * 100)]
@@ -0,0 +1,55 @@
+import json
+
+from src.command_parser import CommandParser
+from src.command_stats import CommandStats
+from src.command_stats import LatencyHistogram
+from src.video_player import VideoPlayer
+
+
+def test_histogram_percentiles_stay_within_error():
+    histogram = LatencyHistogram(significant_bits=6)
+    for value in range(1, 100_001):
+        histogram.record(value)
+    assert histogram.count == 100_000
+    assert histogram.max == 100_000
+    for fraction in (0.5, 0.95, 0.99, 1.0):
+        exact = 100_000 * fraction
+        assert exact <= histogram.percentile(fraction) <= exact * (1 + 1 / 32)
+    assert LatencyHistogram().percentile(0.5) == 0
+
+
+def test_histogram_counts_small_values_exactly():
+    histogram = LatencyHistogram(significant_bits=6)
+    for value in (0, 3, 3, 63, 64, 65):
+        histogram.record(value)
+    assert list(histogram.buckets()) == [(0, 1), (3, 2), (63, 1), (65, 2)]
+    assert histogram.percentile(0.5) == 3
+
+
+def test_stats_command_reports_calls(capfd, tmp_path):
+    stats = CommandStats()
+    parser = CommandParser(VideoPlayer(), stats=stats)
+    parser.execute_command(["STATS"])
+    parser.execute_command(["PLAY", "amazing_cats_video_id"])
+    parser.execute_command(["PLAY", "funny_dogs_video_id"])
+    parser.execute_command(["STATS"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[0] == "No commands have been run yet"
+    assert lines[4] == "Command statistics:"
+    assert lines[5].startswith("    PLAY - 2 calls, p50 ")
+    assert lines[6].startswith("    STATS - 1 calls, p50 ")
+    assert len(lines) == 7
+
+    stats.export(tmp_path / "stats.json")
+    exported = json.loads((tmp_path / "stats.json").read_text())
+    assert sorted(exported) == ["PLAY", "STATS"]
+    assert exported["PLAY"]["calls"] == 2
+    assert sum(count for _, count in exported["PLAY"]["histogram_ns"]) == 2
+
+
+def test_stats_command_without_stats(capfd):
+    parser = CommandParser(VideoPlayer())
+    parser.execute_command(["STATS"])
+    out, err = capfd.readouterr()
+    assert out == "Command statistics are not being collected\n"
@@ -0,0 +1,49 @@
+from src.command_parser import CommandParser
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def test_fuzzy_search_tolerates_typos():
+    library = VideoLibrary()
+    assert [video.title for video in library.search_fuzzy("Amzing", 10)] == [
+        "Amazing Cats"]
+    assert [video.title for video in library.search_fuzzy("#animl", 2)] == [
+        "Amazing Cats", "Another Cat Video"]
+    # Exact matches come first, then "at" is one edit away.
+    assert [video.title for video in library.search_fuzzy("cat", 10)] == [
+        "Amazing Cats", "Another Cat Video", "Life at Google"]
+    assert library.search_fuzzy("xyzzy", 10) == []
+
+
+def test_fuzzy_search_skips_flagged_and_sees_reloads(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text("Amazing Cats | amazing_cats_video_id | #cat\n"
+                    "Amazing Dogs | amazing_dogs_video_id | #dog\n")
+    library = VideoLibrary(path)
+    library.flag_video("amazing_dogs_video_id", "dont_like_dogs")
+    assert [video.title for video in library.search_fuzzy("amazng", 10)] == [
+        "Amazing Cats"]
+
+    path.write_text("Amazing Cats | amazing_cats_video_id | #cat\n"
+                    "Amusing Birds | amusing_birds_video_id | #bird\n")
+    library.reload(force=True)
+    assert [video.title for video in library.search_fuzzy("brds", 10)] == [
+        "Amusing Birds"]
+    assert [video.title for video in library.search_fuzzy("amusng", 10)] == [
+        "Amusing Birds"]
+    assert library.search_fuzzy("dgos", 10) == []
+
+
+def test_search_videos_fuzzy_command(capfd):
+    parser = CommandParser(VideoPlayer(read_answer=lambda: "no"))
+    parser.execute_command(["SEARCH_VIDEOS_FUZZY", "gogle"])
+    parser.execute_command(["SEARCH_VIDEOS_FUZZY", "xyzzy"])
+    out, err = capfd.readouterr()
+    assert out.splitlines() == [
+        "Here are the results for gogle:",
+        "1) Life at Google (life_at_google_video_id) [#google #career]",
+        "Would you like to play any of the above? If yes, specify the "
+        "number of the video.",
+        "If your answer is not a valid number, we will assume it's a no.",
+        "No search results for xyzzy",
+    ]
@@ -0,0 +1,72 @@
+from src.output_sink import FLUSH_THRESHOLD
+from src.output_sink import MemorySink
+from src.output_sink import StdoutSink
+from src.video_player import VideoPlayer
+
+
+def test_memory_sink_collects_player_output():
+    sink = MemorySink()
+    player = VideoPlayer(output=sink)
+    player.play_video("amazing_cats_video_id")
+    player.show_playing()
+    assert sink.getvalue() == (
+        "Playing video: Amazing Cats\n"
+        "Currently playing: Amazing Cats (amazing_cats_video_id) "
+        "[#cat #animal]\n")
+    assert sink.take() == [
+        "Playing video: Amazing Cats",
+        "Currently playing: Amazing Cats (amazing_cats_video_id) "
+        "[#cat #animal]"]
+    assert sink.take() == []
+
+
+def test_memory_sink_hides_unflushed_lines():
+    sink = MemorySink()
+    sink.write("partial")
+    assert sink.getvalue() == ""
+    sink.flush()
+    assert sink.take() == ["partial"]
+
+
+def test_search_flushes_prompt_before_reading_answer():
+    sink = MemorySink()
+    seen = []
+    player = VideoPlayer(read_answer=lambda: seen.extend(sink.take()) or "1",
+                         output=sink)
+    player.search_videos("dogs")
+    assert seen[-1] == ("If your answer is not a valid number, we will "
+                        "assume it's a no.")
+    assert sink.take() == ["Playing video: Funny Dogs"]
+
+
+def test_stdout_sink_writes_once_per_flush(capfd):
+    sink = StdoutSink()
+    sink.write("first")
+    sink.write("second")
+    out, err = capfd.readouterr()
+    assert out == ""
+    sink.flush()
+    out, err = capfd.readouterr()
+    assert out == "first\nsecond\n"
+
+
+def test_stdout_sink_flushes_long_output_on_its_own(capfd):
+    sink = StdoutSink()
+    line = "x" * 1023
+    for _ in range(FLUSH_THRESHOLD // 1024):
+        sink.write(line)
+    out, err = capfd.readouterr()
+    assert out == (line + "\n") * (FLUSH_THRESHOLD // 1024)
+    sink.write("last")
+    assert capfd.readouterr()[0] == ""
+
+
+def test_memory_sink_delivers_long_output_in_chunks():
+    chunks = []
+    sink = MemorySink(chunks.append)
+    lines = [f"line {number:05d}" for number in range(20000)]
+    for line in lines:
+        sink.write(line)
+    sink.flush()
+    assert len(chunks) == 3
+    assert sum(chunks, []) + sink.take() == lines
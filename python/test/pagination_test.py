@@ -0,0 +1,106 @@
+import shutil
+
+import pytest
+
+from src.output_sink import MemorySink
+from src.player_session import PlayerSession
+from src.playlist_store import SqlitePlaylistStore
+from src.video import Video
+from src.video_catalog import VIDEOS_PATH
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+from src.video_playlist import Playlist
+
+
+def _pages(page, limit):
+    cursor = None
+    while True:
+        videos, cursor = page(limit, cursor)
+        yield [video.video_id for video in videos]
+        if cursor is None:
+            return
+
+
+def test_library_pages_follow_title_order():
+    library = VideoLibrary()
+    assert list(_pages(library.page_by_title, 2)) == [
+        ["amazing_cats_video_id", "another_cat_video_id"],
+        ["funny_dogs_video_id", "life_at_google_video_id"],
+        ["nothing_video_id"],
+    ]
+    assert list(_pages(library.page_by_title, 5)) == [
+        [video.video_id for video in library.iter_videos_by_title()]]
+
+
+def test_library_cursor_survives_reload(tmp_path):
+    path = tmp_path / "videos.txt"
+    shutil.copy(VIDEOS_PATH, path)
+    library = VideoLibrary(path)
+    videos, cursor = library.page_by_title(2)
+    assert [video.title for video in videos] == [
+        "Amazing Cats", "Another Cat Video"]
+
+    lines = path.read_text().splitlines()
+    lines = [line for line in lines if "another_cat" not in line]
+    lines.append("Best of Cats | best_cats_video_id | #cat")
+    path.write_text("\n".join(lines) + "\n")
+    library.reload()
+
+    videos, cursor = library.page_by_title(2, cursor)
+    assert [video.title for video in videos] == ["Best of Cats", "Funny Dogs"]
+
+
+def test_bad_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        VideoLibrary().page_by_title(2, "not a cursor")
+    with pytest.raises(ValueError):
+        Playlist("list").page(2, "WyJhIl0")
+
+
+def test_playlist_cursor_survives_removals():
+    playlist = Playlist("list")
+    for number in range(40):
+        playlist.add_video(Video(f"Video {number}", f"video_{number}", ()))
+    page, cursor = playlist.page(3)
+    assert [video.video_id for video in page] == [
+        "video_0", "video_1", "video_2"]
+
+    # Enough removals to compact the playlist behind the cursor.
+    for number in range(1, 30):
+        playlist.remove_video(f"video_{number}")
+    page, cursor = playlist.page(3, cursor)
+    assert [video.video_id for video in page] == [
+        "video_30", "video_31", "video_32"]
+    assert len(list(_pages(playlist.page, 4))) == 3
+
+
+def test_player_pages_playlist(tmp_path):
+    library = VideoLibrary()
+    store = SqlitePlaylistStore(tmp_path / "playlists.db", library)
+    player = VideoPlayer(output=MemorySink(), video_library=library,
+                         session=PlayerSession(store))
+    player.create_playlist("my_list")
+    for video_id in ("nothing_video_id", "amazing_cats_video_id",
+                     "funny_dogs_video_id"):
+        player.add_to_playlist("my_list", video_id)
+    player.output.take()
+
+    player.show_playlist_page("MY_LIST", "2")
+    lines = player.output.take()
+    assert lines[:3] == [
+        "Showing playlist: MY_LIST",
+        "Video about nothing (nothing_video_id) []",
+        "Amazing Cats (amazing_cats_video_id) [#cat #animal]",
+    ]
+    cursor = lines[3].split(": ")[1]
+    player.show_playlist_page("my_list", "2", cursor)
+    player.show_playlist_page("my_list", "two")
+    player.show_playlist_page("other", "2")
+    assert player.output.take() == [
+        "Showing playlist: my_list",
+        "Funny Dogs (funny_dogs_video_id) [#dog #animal]",
+        "No more videos",
+        "Cannot show playlist my_list: Page size must be a positive number",
+        "Cannot show playlist other: Playlist does not exist",
+    ]
+    store.close()
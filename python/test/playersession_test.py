@@ -0,0 +1,40 @@
+from src.output_sink import MemorySink
+from src.player_session import PlayerSession
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def test_players_sharing_library_keep_own_state():
+    library = VideoLibrary()
+    first = VideoPlayer(output=MemorySink(), video_library=library)
+    second = VideoPlayer(output=MemorySink(), video_library=library)
+
+    first.play_video("amazing_cats_video_id")
+    first.create_playlist("cats")
+    second.show_playing()
+    second.show_all_playlists()
+    assert second.output.take() == ["No video is currently playing",
+                                    "No playlists exist yet"]
+
+    second.flag_video("funny_dogs_video_id")
+    first.play_video("funny_dogs_video_id")
+    first.show_all_playlists()
+    assert first.output.take() == [
+        "Playing video: Amazing Cats",
+        "Successfully created new playlist: cats",
+        "Cannot play video: Video is currently flagged (reason: Not supplied)",
+        "Showing all playlists:",
+        "cats",
+    ]
+
+
+def test_session_can_move_between_players():
+    library = VideoLibrary()
+    session = PlayerSession()
+    VideoPlayer(output=MemorySink(), video_library=library,
+                session=session).play_video("funny_dogs_video_id")
+    player = VideoPlayer(output=MemorySink(), video_library=library,
+                         session=session)
+    player.show_playing()
+    assert player.output.take() == [
+        "Currently playing: Funny Dogs (funny_dogs_video_id) [#dog #animal]"]
@@ -0,0 +1,22 @@
+from src.playlist_registry import PlaylistRegistry
+
+
+def test_registry_ignores_case():
+    registry = PlaylistRegistry()
+    playlist = registry.create("my_PLAYlist")
+    assert playlist.name == "my_PLAYlist"
+    assert registry.get("MY_playlist") is playlist
+    assert registry.create("my_playlist") is None
+    assert len(registry) == 1
+
+
+def test_registry_lists_playlists_sorted_by_name():
+    registry = PlaylistRegistry()
+    for name in ("b_list", "C_list", "a_list"):
+        registry.create(name)
+    assert [playlist.name for playlist in registry] == [
+        "C_list", "a_list", "b_list"]
+
+    assert registry.delete("A_LIST").name == "a_list"
+    assert registry.delete("a_list") is None
+    assert [playlist.name for playlist in registry] == ["C_list", "b_list"]
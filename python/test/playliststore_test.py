@@ -0,0 +1,112 @@
+from src.output_sink import MemorySink
+from src.player_session import PlayerSession
+from src.playlist_store import SqlitePlaylistStore
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def _player(path, library):
+    store = SqlitePlaylistStore(path, library)
+    return store, VideoPlayer(output=MemorySink(), video_library=library,
+                              session=PlayerSession(store))
+
+
+def test_store_keeps_playlists_after_reopen(tmp_path):
+    path = tmp_path / "playlists.db"
+    library = VideoLibrary()
+    store, player = _player(path, library)
+    player.create_playlist("my_PLAYlist")
+    player.add_to_playlist("my_playlist", "amazing_cats_video_id")
+    player.add_to_playlist("my_playlist", "funny_dogs_video_id")
+    player.add_to_playlist("my_playlist", "nothing_video_id")
+    player.remove_from_playlist("my_playlist", "funny_dogs_video_id")
+    player.create_playlist("another")
+    player.add_to_playlist("another", "life_at_google_video_id")
+    player.clear_playlist("another")
+    store.close()
+
+    store, player = _player(path, library)
+    player.show_all_playlists()
+    player.show_playlist("MY_PLAYLIST")
+    player.show_playlist("another")
+    assert player.output.take() == [
+        "Showing all playlists:",
+        "another",
+        "my_PLAYlist",
+        "Showing playlist: MY_PLAYLIST",
+        "Amazing Cats (amazing_cats_video_id) [#cat #animal]",
+        "Video about nothing (nothing_video_id) []",
+        "Showing playlist: another",
+        "No videos here yet",
+    ]
+    store.close()
+
+
+def test_store_ignores_case_and_sorts_names(tmp_path):
+    store = SqlitePlaylistStore(tmp_path / "playlists.db", VideoLibrary())
+    for name in ("b_list", "C_list", "a_list"):
+        assert store.create(name).name == name
+    assert store.create("A_LIST") is None
+    assert len(store) == 3
+    assert store.get("c_LIST").name == "C_list"
+    assert [playlist.name for playlist in store] == [
+        "C_list", "a_list", "b_list"]
+
+    assert store.delete("A_LIST").name == "a_list"
+    assert store.delete("a_list") is None
+    assert store.get("a_list") is None
+    assert [playlist.name for playlist in store] == ["C_list", "b_list"]
+    store.close()
+
+
+def test_store_commits_full_batches(tmp_path):
+    path = tmp_path / "playlists.db"
+    library = VideoLibrary()
+    store = SqlitePlaylistStore(path, library, batch_size=2)
+    playlist = store.create("cats")
+    playlist.add_video(library.get_video("amazing_cats_video_id"))
+    playlist.add_video(library.get_video("another_cat_video_id"))
+
+    # Only the first batch of two changes has been committed.
+    reader = SqlitePlaylistStore(path, library)
+    assert [video.video_id for video in reader.get("cats").get_videos()] == [
+        "amazing_cats_video_id"]
+    reader.close()
+    store.close()
+
+
+def test_store_adds_video_back_after_library_lost_it(tmp_path):
+    catalog = tmp_path / "videos.txt"
+    catalog.write_text(
+        "Amazing Cats | amazing_cats_video_id | #cat , #animal\n"
+        "Funny Dogs | funny_dogs_video_id | #dog , #animal\n")
+    path = tmp_path / "playlists.db"
+    store, player = _player(path, VideoLibrary(catalog))
+    player.create_playlist("pets")
+    player.add_to_playlist("pets", "amazing_cats_video_id")
+    player.add_to_playlist("pets", "funny_dogs_video_id")
+    store.close()
+
+    catalog.write_text("Funny Dogs | funny_dogs_video_id | #dog , #animal\n")
+    library = VideoLibrary(catalog)
+    store, player = _player(path, library)
+    player.show_playlist("pets")
+    catalog.write_text(
+        "Amazing Cats | amazing_cats_video_id | #cat , #animal\n"
+        "Funny Dogs | funny_dogs_video_id | #dog , #animal\n")
+    library.reload(force=True)
+    player.add_to_playlist("pets", "amazing_cats_video_id")
+    store.close()
+    assert player.output.take() == [
+        "Showing playlist: pets",
+        "Funny Dogs (funny_dogs_video_id) [#dog #animal]",
+        "Added video to pets: Amazing Cats",
+    ]
+
+    store, player = _player(path, VideoLibrary(catalog))
+    player.show_playlist("pets")
+    assert player.output.take() == [
+        "Showing playlist: pets",
+        "Funny Dogs (funny_dogs_video_id) [#dog #animal]",
+        "Amazing Cats (amazing_cats_video_id) [#cat #animal]",
+    ]
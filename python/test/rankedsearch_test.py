@@ -0,0 +1,115 @@
+import random
+
+from src.command_parser import CommandParser
+from src.video_index import match_score
+from src.video_library import TAG_SCORE
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def _write_catalog(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text(
+        "Funny Dogs | funny_dogs_video_id | #dog , #animal\n"
+        "Amazing Cats | amazing_cats_video_id | #cat , #animal\n"
+        "Cats at Home | cats_home_video_id |\n"
+        "Bobcats | bobcats_video_id | #wild\n"
+        "Cat Tricks | cat_tricks_video_id | #cat\n"
+        "Life at Google | life_at_google_video_id | #google , #career\n")
+    return path
+
+
+def test_ranked_search_orders_by_tags_then_match_position(tmp_path):
+    library = VideoLibrary(_write_catalog(tmp_path))
+    ranked = library.search_ranked("cat", 10)
+    assert [video.video_id for video in ranked] == [
+        "cat_tricks_video_id", "amazing_cats_video_id",
+        "cats_home_video_id", "bobcats_video_id"]
+    assert [video.video_id for video in library.search_ranked("#CAT", 2)] == [
+        "cat_tricks_video_id", "amazing_cats_video_id"]
+    assert library.search_ranked("horse", 10) == []
+
+
+def test_ranked_search_skips_flagged_videos(tmp_path):
+    library = VideoLibrary(_write_catalog(tmp_path))
+    library.flag_video("cat_tricks_video_id", "dont_like_tricks")
+    assert [video.video_id for video in library.search_ranked("cat", 2)] == [
+        "amazing_cats_video_id", "cats_home_video_id"]
+
+
+def test_ranked_search_finds_titles_starting_with_the_term_in_any_case(
+        tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text(
+        "iPhone Review | iphone_review_video_id | #tech\n"
+        "Cheap iPhone Cases | iphone_cases_video_id | #tech\n"
+        "My old iphone | old_iphone_video_id | #tech\n")
+    library = VideoLibrary(path)
+    assert [video.video_id for video in library.search_ranked(
+        "iphone", 1)] == ["iphone_review_video_id"]
+
+
+def test_ranked_search_scores_titles_longer_in_upper_case(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text(
+        "Großstraße Fußball ok | fussball_video_id |\n"
+        "Große Party | party_video_id |\n"
+        "Partyraum | partyraum_video_id |\n"
+        "Afterparty | afterparty_video_id |\n")
+    library = VideoLibrary(path)
+    assert [video.video_id for video in library.search_ranked("ok", 5)] == [
+        "fussball_video_id"]
+    assert [video.video_id for video in library.search_ranked(
+        "party", 5)] == ["partyraum_video_id", "party_video_id",
+                         "afterparty_video_id"]
+
+
+def test_ranked_search_matches_a_full_sort(tmp_path):
+    rng = random.Random(0)
+    words = ["cat", "dog", "ss", "straße", "iphone", "ıi", "cats", "a"]
+
+    def random_case(word):
+        return "".join(rng.choice([c.lower(), c.upper()]) for c in word)
+
+    for catalog in range(100):
+        rows = []
+        for number in range(rng.randint(1, 60)):
+            title = " ".join(random_case(rng.choice(words))
+                             for _ in range(rng.randint(1, 3)))
+            tags = [f"#{rng.choice(words)}" for _ in range(rng.randint(0, 2))]
+            rows.append((title, f"video_{number}", tags))
+        path = tmp_path / f"videos{catalog}.txt"
+        path.write_text("".join(f"{title} | {video_id} | {' , '.join(tags)}\n"
+                                for title, video_id, tags in rows))
+        library = VideoLibrary(path)
+        for video_id in rng.sample([row[1] for row in rows], len(rows) // 5):
+            library.flag_video(video_id, "")
+        term = random_case(rng.choice(words))
+        k = rng.randint(1, 10)
+        expected = []
+        for ordinal, (title, video_id, tags) in enumerate(rows):
+            tagged = f"#{term.upper()}" in [tag.upper() for tag in tags]
+            score = match_score(title, term.upper())
+            if (score or tagged) and not library.get_video(video_id).flagged:
+                expected.append((-score - (TAG_SCORE if tagged else 0),
+                                 title, ordinal, video_id))
+        assert [video.video_id for video in library.search_ranked(term, k)] == [
+            video_id for *_, video_id in sorted(expected)[:k]], (rows, term, k)
+
+
+def test_search_videos_ranked_command(capfd):
+    player = VideoPlayer(read_answer=lambda: "1")
+    parser = CommandParser(player)
+    parser.execute_command(["SEARCH_VIDEOS_RANKED", "o", "2"])
+    parser.execute_command(["SEARCH_VIDEOS_RANKED", "o", "none"])
+    out, err = capfd.readouterr()
+    assert out.splitlines() == [
+        "Here are the results for o:",
+        "1) Another Cat Video (another_cat_video_id) [#cat #animal]",
+        "2) Funny Dogs (funny_dogs_video_id) [#dog #animal]",
+        "Would you like to play any of the above? If yes, specify the "
+        "number of the video.",
+        "If your answer is not a valid number, we will assume it's a no.",
+        "Playing video: Another Cat Video",
+        "Cannot search videos: Number of results must be a positive number",
+    ]
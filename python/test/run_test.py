@@ -0,0 +1,51 @@
+import io
+import json
+import pathlib
+import subprocess
+import sys
+
+from src.run import run_batch
+
+
+def test_run_batch_runs_commands_until_exit(capfd):
+    run_batch(io.StringIO(
+        "NUMBER_OF_VIDEOS\n"
+        "PLAY\n"
+        "PLAY amazing_cats_video_id\n"
+        "EXIT\n"
+        "STOP\n"))
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines == [
+        "5 videos in the library",
+        "Please enter PLAY command followed by video_id.",
+        "Playing video: Amazing Cats",
+    ]
+
+
+def test_run_batch_answers_search_from_next_line(capfd):
+    run_batch(io.StringIO("SEARCH_VIDEOS_WITH_TAG #cat\n1\nSHOW_PLAYING"))
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 7
+    assert "Playing video: Amazing Cats" in lines[5]
+    assert "Currently playing: Amazing Cats" in lines[6]
+
+
+def test_batch_mode_closes_resources_when_a_command_fails(tmp_path):
+    script = tmp_path / "script.txt"
+    # The undecodable line makes reading the script fail mid-run, once
+    # the commands before it filled more than one read.
+    script.write_bytes(b"FLAG_VIDEO amazing_cats_video_id\n"
+                       + b"NUMBER_OF_VIDEOS\n" * 1000 + b"\xff\xfe\n")
+    result = subprocess.run(
+        [sys.executable, "-m", "src.run", str(script),
+         "--journal", str(tmp_path / "journal"),
+         "--stats", str(tmp_path / "stats.json")],
+        cwd=pathlib.Path(__file__).parent.parent, capture_output=True)
+    assert result.returncode != 0
+    assert b"UnicodeDecodeError" in result.stderr
+    stats = json.loads((tmp_path / "stats.json").read_text())
+    assert stats["FLAG_VIDEO"]["calls"] == 1
+    log = (tmp_path / "journal" / "0.log").read_bytes()
+    assert b"amazing_cats_video_id" in log
@@ -0,0 +1,78 @@
+import array
+
+from src.search_cache import SearchCache
+from src.video_library import VideoLibrary
+
+
+def _ordinals(*ordinals):
+    return array.array("I", ordinals)
+
+
+def test_cache_evicts_least_recently_used():
+    entry_size = SearchCache._size(("title", "A"), _ordinals(1, 2))
+    cache = SearchCache(2 * entry_size)
+    cache.put(("title", "A"), 0, _ordinals(1, 2))
+    cache.put(("title", "B"), 0, _ordinals(3, 4))
+    assert list(cache.get(("title", "A"), 0)) == [1, 2]
+    cache.put(("title", "C"), 0, _ordinals(5, 6))
+    assert cache.get(("title", "B"), 0) is None
+    assert list(cache.get(("title", "C"), 0)) == [5, 6]
+    assert (cache.hits, cache.misses, cache.evictions) == (2, 1, 1)
+    assert len(cache) == 2
+    assert cache.size_bytes <= cache.max_bytes
+
+
+def test_cache_drops_entries_from_older_generations():
+    cache = SearchCache(1 << 20)
+    cache.put(("tag", "#CAT"), 0, _ordinals(1))
+    assert cache.get(("tag", "#CAT"), 1) is None
+    assert len(cache) == 0 and cache.size_bytes == 0
+    assert cache.get(("tag", "#CAT"), 0) is None
+    assert (cache.hits, cache.misses, cache.evictions) == (0, 2, 0)
+
+
+def test_cache_skips_results_larger_than_the_bound():
+    cache = SearchCache(100)
+    cache.put(("title", "A"), 0, _ordinals(*range(1000)))
+    assert len(cache) == 0 and cache.evictions == 0
+
+
+def test_library_caches_searches_until_it_changes(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text(
+        "Funny Dogs | funny_dogs_video_id | #dog , #animal\n"
+        "Amazing Cats | amazing_cats_video_id | #cat , #animal\n")
+    library = VideoLibrary(path)
+    cache = library.search_cache
+
+    def titles(videos):
+        return [video.title for video in videos]
+
+    assert titles(library.iter_videos_matching("cats")) == ["Amazing Cats"]
+    assert titles(library.iter_videos_matching("CATS")) == ["Amazing Cats"]
+    assert titles(library.iter_videos_with_tag("#ANIMAL")) == [
+        "Amazing Cats", "Funny Dogs"]
+    assert titles(library.iter_videos_with_tag("#animal")) == [
+        "Amazing Cats", "Funny Dogs"]
+    assert (cache.hits, cache.misses) == (2, 2)
+
+    library.flag_video("funny_dogs_video_id", "dont_like_dogs")
+    list(library.iter_videos_with_tag("#animal"))
+    assert (cache.hits, cache.misses) == (2, 3)
+
+    path.write_text(
+        "Amazing Cats | amazing_cats_video_id | #cat , #animal\n"
+        "Lazy Cats | lazy_cats_video_id | #cat\n")
+    library.reload(force=True)
+    assert titles(library.iter_videos_matching("cats")) == [
+        "Amazing Cats", "Lazy Cats"]
+    assert titles(library.iter_videos_with_tag("#animal")) == ["Amazing Cats"]
+    assert (cache.hits, cache.misses) == (2, 5)
+
+
+def test_library_cache_can_be_turned_off():
+    library = VideoLibrary(search_cache_bytes=0)
+    assert len(list(library.iter_videos_matching("cat"))) == 2
+    assert len(list(library.iter_videos_matching("cat"))) == 2
+    assert len(library.search_cache) == 0
+    assert library.search_cache.hits == 0
@@ -0,0 +1,115 @@
+import asyncio
+
+from src.server import Server
+from src.server import Session
+from src.server import encode_response
+from src.video_library import VideoLibrary
+
+
+async def _read_response(reader):
+    lines = []
+    while True:
+        line = (await reader.readline()).decode("utf-8").rstrip("\n")
+        if line == ".":
+            return lines
+        lines.append(line[1:] if line.startswith(".") else line)
+
+
+def test_encode_response_escapes_dots():
+    assert encode_response(["a", ".b"]) == b"a\n..b\n.\n"
+
+
+def test_session_answers_search_with_next_line():
+    session = Session(VideoLibrary())
+    lines = session.execute("SEARCH_VIDEOS_WITH_TAG #dog")
+    assert lines[0] == "Here are the results for #dog:"
+    assert session.execute("1") == ["Playing video: Funny Dogs"]
+    assert session.execute("PLAY") == [
+        "Please enter PLAY command followed by video_id."]
+
+
+def test_server_pipelines_sessions_sharing_library():
+    async def scenario():
+        library = VideoLibrary()
+        server = await asyncio.start_server(
+            Server(library).handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        first = await asyncio.open_connection("127.0.0.1", port)
+        second = await asyncio.open_connection("127.0.0.1", port)
+
+        first[1].write(b"PLAY amazing_cats_video_id\n"
+                       b"FLAG_VIDEO funny_dogs_video_id\n")
+        responses = [await _read_response(first[0]),
+                     await _read_response(first[0])]
+        second[1].write(b"SHOW_PLAYING\nPLAY funny_dogs_video_id\nEXIT\n")
+        responses += [await _read_response(second[0]),
+                      await _read_response(second[0])]
+        assert await second[0].read() == b""
+        first[1].close()
+        server.close()
+        await server.wait_closed()
+        return responses
+
+    assert asyncio.run(scenario()) == [
+        ["Playing video: Amazing Cats"],
+        ["Successfully flagged video: Funny Dogs (reason: Not supplied)"],
+        ["No video is currently playing"],
+        ["Cannot play video: Video is currently flagged "
+         "(reason: Not supplied)"],
+    ]
+
+
+def test_server_streams_long_responses_intact(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text("".join(f".Video {number:05d} | video_{number:05d}_id | #tag\n"
+                            for number in range(5000)))
+
+    async def scenario():
+        server = await asyncio.start_server(
+            Server(VideoLibrary(path)).handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"SHOW_ALL_VIDEOS\nNUMBER_OF_VIDEOS\n")
+        responses = [await _read_response(reader), await _read_response(reader)]
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return responses
+
+    videos, count = asyncio.run(scenario())
+    assert len(videos) == 5001
+    assert videos[1] == ".Video 00000 (video_00000_id) [#tag]"
+    assert videos[-1] == ".Video 04999 (video_04999_id) [#tag]"
+    assert count == ["5000 videos in the library"]
+
+
+def test_server_survives_bad_requests_and_failing_commands(capsys):
+    async def scenario():
+        library = VideoLibrary()
+
+        def broken():
+            raise RuntimeError("broken")
+        library.iter_videos_by_title = broken
+        server = await asyncio.start_server(
+            Server(library).handle, "127.0.0.1", 0, limit=64)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"PLAY caf\xe9\n"
+                     + b"PLAY " + b"x" * 200 + b"\n"
+                     + b"SHOW_ALL_VIDEOS\n"
+                     + b"PLAY amazing_cats_video_id\nEXIT\n")
+        responses = [await _read_response(reader) for _ in range(4)]
+        assert await reader.read() == b""
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return responses
+
+    assert asyncio.run(scenario()) == [
+        ["Cannot play video: Video does not exist"],
+        ["Please enter a shorter command."],
+        ["Here's a list of all available videos:",
+         "Cannot run command: Internal server error"],
+        ["Playing video: Amazing Cats"],
+    ]
+    assert "RuntimeError: broken" in capsys.readouterr().err
@@ -0,0 +1,121 @@
+from src.output_sink import MemorySink
+from src.playlist_registry import PlaylistRegistry
+from src.state_journal import StateJournal
+from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
+
+
+def _restored(directory, **options):
+    journal = StateJournal(directory, **options)
+    library = VideoLibrary()
+    playlists = PlaylistRegistry()
+    journal.restore(library, playlists)
+    return journal, library, playlists
+
+
+def _state(library, playlists):
+    flags = {video.video_id: video.flag_reason
+             for video in library.iter_videos() if video.flagged}
+    return flags, {playlist.name: [video.video_id
+                                   for video in playlist.get_videos()]
+                   for playlist in playlists}
+
+
+def test_player_changes_survive_restart(tmp_path):
+    journal = StateJournal(tmp_path)
+    player = VideoPlayer(output=MemorySink(), journal=journal)
+    player.create_playlist("my_PLAYlist")
+    player.add_to_playlist("my_playlist", "amazing_cats_video_id")
+    player.add_to_playlist("my_playlist", "funny_dogs_video_id")
+    player.remove_from_playlist("MY_PLAYLIST", "amazing_cats_video_id")
+    player.create_playlist("gone")
+    player.delete_playlist("gone")
+    player.flag_video("nothing_video_id", "dont_like")
+    player.flag_video("life_at_google_video_id")
+    player.allow_video("life_at_google_video_id")
+    journal.close()
+
+    journal, library, playlists = _restored(tmp_path)
+    assert _state(library, playlists) == (
+        {"nothing_video_id": "dont_like"},
+        {"my_PLAYlist": ["funny_dogs_video_id"]})
+    journal.close()
+
+
+def test_compaction_keeps_state_and_bounds_log(tmp_path):
+    journal = StateJournal(tmp_path, compact_every=4)
+    journal.create_playlist("cats")
+    for _ in range(5):
+        journal.add_to_playlist("cats", "amazing_cats_video_id")
+        journal.remove_from_playlist("cats", "amazing_cats_video_id")
+    journal.add_to_playlist("cats", "another_cat_video_id")
+    journal.close()
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "3.log", "snapshot.json"]
+
+    journal, library, playlists = _restored(tmp_path)
+    assert _state(library, playlists) == (
+        {}, {"cats": ["another_cat_video_id"]})
+    journal.close()
+
+
+def test_recovery_drops_torn_tail(tmp_path):
+    journal = StateJournal(tmp_path / "journal")
+    journal.flag("funny_dogs_video_id", "one")
+    journal.flag("nothing_video_id", "two")
+    journal.close()
+    log = (tmp_path / "journal" / "0.log").read_bytes()
+    first_end = log.index(b"\n") + 1
+
+    # A crash can cut the log anywhere. Only whole changes are recovered,
+    # and new changes are appended after them.
+    for size in range(len(log) + 1):
+        directory = tmp_path / str(size)
+        directory.mkdir()
+        (directory / "0.log").write_bytes(log[:size])
+        journal, library, playlists = _restored(directory)
+        flags, _ = _state(library, playlists)
+        expected = {}
+        if size >= first_end:
+            expected["funny_dogs_video_id"] = "one"
+        if size == len(log):
+            expected["nothing_video_id"] = "two"
+        assert flags == expected
+
+        journal.allow("funny_dogs_video_id")
+        journal.close()
+        journal, library, playlists = _restored(directory)
+        expected.pop("funny_dogs_video_id", None)
+        assert _state(library, playlists)[0] == expected
+        journal.close()
+
+
+def test_recovery_drops_corrupted_change(tmp_path):
+    journal = StateJournal(tmp_path)
+    journal.flag("funny_dogs_video_id", "one")
+    journal.flag("nothing_video_id", "two")
+    journal.close()
+    log_path = tmp_path / "0.log"
+    log_path.write_bytes(log_path.read_bytes().replace(b"two", b"tw0"))
+
+    journal, library, playlists = _restored(tmp_path)
+    assert _state(library, playlists)[0] == {"funny_dogs_video_id": "one"}
+    journal.close()
+
+
+def test_recovery_ignores_log_left_by_interrupted_compaction(tmp_path):
+    journal = StateJournal(tmp_path)
+    journal.flag("funny_dogs_video_id", "one")
+    journal.allow("funny_dogs_video_id")
+    journal.sync()
+    stale_log = (tmp_path / "0.log").read_bytes()
+    journal.compact()
+    journal.close()
+    # The crash came after the snapshot was renamed, before the old log
+    # was deleted.
+    (tmp_path / "0.log").write_bytes(stale_log)
+
+    journal, library, playlists = _restored(tmp_path)
+    assert _state(library, playlists) == ({}, {})
+    assert not (tmp_path / "0.log").exists()
+    journal.close()
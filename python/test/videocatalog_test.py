@@ -0,0 +1,108 @@
+from src.video import Video
+from src.video_catalog import VIDEOS_PATH
+from src.video_catalog import TextCatalog
+from src.video_catalog import VideoCatalog
+from src.video_catalog import compile_catalog
+from src.video_catalog import is_compiled_catalog
+from src.video_catalog import read_shards
+from src.video_library import VideoLibrary
+
+
+def _compiled_library(tmp_path):
+    catalog_path = tmp_path / "videos.ytc"
+    assert compile_catalog(VIDEOS_PATH, catalog_path) == 5
+    return VideoLibrary(catalog_path)
+
+
+def test_compiled_catalog_is_detected(tmp_path):
+    catalog_path = tmp_path / "videos.ytc"
+    compile_catalog(VIDEOS_PATH, catalog_path)
+    assert is_compiled_catalog(catalog_path)
+    assert not is_compiled_catalog(VIDEOS_PATH)
+
+
+def test_compiled_library_has_all_videos(tmp_path):
+    library = _compiled_library(tmp_path)
+    videos = library.get_all_videos()
+    assert [video.video_id for video in videos] == [
+        "funny_dogs_video_id", "amazing_cats_video_id",
+        "another_cat_video_id", "life_at_google_video_id",
+        "nothing_video_id"]
+
+
+def test_compiled_library_parses_videos(tmp_path):
+    library = _compiled_library(tmp_path)
+    video = library.get_video("amazing_cats_video_id")
+    assert video.title == "Amazing Cats"
+    assert video.tags == ("#cat", "#animal")
+
+    video = library.get_video("nothing_video_id")
+    assert video.title == "Video about nothing"
+    assert video.tags == ()
+
+    assert library.get_video("does_not_exist") is None
+
+
+def test_compiled_library_returns_same_video_object(tmp_path):
+    library = _compiled_library(tmp_path)
+    video = library.get_video("funny_dogs_video_id")
+    video.flag("dont_like_dogs")
+    assert library.get_video("funny_dogs_video_id") is video
+    assert library.get_all_videos()[0].flagged
+
+
+def test_compiled_catalog_stores_title_order(tmp_path):
+    library = _compiled_library(tmp_path)
+    assert [video.video_id for video in library.iter_videos_by_title()] == [
+        "amazing_cats_video_id", "another_cat_video_id",
+        "funny_dogs_video_id", "life_at_google_video_id",
+        "nothing_video_id"]
+
+
+def test_video_catalog_reads_rows_from_videos():
+    text_catalog = TextCatalog.from_file(VIDEOS_PATH)
+    videos = [Video(*text_catalog.row(ordinal))
+              for ordinal in range(len(text_catalog))]
+    catalog = VideoCatalog(text_catalog, videos)
+    assert len(catalog) == len(text_catalog)
+    for ordinal in range(len(catalog)):
+        assert catalog.row(ordinal) == text_catalog.row(ordinal)
+    assert catalog.lookup("nothing_video_id") == 4
+    assert catalog.lookup("does_not_exist") is None
+    assert catalog.title_order() == text_catalog.title_order()
+
+
+def test_worker_shards_match_shards_read_in_process(tmp_path):
+    lines = VIDEOS_PATH.read_text().splitlines()
+    paths = [tmp_path / "videos-1.txt", tmp_path / "videos-2.txt",
+             tmp_path / "videos-3.txt"]
+    paths[0].write_text("\n".join(lines[:3]))
+    paths[1].write_text("")
+    compile_catalog(VIDEOS_PATH, paths[2])
+    in_process = read_shards(paths, processes=1)
+    workers = read_shards(paths, processes=2)
+    assert len(workers) == len(in_process) == 5
+    for ordinal in range(len(workers)):
+        assert workers.row(ordinal) == in_process.row(ordinal)
+    assert workers.duplicate_ids == in_process.duplicate_ids
+    assert workers.lookup("nothing_video_id") == 4
+
+
+def test_shards_report_ids_repeated_inside_a_shard(tmp_path):
+    rows = [f"Video {number} | video_{number % 5}_id | #tag{number % 3}"
+            for number in range(20)]
+    whole = tmp_path / "videos.txt"
+    whole.write_text("\n".join(rows))
+    paths = []
+    for shard in range(3):
+        paths.append(tmp_path / f"videos-{shard}.txt")
+        paths[-1].write_text("\n".join(rows[shard * 7:shard * 7 + 7]))
+    single = TextCatalog.from_file(whole)
+    for processes in (1, 2):
+        sharded = read_shards(paths, processes=processes)
+        assert len(sharded.duplicate_ids) == len(single.duplicate_ids) == 15
+        assert sorted(sharded.duplicate_ids) == sorted(single.duplicate_ids)
+        # The first shard's own repeats come first.
+        assert sharded.duplicate_ids[:2] == ["video_0_id", "video_1_id"]
+        assert [sharded.row(ordinal) for ordinal in range(len(sharded))] == [
+            single.row(ordinal) for ordinal in range(len(single))]
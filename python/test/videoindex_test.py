@@ -0,0 +1,159 @@
+import random
+
+from src.video_index import BKTree
+from src.video_index import FuzzyIndex
+from src.video_index import PlayableSet
+from src.video_index import TagIndex
+from src.video_index import TitleIndex
+from src.video_index import TopK
+from src.video_index import TrigramIndex
+from src.video_index import edit_distance
+from src.video_index import match_score
+from src.video_index import max_edits
+
+
+def test_title_index_keeps_title_order():
+    titles = {0: "b", 1: "a", 2: "c"}
+    index = TitleIndex([1, 0, 2], titles.__getitem__)
+
+    titles[3] = "b"
+    index.add(3)
+    assert list(index) == [1, 0, 3, 2]
+
+    index.remove(0, "b")
+    titles[0] = "d"
+    index.add(0)
+    assert list(index) == [1, 3, 2, 0]
+    assert len(index) == 4
+
+
+def test_tag_index_posting_lists_are_title_ordered():
+    rows = {0: ("b", ("#cat", "#animal")), 1: ("a", ("#CAT",)),
+            2: ("c", ("#dog", "#animal"))}
+    index = TagIndex([1, 0, 2], lambda o: rows[o][1], lambda o: rows[o][0])
+
+    assert list(index.search("#Cat")) == [1, 0]
+    assert list(index.search("#animal")) == [0, 2]
+    assert list(index.search("#bird")) == []
+
+    rows[3] = ("a", ("#bird", "#animal"))
+    index.add(3)
+    assert list(index.search("#animal")) == [3, 0, 2]
+
+    index.remove(2, "c", ("#dog", "#animal"))
+    assert "#dog" not in index
+    assert list(index.search("#animal")) == [3, 0]
+
+
+def test_trigram_index_matches_substrings_in_title_order():
+    titles = {0: "Funny Dogs", 1: "Amazing Cats", 2: "Another Cat Video"}
+    index = TrigramIndex(TitleIndex([1, 2, 0], titles.__getitem__),
+                         titles.__getitem__)
+
+    assert list(index.search("cat")) == [1, 2]
+    assert list(index.search("a")) == [1, 2]
+    assert list(index.search("DOGS")) == [0]
+    assert list(index.search("cats dogs")) == []
+
+    index.remove(1, "Amazing Cats")
+    assert list(index.search("cat")) == [2]
+
+
+def test_playable_set_add_remove_and_choice():
+    playable = PlayableSet([0, 1, 2])
+    playable.remove(0)
+    playable.remove(0)
+    playable.add(7)
+    assert sorted(playable._members) == [1, 2, 7]
+    assert 0 not in playable and 7 in playable and 5 not in playable
+
+    rng = random.Random(1)
+    assert {playable.choice(rng) for _ in range(100)} == {1, 2, 7}
+
+
+def test_title_index_pages_after_key():
+    titles = {0: "b", 1: "a", 2: "c", 3: "b"}
+    index = TitleIndex([1, 0, 3, 2], titles.__getitem__)
+    assert list(index.page(2)) == [1, 0]
+    assert list(index.page(2, ("b", 0))) == [3, 2]
+    assert list(index.page(5, ("c", 2))) == []
+
+    # The key of a removed video still marks where the next page starts.
+    index.remove(0, "b")
+    assert list(index.page(2, ("b", 0))) == [3, 2]
+    assert list(index.page(2, ("a", 9))) == [3, 2]
+
+
+def test_title_index_finds_prefix_range():
+    titles = {0: "Cats", 1: "Cat", 2: "Dogs", 3: "Ca", 4: "cats"}
+    index = TitleIndex([3, 1, 0, 2, 4], titles.__getitem__)
+    assert list(index.with_prefix("Cat")) == [1, 0]
+    assert list(index.with_prefix("cat")) == [4]
+    assert list(index.with_prefix("Z")) == []
+
+
+def test_title_index_finds_prefix_range_in_any_case():
+    # More titles than are filtered without binary search.
+    titles = ["Ca", "CaT", "Dogs", "cAts", "cat", "catalog", "Straße",
+              "STRASSE band", "strasse", "Stras", "Iris", "ıris", "İris"]
+    titles += [f"Filler {number}" for number in range(20)]
+    order = sorted(range(len(titles)), key=lambda o: (titles[o], o))
+    index = TitleIndex(order, titles.__getitem__)
+    assert [titles[o] for o in index.with_upper_prefix("CAT")] == [
+        "CaT", "cAts", "cat", "catalog"]
+    assert [titles[o] for o in index.with_upper_prefix("STRASS")] == [
+        "STRASSE band", "Straße", "strasse"]
+    assert [titles[o] for o in index.with_upper_prefix("IRIS")] == [
+        "Iris", "ıris"]
+    assert list(index.with_upper_prefix("Z")) == []
+
+
+def test_match_score_prefers_early_matches():
+    assert match_score("Cats and dogs", "CAT") == 3
+    assert match_score("Funny cats", "CAT") == 2
+    assert match_score("Bobcats", "CAT") == 1
+    assert match_score("Dogs", "CAT") == 0
+
+
+def test_top_k_keeps_best_and_first_of_ties():
+    top = TopK(3)
+    for score, item in ((1, "a"), (3, "b"), (2, "c"), (3, "d"), (3, "e"),
+                        (2, "f")):
+        top.push(score, item)
+    assert top.full()
+    assert top.floor() == 3
+    assert top.items() == ["b", "d", "e"]
+
+
+def test_edit_distance_and_typo_allowance():
+    assert edit_distance("AMZING", "AMAZING") == 1
+    assert edit_distance("KITTEN", "SITTING") == 3
+    assert edit_distance("", "CAT") == 3
+    assert [max_edits(term) for term in ("at", "cats", "amazing")] == [0, 1, 2]
+
+
+def test_bk_tree_finds_close_words():
+    words = ["AMAZING", "CATS", "CAT", "DOGS", "GOOGLE", "LIFE", "COATS"]
+    tree = BKTree(words)
+    tree.add("CATS")
+    assert tree.search("CAST", 1) == [(1, "CAT")]
+    assert tree.search("CAT", 1) == [(0, "CAT"), (1, "CATS")]
+    assert tree.search("CATS", 2) == [(0, "CATS"), (1, "CAT"), (1, "COATS")]
+    assert tree.search("DOTS", 2) == [(1, "DOGS"), (2, "CATS"), (2, "COATS")]
+    # Past its deadline the search stops after the first word.
+    assert len(tree.search("CATS", 2, deadline=0)) <= 1
+
+
+def test_fuzzy_index_ranks_closest_tokens_first():
+    rows = {0: ("Amazing Cats", ("#cat",)), 1: ("Cat Tricks", ()),
+            2: ("Funny Dogs", ("#dog",))}
+    index = FuzzyIndex([0, 1, 2], lambda o: rows[o][1], lambda o: rows[o][0])
+    assert list(index.search("cats", 1)) == [0, 1]
+    assert list(index.search("#dgo", 1)) == []
+    assert list(index.search("dgos", 2)) == [2]
+
+    index.remove(0, "Amazing Cats", ("#cat",))
+    rows[0] = ("Amazing Kittens", ())
+    index.add(0)
+    assert list(index.search("cats", 1)) == [1]
+    assert list(index.search("kitens", 2)) == [0]
@@ -1,4 +1,10 @@
+import random
+import shutil
+
+from src.command_parser import CommandParser
+from src.video_catalog import VIDEOS_PATH
 from src.video_library import VideoLibrary
+from src.video_player import VideoPlayer
 
 
 def test_library_has_all_videos():
@@ -24,3 +30,163 @@ def test_parses_video_correctly_without_tags():
     assert video.title == "Video about nothing"
     assert video.video_id == "nothing_video_id"
     assert video.tags == ()
+
+
+def test_lazy_library_creates_videos_on_demand():
+    library = VideoLibrary(lazy=True)
+    assert len(library) == 5
+    assert library._videos == {}
+
+    video = library.get_video("life_at_google_video_id")
+    assert video.title == "Life at Google"
+    assert list(library._videos) == ["life_at_google_video_id"]
+    assert library.get_video("life_at_google_video_id") is video
+
+
+def test_iter_videos_streams_in_catalog_order():
+    library = VideoLibrary(lazy=True)
+    videos = library.iter_videos()
+    assert next(videos).video_id == "funny_dogs_video_id"
+    assert len(library._videos) == 1
+    assert [video.video_id for video in videos] == [
+        "amazing_cats_video_id", "another_cat_video_id",
+        "life_at_google_video_id", "nothing_video_id"]
+
+
+def test_videos_share_tag_tuples():
+    library = VideoLibrary()
+    cats = library.get_video("amazing_cats_video_id")
+    other_cats = library.get_video("another_cat_video_id")
+    assert cats.tags is other_cats.tags
+    assert not hasattr(cats, "__dict__")
+
+
+def test_iter_videos_by_title():
+    library = VideoLibrary()
+    assert [video.title for video in library.iter_videos_by_title()] == [
+        "Amazing Cats", "Another Cat Video", "Funny Dogs", "Life at Google",
+        "Video about nothing"]
+
+
+def test_iter_videos_with_tag():
+    library = VideoLibrary()
+    assert [video.title for video in library.iter_videos_with_tag("#ANIMAL")] == [
+        "Amazing Cats", "Another Cat Video", "Funny Dogs"]
+    assert list(library.iter_videos_with_tag("#blah")) == []
+
+
+def _copy_catalog(tmp_path):
+    path = tmp_path / "videos.txt"
+    shutil.copy(VIDEOS_PATH, path)
+    return path
+
+
+def test_reload_without_changes_does_nothing(tmp_path):
+    library = VideoLibrary(_copy_catalog(tmp_path))
+    assert library.reload() == ([], [], [])
+
+
+def test_reload_applies_delta(tmp_path):
+    path = _copy_catalog(tmp_path)
+    library = VideoLibrary(path)
+    assert len(list(library.iter_videos_matching("cat"))) == 2
+    cats = library.get_video("amazing_cats_video_id")
+    cats.flag("dont_like_cats")
+
+    lines = path.read_text().splitlines()
+    lines[1] = "Amazing Kittens | amazing_cats_video_id | #cat , #kitten"
+    del lines[3]
+    lines.append("Cooking with Cats | cooking_cats_video_id | #cat , #food")
+    path.write_text("\n".join(lines) + "\n")
+
+    delta = library.reload()
+    assert delta.added == ["cooking_cats_video_id"]
+    assert delta.removed == ["life_at_google_video_id"]
+    assert delta.changed == ["amazing_cats_video_id"]
+
+    assert len(library) == 5
+    assert library.get_video("life_at_google_video_id") is None
+    assert library.get_video("amazing_cats_video_id") is cats
+    assert cats.title == "Amazing Kittens"
+    assert cats.flag_reason == "dont_like_cats"
+    assert [video.title for video in library.iter_videos_by_title()] == [
+        "Amazing Kittens", "Another Cat Video", "Cooking with Cats",
+        "Funny Dogs", "Video about nothing"]
+    assert [video.title for video in library.iter_videos_matching("cat")] == [
+        "Another Cat Video", "Cooking with Cats"]
+    assert [video.title for video in library.iter_videos_with_tag("#kitten")] == [
+        "Amazing Kittens"]
+
+    path.write_text("\n".join(lines[:-1] + ["Life at Google | life_at_google_video_id |"]))
+    delta = library.reload(force=True)
+    assert delta.added == ["life_at_google_video_id"]
+    assert delta.removed == ["cooking_cats_video_id"]
+    assert library.get_video("life_at_google_video_id").tags == ()
+
+
+def test_reload_command_keeps_library_when_catalog_is_bad(tmp_path, capfd):
+    path = _copy_catalog(tmp_path)
+    library = VideoLibrary(path)
+    player = VideoPlayer(video_library=library)
+    parser = CommandParser(player)
+    parser.execute_command(["FLAG_VIDEO", "amazing_cats_video_id"])
+    with open(path, "a") as catalog_file:
+        catalog_file.write("\nHalf Written | half_written_video_id\n")
+    parser.execute_command(["RELOAD"])
+    path.unlink()
+    parser.execute_command(["RELOAD"])
+    out, err = capfd.readouterr()
+    lines = out.splitlines()
+    assert lines[1] == (f"Cannot reload videos: {path}:6: expected 3 fields, "
+                        f"found 2")
+    assert lines[2].startswith("Cannot reload videos: ")
+    assert len(library) == 5
+    assert library.get_video("half_written_video_id") is None
+    assert library.get_video("amazing_cats_video_id").flagged
+
+
+def test_indexes_built_after_reload_see_delta(tmp_path):
+    path = _copy_catalog(tmp_path)
+    library = VideoLibrary(path, lazy=True)
+    path.write_text("Zebra Cats | amazing_cats_video_id | #cat\n"
+                    "Funny Dogs | funny_dogs_video_id | #dog , #animal\n"
+                    "A Cat | a_cat_video_id | #cat\n")
+    library.reload(force=True)
+    assert [video.title for video in library.iter_videos_by_title()] == [
+        "A Cat", "Funny Dogs", "Zebra Cats"]
+    assert [video.title for video in library.iter_videos_with_tag("#cat")] == [
+        "A Cat", "Zebra Cats"]
+
+
+def test_library_merges_shards_in_path_order(tmp_path):
+    lines = VIDEOS_PATH.read_text().splitlines()
+    (tmp_path / "videos-1.txt").write_text("\n".join(lines[:2]))
+    (tmp_path / "videos-2.txt").write_text(
+        "\n".join(lines[2:] + ["Funny Dogs 2 | funny_dogs_video_id | #dog"]))
+
+    library = VideoLibrary(
+        [tmp_path / "videos-2.txt", tmp_path / "videos-1.txt"], processes=2)
+    assert [video.video_id for video in library.iter_videos()] == [
+        "funny_dogs_video_id", "amazing_cats_video_id",
+        "another_cat_video_id", "life_at_google_video_id",
+        "nothing_video_id"]
+    assert library.duplicate_ids == ["funny_dogs_video_id"]
+    assert library.get_video("funny_dogs_video_id").title == "Funny Dogs 2"
+
+
+def test_random_playable_video_skips_flagged_and_is_seedable():
+    library = VideoLibrary(rng=random.Random(3))
+    for video_id in ("funny_dogs_video_id", "amazing_cats_video_id",
+                     "another_cat_video_id", "life_at_google_video_id"):
+        library.flag_video(video_id, "Not supplied")
+    assert library.get_random_playable_video().video_id == "nothing_video_id"
+
+    library.flag_video("nothing_video_id", "Not supplied")
+    assert library.get_random_playable_video() is None
+
+    library.allow_video("amazing_cats_video_id")
+    assert library.get_random_playable_video().video_id == "amazing_cats_video_id"
+
+    picks = [VideoLibrary(rng=random.Random(7)).get_random_playable_video().video_id
+             for _ in range(2)]
+    assert picks[0] == picks[1]
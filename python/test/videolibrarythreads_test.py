@@ -0,0 +1,102 @@
+import threading
+
+from src.rw_lock import ReadWriteLock
+from src.video_library import VideoLibrary
+
+_REASONS = ("spam", "dont_like_cats", "Not supplied")
+
+
+def test_write_lock_excludes_readers():
+    lock = ReadWriteLock()
+    events = []
+
+    def write():
+        with lock.writing():
+            events.append("w")
+
+    with lock.reading():
+        writer = threading.Thread(target=write)
+        writer.start()
+        writer.join(0.05)
+        assert events == []
+    writer.join(1)
+    assert events == ["w"]
+
+
+def test_concurrent_flags_and_reads_stay_consistent():
+    library = VideoLibrary(thread_safe=True)
+    video_ids = [video.video_id for video in library.iter_videos()]
+    errors = []
+    stop = threading.Event()
+
+    def write(offset):
+        for step in range(300):
+            video_id = video_ids[(step + offset) % len(video_ids)]
+            if library.get_video(video_id).flagged:
+                library.allow_video(video_id)
+            else:
+                library.flag_video(video_id, _REASONS[step % len(_REASONS)])
+
+    def read():
+        while not stop.is_set():
+            for video in library.iter_videos_by_title():
+                if video._flag_reason not in (None,) + _REASONS:
+                    errors.append(video.video_id)
+            if len(list(library.iter_videos_with_tag("#animal"))) != 3:
+                errors.append("#animal")
+            library.get_random_playable_video()
+            with library._reading():
+                playable = library._playable_set()
+                for ordinal, video_id in enumerate(video_ids):
+                    if library._get_video(video_id).flagged == (
+                            ordinal in playable):
+                        errors.append(video_id)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    writers = [threading.Thread(target=write, args=(offset,))
+               for offset in range(2)]
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    assert errors == []
+    assert len(library) == 5
+
+
+def test_lazy_reads_create_videos_while_flag_sets_are_built(tmp_path):
+    path = tmp_path / "videos.txt"
+    path.write_text("".join(f"Video {number} | video_{number}_id | #tag\n"
+                            for number in range(50_000)))
+    errors = []
+    for _ in range(10):
+        library = VideoLibrary(path, lazy=True, thread_safe=True)
+        library.flag_video("video_7_id", "spam")
+        start = threading.Barrier(3)
+
+        def run(action):
+            start.wait()
+            try:
+                action()
+            except Exception as error:
+                errors.append(error)
+
+        def build_flag_sets():
+            # Build while the readers are still creating videos.
+            while len(library._videos) < 10_000:
+                pass
+            library.get_random_playable_video()
+            if library.query("FLAGGED", 10)[0] != 1:
+                errors.append("FLAGGED")
+
+        threads = [threading.Thread(target=run, args=(action,)) for action in
+                   (library.get_all_videos, library.get_all_videos,
+                    build_flag_sets)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert errors == []